@@ -0,0 +1,201 @@
+"""
+Command line start up benchmark.
+
+Runs `ec` commands that return without crawling (the help, a usage error)
+    a number of times and reports their wall time, together with the heavy
+    packages each command imported and their import time (python -X
+    importtime). Importing the crawler module, which loads the browser
+    stack, is measured for comparison.
+
+Usage:
+    python benchmarks/import_time.py [--runs 20] [--output results.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+from tabulate import tabulate
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_EC = os.path.join(_HERE, os.pardir, "ec")
+
+# packages that are slow to import
+HEAVY_PACKAGES = [
+    "pandas",
+    "selenium",
+    "webdriver_manager",
+    "tabulate",
+    "urllib3",
+]
+
+COMMANDS = [
+    ("ec --help", [_EC, "--help"]),
+    ("ec handout list --bad", [_EC, "handout", "list", "--bad"]),
+    ("ec serve --browsers x", [_EC, "serve", "--browsers", "x"]),
+    (
+        "import educrawler.crawler",
+        [
+            "-c",
+            "import sys; sys.path.insert(0, %r); import educrawler.crawler"
+            % (os.path.join(_HERE, os.pardir, "src")),
+        ],
+    ),
+]
+
+
+def time_command(arguments, runs):
+    """
+    Times a python command.
+
+    Arguments:
+        arguments - arguments of the python interpreter
+        runs - number of runs
+
+    Returns:
+        wall_times - sorted wall times of the runs in seconds
+    """
+
+    wall_times = []
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.call(
+            [sys.executable] + arguments,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        wall_times.append(time.perf_counter() - start)
+
+    return sorted(wall_times)
+
+
+def heavy_imports(arguments):
+    """
+    Import times of the heavy packages a python command loads.
+
+    Arguments:
+        arguments - arguments of the python interpreter
+
+    Returns:
+        dictionary of package -> import time of its modules in seconds
+    """
+
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime"] + arguments,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+
+    imports = {}
+
+    # import time: self [us] | cumulative | imported module
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+
+        fields = line[len("import time:"):].split("|")
+        package = fields[-1].strip().split(".")[0]
+
+        if len(fields) != 3 or package not in HEAVY_PACKAGES:
+            continue
+
+        try:
+            self_time = int(fields[0]) / 1000000
+        except ValueError:
+            continue
+
+        imports[package] = imports.get(package, 0.0) + self_time
+
+    return imports
+
+
+def percentile(sorted_values, percent):
+    """
+    Nearest-rank percentile of sorted values.
+
+    """
+
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+
+    return sorted_values[int(rank) - 1]
+
+
+def main():
+    """
+    Runs the benchmark.
+
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Start up time of the ec command line."
+    )
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=20,
+        help="Number of runs of each command (default: 20).",
+    )
+    parser.add_argument(
+        "--output",
+        help="Write the results to a JSON file.",
+    )
+    args = parser.parse_args()
+
+    results = []
+
+    for name, arguments in COMMANDS:
+        wall_times = time_command(arguments, args.runs)
+
+        results.append(
+            {
+                "command": name,
+                "runs": args.runs,
+                "min": wall_times[0],
+                "p50": percentile(wall_times, 50),
+                "p95": percentile(wall_times, 95),
+                "heavy_imports": heavy_imports(arguments),
+            }
+        )
+
+    print(
+        tabulate(
+            [
+                [
+                    result["command"],
+                    "%.0f" % (result["min"] * 1000),
+                    "%.0f" % (result["p50"] * 1000),
+                    "%.0f" % (result["p95"] * 1000),
+                    ", ".join(
+                        "%s %.0f" % (package, import_time * 1000)
+                        for package, import_time in sorted(
+                            result["heavy_imports"].items()
+                        )
+                    )
+                    or "--",
+                ]
+                for result in results
+            ],
+            headers=[
+                "Command",
+                "Min ms",
+                "p50 ms",
+                "p95 ms",
+                "Heavy imports (ms)",
+            ],
+            tablefmt="psql",
+        )
+    )
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump({"results": results}, output_file, indent=2)
+
+
+if __name__ == "__main__":
+
+    main()
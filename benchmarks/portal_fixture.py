@@ -0,0 +1,474 @@
+"""
+Offline fixture of the Education section of portal.azure.com.
+
+Serves a single page imitating the blades the crawler reads (the course
+    list, course overview, lab, handout list and handout details blades) for
+    a synthetic tenant, with a configurable latency. Like in the portal, the
+    consumption of the handouts shows the "--" placeholder until it is
+    loaded, and the blades are stacked and replaced from the right as they
+    are opened. The crawler is pointed to the fixture with EC_PORTAL_ADDRESS.
+
+Usage:
+    python benchmarks/portal_fixture.py --handouts 100 --latency 200
+"""
+
+import json
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+# number of handouts -> (courses, labs per course, handouts per lab)
+TENANT_SIZES = {
+    10: (1, 2, 5),
+    100: (5, 4, 5),
+    1000: (10, 5, 20),
+}
+
+_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Education - Microsoft Azure (fixture)</title>
+</head>
+<body>
+<div id="blades"></div>
+<script>
+var TENANT = %(tenant)s;
+var LATENCY = %(latency)s;
+var PREFIX = "#blade/Microsoft_Azure_Education/EducationMenuBlade/";
+var COURSE_ROW = "fxs-portal-hover fxs-portal-focus azc-grid-row";
+var LINK = "ext-grid-clickable-link";
+var OVERVIEW = "ext-classroom-overview-";
+var EDIT = "ext-classroom-handout-edit-";
+
+// every hash change starts a new generation, the blades still waiting
+//   to be shown for an older one are dropped
+var generation = 0;
+
+function go(key) {
+    location.hash = PREFIX + key;
+}
+
+function element(tag, className, text) {
+    var el = document.createElement(tag);
+    if (className) {
+        el.className = className;
+    }
+    if (text !== undefined) {
+        el.textContent = text;
+    }
+    return el;
+}
+
+function link(className, text, key) {
+    var el = element("a", className, text);
+    el.href = "javascript:void(0)";
+    el.onclick = function () {
+        go(key);
+    };
+    return el;
+}
+
+function blade(key, title) {
+    var el = element("section", "fxs-blade");
+    el.setAttribute("data-key", key);
+    el.appendChild(element("h2", "fxs-blade-title-content", title));
+    return el;
+}
+
+function gridRow(className, values) {
+    var row = element("div", className);
+    for (var i = 0; i < values.length; i++) {
+        var cell = element("div", "azc-grid-cellContent");
+        if (typeof values[i] === "string") {
+            cell.textContent = values[i];
+        } else {
+            cell.appendChild(values[i]);
+        }
+        row.appendChild(cell);
+    }
+    return row;
+}
+
+// blade keys of a hash, e.g. classrooms/course/0/lab/1/handouts gives
+//   [classrooms, classrooms/course/0, classrooms/course/0/lab/1,
+//   classrooms/course/0/lab/1/handouts]
+function bladeKeys(hash) {
+    if (hash.indexOf(PREFIX) !== 0) {
+        return ["overview"];
+    }
+
+    var parts = hash.substring(PREFIX.length).split("/");
+    var keys = [parts[0]];
+    var i = 1;
+
+    while (i < parts.length) {
+        var size = parts[i] === "handouts" ? 1 : 2;
+        var segment = parts.slice(i, i + size).join("/");
+        keys.push(keys[keys.length - 1] + "/" + segment);
+        i += size;
+    }
+
+    return keys;
+}
+
+function renderBlade(key) {
+    var parts = key.split("/");
+    var course = TENANT.courses[parts[2]];
+    var lab = course && course.labs[parts[4]];
+    var handout = lab && lab.handouts[parts[7]];
+    var el, grid, i;
+
+    if (parts[0] === "overview") {
+        el = blade(key, "Education | Overview");
+        el.appendChild(element("div", "ext-overview", "Welcome"));
+        return el;
+    }
+
+    if (parts.length === 1) {
+        el = blade(key, "Education | Courses");
+        grid = element("div", "azc-grid");
+        for (i = 0; i < TENANT.courses.length; i++) {
+            var row = gridRow(COURSE_ROW, [
+                TENANT.courses[i].name,
+                TENANT.courses[i].budget,
+                "--",
+                String(TENANT.courses[i].students),
+                String(TENANT.courses[i].groups),
+            ]);
+            row.firstChild.onclick = (function (index) {
+                return function () {
+                    go(key + "/course/" + index);
+                };
+            })(i);
+            grid.appendChild(row);
+        }
+        el.appendChild(grid);
+        return el;
+    }
+
+    if (parts.length === 3) {
+        el = blade(key, course.name);
+        el.appendChild(
+            element("div", OVERVIEW + "class-name-title", course.name)
+        );
+        grid = element("div", OVERVIEW + "assignment-grid");
+        for (i = 0; i < course.labs.length; i++) {
+            grid.appendChild(gridRow("azc-grid-row", [
+                link(LINK, course.labs[i].name, key + "/lab/" + i),
+            ]));
+        }
+        el.appendChild(grid);
+        return el;
+    }
+
+    if (parts.length === 5) {
+        el = blade(key, lab.name);
+        el.appendChild(link(
+            "ext-assignment-detail-more-handout-link", "More",
+            key + "/handouts"
+        ));
+        return el;
+    }
+
+    if (parts.length === 6) {
+        el = blade(key, "Handouts");
+        grid = element("div", "ext-classroster-grid");
+        var consumed = [];
+        for (i = 0; i < lab.handouts.length; i++) {
+            var entry = lab.handouts[i];
+            var cells = gridRow("azc-grid-row", [
+                link(LINK, entry.name, key + "/handout/" + i),
+                entry.users.join(", "),
+                entry.expiry,
+                entry.budget,
+                "--",
+                entry.status,
+            ]);
+            consumed.push(cells.childNodes[4]);
+            grid.appendChild(cells);
+        }
+        el.appendChild(grid);
+
+        // the consumption is loaded after the rest of the blade
+        setTimeout(function () {
+            for (var j = 0; j < consumed.length; j++) {
+                consumed[j].textContent = lab.handouts[j].consumed;
+            }
+        }, LATENCY.consumption);
+
+        return el;
+    }
+
+    el = blade(key, "Handout details");
+    el.appendChild(
+        element("div", EDIT + "subscription-name", handout.name)
+    );
+    el.appendChild(
+        element("div", EDIT + "subscription-id", handout.sub_id)
+    );
+    el.appendChild(
+        element("div", EDIT + "subscription-status-data", handout.sub_status)
+    );
+    el.appendChild(
+        element("div", EDIT + "subscription-status-data", handout.expiry)
+    );
+    var users = element("ul", EDIT + "users");
+    for (i = 0; i < handout.users.length; i++) {
+        users.appendChild(
+            element("li", EDIT + "user-email", handout.users[i])
+        );
+    }
+    el.appendChild(users);
+    return el;
+}
+
+function render() {
+    var container = document.getElementById("blades");
+    var keys = bladeKeys(location.hash);
+    var shown = container.children;
+    var kept = 0;
+
+    generation += 1;
+    var current = generation;
+
+    // the blades left of the first changed one stay as they are
+    while (kept < shown.length && kept < keys.length
+           && shown[kept].getAttribute("data-key") === keys[kept]) {
+        kept += 1;
+    }
+    while (shown.length > kept) {
+        container.removeChild(shown[shown.length - 1]);
+    }
+
+    function showNext(index) {
+        if (index >= keys.length) {
+            return;
+        }
+        setTimeout(function () {
+            if (current !== generation) {
+                return;
+            }
+            container.appendChild(renderBlade(keys[index]));
+            showNext(index + 1);
+        }, LATENCY.blade);
+    }
+
+    showNext(kept);
+}
+
+window.addEventListener("hashchange", render);
+render();
+</script>
+</body>
+</html>
+"""
+
+
+def make_tenant(courses, labs, handouts):
+    """
+    Creates a synthetic tenant.
+
+    Arguments:
+        courses - number of courses
+        labs - number of labs per course
+        handouts - number of handouts per lab
+
+    Returns:
+        tenant - dictionary of courses, their labs and the labs' handouts
+    """
+
+    tenant = {"courses": []}
+
+    for course_index in range(courses):
+        course = {
+            "name": "Course %03d" % (course_index),
+            "budget": "$%d,000.00" % (labs * handouts),
+            "students": labs * handouts,
+            "groups": 0,
+            "labs": [],
+        }
+
+        for lab_index in range(labs):
+            lab = {"name": "Lab %02d" % (lab_index), "handouts": []}
+
+            for handout_index in range(handouts):
+                number = (
+                    course_index * labs + lab_index
+                ) * handouts + handout_index
+
+                lab["handouts"].append(
+                    {
+                        "name": "Handout %05d" % (number),
+                        "budget": "$1,000.00",
+                        "consumed": "$%d.%02d" % (number % 900, number % 100),
+                        "status": "Done",
+                        "sub_id": "00000000-0000-0000-0000-%012d" % (number),
+                        "sub_status": "Active" if number % 7 else "Disabled",
+                        "expiry": "Sep 30, 2021",
+                        "users": ["student%05d@example.com" % (number)],
+                    }
+                )
+
+            course["labs"].append(lab)
+
+        tenant["courses"].append(course)
+
+    return tenant
+
+
+def count_handouts(tenant):
+    """
+    Counts the handouts of a tenant.
+
+    """
+
+    return sum(
+        len(lab["handouts"])
+        for course in tenant["courses"]
+        for lab in course["labs"]
+    )
+
+
+class PortalFixture(ThreadingMixIn, HTTPServer):
+    """
+    HTTP server of the portal fixture. The tenant and the latencies can be
+        changed while it runs, they are picked up by the next page load.
+
+    """
+
+    daemon_threads = True
+
+    def __init__(self, tenant, blade_latency=100, consumption_latency=500):
+        """
+        Arguments:
+            tenant - synthetic tenant (see make_tenant)
+            blade_latency - milliseconds before a blade is shown
+            consumption_latency - milliseconds before the consumption of the
+                handouts replaces the "--" placeholder
+        """
+
+        HTTPServer.__init__(self, ("127.0.0.1", 0), _PageHandler)
+
+        self.tenant = tenant
+        self.blade_latency = blade_latency
+        self.consumption_latency = consumption_latency
+
+    @property
+    def address(self):
+        """
+        Address of the fixture, to be used as EC_PORTAL_ADDRESS.
+
+        """
+
+        return "http://127.0.0.1:%d/" % (self.server_port)
+
+    def start(self):
+        """
+        Starts serving in a background thread.
+
+        """
+
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def page(self):
+        """
+        Renders the page of the current tenant.
+
+        """
+
+        return _PAGE % {
+            "tenant": json.dumps(self.tenant),
+            "latency": json.dumps(
+                {
+                    "blade": self.blade_latency,
+                    "consumption": self.consumption_latency,
+                }
+            ),
+        }
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    """
+    Serves the fixture page on every path.
+
+    """
+
+    def do_GET(self):
+        """
+        Sends the page.
+
+        """
+
+        if self.path == "/favicon.ico":
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        body = self.server.page().encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", "%d" % (len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """
+        Keeps the benchmark output clean.
+
+        """
+
+
+def main():
+    """
+    Serves the fixture until interrupted.
+
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Offline fixture of the portal's Education blades."
+    )
+    parser.add_argument(
+        "--handouts",
+        type=int,
+        default=10,
+        choices=sorted(TENANT_SIZES),
+        help="Number of handouts of the synthetic tenant (default: 10).",
+    )
+    parser.add_argument(
+        "--latency",
+        type=int,
+        default=100,
+        help="Milliseconds before a blade is shown (default: 100).",
+    )
+    parser.add_argument(
+        "--consumption-latency",
+        type=int,
+        default=500,
+        help="Milliseconds before the handouts' consumption is shown "
+        + "(default: 500).",
+    )
+    args = parser.parse_args()
+
+    fixture = PortalFixture(
+        make_tenant(*TENANT_SIZES[args.handouts]),
+        blade_latency=args.latency,
+        consumption_latency=args.consumption_latency,
+    )
+
+    print("Serving the portal fixture on %s" % (fixture.address))
+    print("export EC_PORTAL_ADDRESS=%s" % (fixture.address))
+
+    try:
+        fixture.serve_forever()
+    except KeyboardInterrupt:
+        fixture.server_close()
+
+
+if __name__ == "__main__":
+
+    main()
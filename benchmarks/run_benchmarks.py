@@ -0,0 +1,254 @@
+"""
+End-to-end crawl benchmarks against the offline portal fixture.
+
+Crawls synthetic tenants of 10, 100 and 1000 handouts with a real (headless)
+    browser and reports the wall time, the number of WebDriver commands, the
+    browser's requests and the time per handout of get_courses_df,
+    get_course_details_df (of the first course) and get_eduhub_details.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--sizes 10 100] [--latency 100]
+        [--consumption-latency 500] [--lean] [--deep-links]
+        [--output results.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+from tabulate import tabulate
+
+from portal_fixture import TENANT_SIZES, PortalFixture, make_tenant
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_benchmark(name, crawl, crawler, handouts):
+    """
+    Runs one benchmark.
+
+    Arguments:
+        name - benchmark name
+        crawl - function taking the measured crawl, returning
+            (success, error, dataframe)
+        crawler - the crawler, created with the webdriver profiler and the
+            network stats
+        handouts - expected number of records
+
+    Returns:
+        result - dictionary of the measurements
+    """
+
+    profiler = crawler.profiler
+    profiler.reset()
+
+    crawler.network_stats.collect(crawler.client)
+    network_start = crawler.network_stats.totals()
+
+    start = time.perf_counter()
+    success, error, result_df = crawl()
+    wall_time = time.perf_counter() - start
+
+    crawler.network_stats.collect(crawler.client)
+    network = {
+        key: total - network_start[key]
+        for key, total in crawler.network_stats.totals().items()
+    }
+
+    records = 0 if result_df is None else len(result_df)
+
+    if not success:
+        print("%s failed: %s" % (name, error))
+    elif records != handouts:
+        print("%s: expected %d records, got %d" % (name, handouts, records))
+
+    return {
+        "benchmark": name,
+        "success": success and records == handouts,
+        "wall_time": wall_time,
+        "commands": profiler.total(),
+        "command_counts": {
+            command: count
+            for command, (count, _) in profiler.commands.items()
+        },
+        "caller_counts": {
+            "%s: %s" % caller_command: count
+            for caller_command, (count, _) in profiler.callers.items()
+        },
+        "requests_loaded": network["requests_loaded"],
+        "bytes_loaded": network["bytes_loaded"],
+        "requests_blocked": network["requests_blocked"],
+        "records": records,
+        "time_per_record": wall_time / records if records else None,
+    }
+
+
+def main():
+    """
+    Runs the benchmarks.
+
+    """
+
+    parser = argparse.ArgumentParser(
+        description="End-to-end crawl benchmarks against the portal fixture."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=sorted(TENANT_SIZES),
+        choices=sorted(TENANT_SIZES),
+        help="Numbers of handouts of the tenants to crawl.",
+    )
+    parser.add_argument(
+        "--latency",
+        type=int,
+        default=100,
+        help="Milliseconds before a blade is shown (default: 100).",
+    )
+    parser.add_argument(
+        "--consumption-latency",
+        type=int,
+        default=500,
+        help="Milliseconds before the handouts' consumption is shown "
+        + "(default: 500).",
+    )
+    parser.add_argument(
+        "--headed",
+        action="store_true",
+        help="Show the browser.",
+    )
+    parser.add_argument(
+        "--lean",
+        action="store_true",
+        help="Crawl in the lean browser mode (see EC_LEAN).",
+    )
+    parser.add_argument(
+        "--deep-links",
+        action="store_true",
+        help="Open the course and lab blades from the links learned by the "
+        + "earlier benchmarks (see EC_DEEP_LINKS).",
+    )
+    parser.add_argument(
+        "--output",
+        help="Write the results to a JSON file.",
+    )
+    args = parser.parse_args()
+
+    fixture = PortalFixture(
+        make_tenant(*TENANT_SIZES[args.sizes[0]]),
+        blade_latency=args.latency,
+        consumption_latency=args.consumption_latency,
+    )
+    fixture.start()
+
+    # the portal address is read when the crawler is imported
+    os.environ["EC_PORTAL_ADDRESS"] = fixture.address
+    os.environ.setdefault("EC_VERBOSE_LEVEL", "0")
+    sys.path.insert(0, os.path.join(_HERE, os.pardir, "src"))
+
+    from educrawler.crawler import Crawler
+    from educrawler.links import BladeLinks
+
+    links = None
+
+    if args.deep_links:
+        links = BladeLinks(
+            os.path.join(tempfile.mkdtemp(prefix="ec_links_"), "links.json")
+        )
+
+    results = []
+
+    for size in args.sizes:
+        courses, labs, handouts = TENANT_SIZES[size]
+        fixture.tenant = make_tenant(courses, labs, handouts)
+
+        crawler = Crawler(
+            "",
+            "",
+            hide=not args.headed,
+            mfa=False,
+            profile_webdriver=True,
+            links=links,
+            lean_mode=args.lean,
+            network_stats=True,
+        )
+
+        benchmarks = [
+            ("get_courses_df", crawler.get_courses_df, courses),
+            (
+                "get_course_details_df",
+                lambda: crawler.get_course_details_df(
+                    fixture.tenant["courses"][0]["name"]
+                ),
+                labs * handouts,
+            ),
+            ("get_eduhub_details", crawler.get_eduhub_details, size),
+        ]
+
+        for name, crawl, records in benchmarks:
+            result = run_benchmark(name, crawl, crawler, records)
+            result["handouts"] = size
+
+            results.append(result)
+
+        crawler.quit()
+
+    fixture.shutdown()
+
+    print(
+        tabulate(
+            [
+                [
+                    result["handouts"],
+                    result["benchmark"],
+                    "ok" if result["success"] else "FAILED",
+                    "%.2f" % (result["wall_time"]),
+                    result["commands"],
+                    result["requests_loaded"],
+                    "%.1f" % (result["bytes_loaded"] / 1000000),
+                    result["requests_blocked"],
+                    result["records"],
+                    "%.1f" % (result["time_per_record"] * 1000)
+                    if result["time_per_record"]
+                    else "--",
+                ]
+                for result in results
+            ],
+            headers=[
+                "Handouts",
+                "Benchmark",
+                "Result",
+                "Wall time (s)",
+                "Commands",
+                "Requests",
+                "MB",
+                "Blocked",
+                "Records",
+                "ms/record",
+            ],
+            tablefmt="psql",
+        )
+    )
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(
+                {
+                    "lean": args.lean,
+                    "deep_links": args.deep_links,
+                    "latency": args.latency,
+                    "consumption_latency": args.consumption_latency,
+                    "results": results,
+                },
+                output_file,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+
+    main()
@@ -138,6 +138,7 @@ setup(
         "pandas==1.3.0",
         "tabulate==0.8.9",
         "pyyaml==5.4.1",
+        "urllib3==1.26.6",
     ],  # Optional
     # List additional groups of dependencies here (e.g. development
     # dependencies). Users will be able to install these using the "extras"
@@ -147,10 +148,10 @@ setup(
     #
     # Similar to `install_requires` above, these must be valid existing
     # projects.
-    # extras_require={  # Optional
-    #     'dev': ['check-manifest'],
-    #     'test': ['coverage'],
-    # },
+    extras_require={  # Optional
+        # the parquet and arrow outputs
+        "arrow": ["pyarrow"],
+    },
     # If there are data files included in your packages that need to be
     # installed, specify them here.
     # package_data={  # Optional
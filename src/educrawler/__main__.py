@@ -7,17 +7,77 @@ Tomas Lazauskas
 
 import os
 import argparse
-
-from educrawler.crawler import crawl
+from datetime import datetime, timedelta
 
 from educrawler.constants import (
     CONST_OUTPUT_LIST,
     CONST_ACTION_LIST,
     CONST_USAGE_ACTION,
+    CONST_USAGE_DOWNLOAD,
+    CONST_USAGE_LIST,
+    CONST_USAGE_WINDOW_DAYS,
+    CONST_SERVE_ACTION,
+    CONST_HISTORY_ACTION,
+    CONST_HISTORY_LIST,
+    CONST_HISTORY_TOP,
+    CONST_HISTORY_SINCE,
+    CONST_HISTORY_TOP_LIMIT,
+    CONST_FORECAST_ACTION,
     CONST_OUTPUT_TABLE,
+    CONST_DEFAULT_OUTPUT_FILE_NAME,
+    CONST_BACKEND_LIST,
+    CONST_BACKEND_BROWSER,
 )
 
 
+def date_argument(value):
+    """
+    Parses a date (YYYY-MM-DD) command line argument.
+
+    Arguments:
+        value: argument value
+
+    Returns:
+        date
+    """
+
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "invalid date: '%s' (expected YYYY-MM-DD)" % (value)
+        )
+
+
+def since_argument(value):
+    """
+    Parses a start of period command line argument: a number of days,
+        hours or weeks before now (e.g. 30d, 12h, 2w) or a date
+        (YYYY-MM-DD).
+
+    Arguments:
+        value: argument value
+
+    Returns:
+        start of the period (datetime, UTC)
+    """
+
+    units = {"h": 1 / 24, "d": 1, "w": 7}
+
+    try:
+        if value[-1:] in units:
+            return datetime.utcnow() - timedelta(
+                days=float(value[:-1]) * units[value[-1]]
+            )
+
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "invalid period: '%s' (expected e.g. 30d, 12h, 2w or YYYY-MM-DD)"
+            % (value)
+        )
+
+
 def set_command_line_args(default_output):
     """
     Sets up command line arguments.
@@ -42,6 +102,53 @@ def set_command_line_args(default_output):
         choices=CONST_OUTPUT_LIST,
     )
 
+    parser.add_argument(
+        "--output-path",
+        metavar="PATH",
+        help="Path to the output file (default: %s.<output type>)."
+        % (CONST_DEFAULT_OUTPUT_FILE_NAME),
+    )
+
+    parser.add_argument(
+        "--append",
+        action="store_true",
+        help="Add the records to the existing output file instead of "
+        + "overwriting it (csv, jsonl, parquet, arrow, sqlite). The records "
+        + "with the subscription id and crawl time of existing ones replace "
+        + "them (parquet, arrow, sqlite).",
+    )
+
+    parser.add_argument(
+        "--backend",
+        default=CONST_BACKEND_BROWSER,
+        help="Where the data is read from: the portal blades (browser) "
+        + "or the portal's REST API (api) (default: %s)."
+        % (CONST_BACKEND_BROWSER),
+        choices=CONST_BACKEND_LIST,
+    )
+
+    parser.add_argument(
+        "--typed",
+        action="store_true",
+        help="Output the courses and handouts with typed values: the "
+        + "amounts in integer cents, the counts as integers and the dates "
+        + "as dates.",
+    )
+
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="Time the crawling stages and write the timings to a Chrome "
+        + "trace file (chrome://tracing, ui.perfetto.dev).",
+    )
+
+    parser.add_argument(
+        "--profile-webdriver",
+        action="store_true",
+        help="Count and time the webdriver commands by type and by the "
+        + "crawler method sending them.",
+    )
+
     subparser = parser.add_subparsers()
 
     # courses
@@ -79,14 +186,167 @@ def set_command_line_args(default_output):
         help="Name of handout.",
     )
 
+    parser_h.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Reuse the previous results of the unchanged courses and "
+        + "handouts instead of opening their blades again.",
+    )
+
+    parser_h.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the last failed crawl, skipping the courses, labs "
+        + "and handouts it has completed.",
+    )
+
+    parser_h.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of browsers to crawl all the courses with "
+        + "in parallel (default: 1).",
+    )
+
     # usage
     parser_u = subparser.add_parser("usage")
     parser_u.add_argument(
         CONST_USAGE_ACTION,
-        default=CONST_USAGE_ACTION,
-        const=CONST_USAGE_ACTION,
+        default=CONST_USAGE_DOWNLOAD,
+        const=CONST_USAGE_DOWNLOAD,
+        nargs="?",
+        choices=CONST_USAGE_LIST,
+        help="Download the usage data (download, default), add a "
+        + "downloaded usage file to the usage store (ingest) or download "
+        + "the usage data since the last sync into the usage store (sync).",
+    )
+
+    parser_u.add_argument(
+        "--file",
+        help="Usage file to ingest.",
+    )
+
+    parser_u.add_argument(
+        "--from",
+        dest="date_from",
+        metavar="DATE",
+        type=date_argument,
+        help="First day (YYYY-MM-DD) of the usage data to download "
+        + "(default: 10 days before --to, the last synced day for sync).",
+    )
+
+    parser_u.add_argument(
+        "--to",
+        dest="date_to",
+        metavar="DATE",
+        type=date_argument,
+        help="Last day (YYYY-MM-DD) of the usage data to download "
+        + "(default: today).",
+    )
+
+    parser_u.add_argument(
+        "--window-days",
+        type=int,
+        default=CONST_USAGE_WINDOW_DAYS,
+        help="Days of usage data per download of a --from/--to range "
+        + "(default: %d)." % (CONST_USAGE_WINDOW_DAYS),
+    )
+
+    parser_u.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of browsers to download the windows of a --from/--to "
+        + "range with in parallel (default: 1).",
+    )
+
+    # history
+    parser_y = subparser.add_parser("history")
+    parser_y.add_argument(
+        CONST_HISTORY_ACTION,
+        default=CONST_HISTORY_LIST,
+        const=CONST_HISTORY_LIST,
         nargs="?",
-        choices=[CONST_USAGE_ACTION],
+        choices=[CONST_HISTORY_LIST, CONST_HISTORY_TOP],
+        help="List the handout snapshots of the past handout list runs "
+        + "(list, default) or the subscriptions which consumed the most "
+        + "(top).",
+    )
+
+    parser_y.add_argument(
+        "--subscription-id",
+        help="Id of subscription (list).",
+    )
+
+    parser_y.add_argument(
+        "--course-name",
+        help="Name of course (list).",
+    )
+
+    parser_y.add_argument(
+        "--since",
+        type=since_argument,
+        default=CONST_HISTORY_SINCE,
+        metavar="PERIOD",
+        help="Start of the period: days, hours or weeks before now (e.g. "
+        + "30d, 12h, 2w) or a date (YYYY-MM-DD) (default: %s)."
+        % (CONST_HISTORY_SINCE),
+    )
+
+    parser_y.add_argument(
+        "--limit",
+        type=int,
+        default=CONST_HISTORY_TOP_LIMIT,
+        help="Number of subscriptions (top, default: %d)."
+        % (CONST_HISTORY_TOP_LIMIT),
+    )
+
+    # forecast
+    parser_f = subparser.add_parser("forecast")
+    parser_f.add_argument(
+        CONST_FORECAST_ACTION,
+        default=CONST_FORECAST_ACTION,
+        const=CONST_FORECAST_ACTION,
+        nargs="?",
+        choices=[CONST_FORECAST_ACTION],
+    )
+
+    parser_f.add_argument(
+        "--course-name",
+        help="Name of course.",
+    )
+
+    parser_f.add_argument(
+        "--since",
+        type=since_argument,
+        default=CONST_HISTORY_SINCE,
+        metavar="PERIOD",
+        help="Forecast from the snapshots since: days, hours or weeks "
+        + "before now (e.g. 30d, 12h, 2w) or a date (YYYY-MM-DD) "
+        + "(default: %s)." % (CONST_HISTORY_SINCE),
+    )
+
+    parser_f.add_argument(
+        "--limit",
+        type=int,
+        help="Number of subscriptions (default: all).",
+    )
+
+    # server
+    parser_s = subparser.add_parser("serve")
+    parser_s.add_argument(
+        CONST_SERVE_ACTION,
+        default=CONST_SERVE_ACTION,
+        const=CONST_SERVE_ACTION,
+        nargs="?",
+        choices=[CONST_SERVE_ACTION],
+    )
+
+    parser_s.add_argument(
+        "--browsers",
+        type=int,
+        default=1,
+        help="Number of logged in browsers to keep running (default: 1).",
     )
 
     args, _ = parser.parse_known_args()
@@ -108,6 +368,10 @@ def main():
     # set up command line arguments
     args = set_command_line_args(default_output)
 
+    # the crawling modules are only loaded once the arguments are valid,
+    #   so that --help and usage errors are instant
+    from educrawler.runner import crawl
+
     # run the crawl
     _, _, _ = crawl(args)
 
@@ -0,0 +1,426 @@
+"""
+Education REST API backend module.
+
+Reads the same data as the portal blades show, straight from the JSON
+    endpoints the blades are filled from.
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import urllib3
+
+from educrawler.utilities import log
+from educrawler.pipeline import collect_df
+
+from educrawler.constants import (
+    CONST_API_ADDRESS,
+    CONST_API_VERSION,
+    CONST_API_WORKERS,
+    CONST_TIMEOUT,
+    CONST_COURSE_COLUMNS,
+    CONST_HANDOUT_COLUMNS,
+)
+
+_CURRENCY_SYMBOLS = {"USD": "$", "GBP": "£", "EUR": "€"}
+
+
+class ApiCrawler:
+    """
+    Class responsible for reading the EduHub data from the REST API.
+        Provides the same listing methods as the browser Crawler.
+
+    """
+
+    # the API is read with its own thread pool, not a pool of browsers
+    is_api = True
+
+    def __init__(self, token, api_address=CONST_API_ADDRESS):
+        """
+        Creates a pooled http client for the API.
+
+        Arguments:
+            token - bearer token of a logged in portal session
+            api_address - base address of the API
+        """
+
+        self.api_address = api_address.rstrip("/")
+
+        self.http = urllib3.PoolManager(
+            maxsize=CONST_API_WORKERS,
+            timeout=CONST_TIMEOUT,
+            headers={
+                "Authorization": "Bearer %s" % (token),
+                "Accept": "application/json",
+            },
+        )
+
+    def _get(self, path):
+        """
+        Gets a JSON resource, following the next page links of lists.
+
+        Arguments:
+            path - resource path (or an absolute next page address)
+
+        Returns:
+            success - flag if the request was succesful
+            error - error message
+            result - the resource, or the list of items for lists
+        """
+
+        if path.startswith("http"):
+            url = path
+        else:
+            url = "%s%s%sapi-version=%s" % (
+                self.api_address,
+                path,
+                "&" if "?" in path else "?",
+                CONST_API_VERSION,
+            )
+
+        log("GET %s" % (url), level=3, indent=4)
+
+        try:
+            response = self.http.request("GET", url)
+        except urllib3.exceptions.HTTPError as exception:
+            return False, "Request to %s failed: %s" % (url, exception), None
+
+        if response.status != 200:
+            return (
+                False,
+                "Request to %s failed with status %d" % (url, response.status),
+                None,
+            )
+
+        result = json.loads(response.data.decode("utf-8"))
+
+        if "value" not in result:
+            return True, None, result
+
+        items = result["value"]
+
+        if result.get("nextLink"):
+            success, error, next_items = self._get(result["nextLink"])
+
+            if not success:
+                return success, error, None
+
+            items = items + next_items
+
+        return True, None, items
+
+    def _get_courses(self):
+        """
+        Gets the courses.
+
+        Returns:
+            success - flag if the action was succesful
+            error - error message
+            courses - a list of course resources
+        """
+
+        return self._get("/providers/Microsoft.Education/classrooms")
+
+    def get_courses_df(self):
+        """
+        Gets the list of courses as pandas dataframe.
+
+        Returns:
+            success - flag if the action was succesful
+            error - error message
+            courses_df - courses dataframe
+        """
+
+        import pandas as pd
+
+        log("Getting the list of courses", level=1)
+
+        success, error, courses = self._get_courses()
+
+        if not success:
+            log(error, level=0)
+            return success, error, None
+
+        data = []
+
+        for course in courses:
+            properties = course.get("properties", {})
+
+            data.append(
+                [
+                    properties.get("displayName"),
+                    _format_money(properties.get("budget")),
+                    _format_money(properties.get("consumed")),
+                    _format_count(properties.get("studentCount")),
+                    _format_count(properties.get("projectGroupCount")),
+                ]
+            )
+
+        log("Found %d courses." % (len(data)), level=1, indent=2)
+
+        return success, error, pd.DataFrame(data, columns=CONST_COURSE_COLUMNS)
+
+    def get_course_details_df(
+        self, course_name, lab_name=None, handout_name=None
+    ):
+        """
+        Gets the list of handouts in a course and their details.
+
+        Arguments:
+            course_name: name of a course
+            lab_name: name of a lab (optional)
+            handout_name: name of a handout (optional)
+        Returns:
+            success - flag if the action was succesful
+            error - error message
+            details_df: pandas dataframe containing all the course's
+                handouts and their details
+        """
+
+        return collect_df(
+            self.iter_course_details(course_name, lab_name, handout_name),
+            CONST_HANDOUT_COLUMNS,
+        )
+
+    def iter_course_details(
+        self, course_name, lab_name=None, handout_name=None
+    ):
+        """
+        Yields the handouts in a course and their details.
+
+        Arguments:
+            course_name: name of a course
+            lab_name: name of a lab (optional)
+            handout_name: name of a handout (optional)
+        Yields:
+            handout records (see CONST_HANDOUT_COLUMNS)
+        Returns:
+            success - flag if the action was succesful
+            error - error message
+        """
+
+        log("Looking for %s course details" % (course_name), level=1)
+
+        success, error, courses = self._get_courses()
+
+        if not success:
+            log(error, level=0)
+            return success, error
+
+        courses = [
+            course
+            for course in courses
+            if course.get("properties", {}).get("displayName") == course_name
+        ]
+
+        if len(courses) == 0:
+            error = "Could not find (%s) course. Returning." % (course_name)
+            log(error, level=0)
+            return False, error
+
+        success, error = yield from self._iter_courses_details(
+            courses, lab_name, handout_name
+        )
+
+        return success, error
+
+    def get_eduhub_details(self, course_name=None):
+        """
+        Aggregates details of handouts (subscriptions) from courses/labs
+            into a pandas dataframe.
+
+        Arguments:
+            course_name - name of a course
+
+        Returns:
+            success - flag if the action was succesful
+            error - error message
+            eduhub_df - aggregated details
+        """
+
+        return collect_df(
+            self.iter_eduhub_details(course_name), CONST_HANDOUT_COLUMNS
+        )
+
+    def iter_eduhub_details(self, course_name=None):
+        """
+        Yields details of handouts (subscriptions) from courses/labs.
+
+        Arguments:
+            course_name - name of a course
+
+        Yields:
+            handout records (see CONST_HANDOUT_COLUMNS)
+        Returns:
+            success - flag if the action was succesful
+            error - error message
+        """
+
+        if course_name is not None:
+            success, error = yield from self.iter_course_details(course_name)
+            return success, error
+
+        success, error, courses = self._get_courses()
+
+        if not success:
+            log(error, level=0)
+            return success, error
+
+        success, error = yield from self._iter_courses_details(courses)
+
+        return success, error
+
+    def _iter_courses_details(self, courses, lab_name=None, handout_name=None):
+        """
+        Yields the handouts of the given courses and their subscription
+            details. The subscription details are requested in parallel,
+            the records are yielded in the order of the handouts.
+
+        Arguments:
+            courses - a list of course resources
+            lab_name: name of a lab (optional)
+            handout_name: name of a handout (optional)
+        Yields:
+            handout records (see CONST_HANDOUT_COLUMNS)
+        Returns:
+            success - flag if the action was succesful
+            error - error message
+        """
+
+        handouts = []
+
+        for course in courses:
+            course_name = course["properties"]["displayName"]
+
+            success, error, labs = self._get("%s/assignments" % (course["id"]))
+
+            if not success:
+                log(error, level=0)
+                return success, error
+
+            for lab in labs:
+                el_lab_name = lab["properties"]["displayName"].lower()
+
+                # are we are looking for a particular lab?
+                if lab_name is not None and lab_name != el_lab_name:
+                    continue
+
+                success, error, lab_handouts = self._get(
+                    "%s/handouts" % (lab["id"])
+                )
+
+                if not success:
+                    log(error, level=0)
+                    return success, error
+
+                for handout in lab_handouts:
+                    name = handout["properties"]["displayName"]
+
+                    # are we are looking for a particular handout?
+                    if handout_name is not None and handout_name != name:
+                        continue
+
+                    handouts.append((course_name, el_lab_name, handout))
+
+        log("Getting %d handouts' details." % (len(handouts)), level=1)
+
+        with ThreadPoolExecutor(max_workers=CONST_API_WORKERS) as executor:
+            for success, error, record in executor.map(
+                self._get_handout_record, handouts
+            ):
+                if not success:
+                    log(error, level=0)
+                    return success, error
+
+                yield record
+
+        return True, None
+
+    def _get_handout_record(self, handout_entry):
+        """
+        Gets the subscription details of a handout.
+
+        Arguments:
+            handout_entry - (course name, lab name, handout resource)
+
+        Returns:
+            success - flag if the action was succesful
+            error - error message
+            record - handout record (a list of CONST_HANDOUT_COLUMNS values)
+        """
+
+        course_name, lab_name, handout = handout_entry
+        properties = handout["properties"]
+
+        success, error, details = self._get(
+            "%s?$expand=subscription,users" % (handout["id"])
+        )
+
+        if not success:
+            return success, error, None
+
+        crawl_time_utc_dt = datetime.utcnow()
+
+        subscription = details["properties"].get("subscription", {})
+        users = details["properties"].get("users", [])
+
+        sub_expiry_date = subscription.get("expirationDate")
+        if sub_expiry_date:
+            sub_expiry_date = sub_expiry_date[:10]
+
+        record = [
+            course_name,
+            lab_name,
+            properties["displayName"],
+            _format_money(properties.get("budget")).lower(),
+            _format_money(properties.get("consumed")).lower(),
+            str(properties.get("status", "")).lower(),
+            subscription.get("displayName"),
+            subscription.get("subscriptionId"),
+            subscription.get("state"),
+            sub_expiry_date,
+            [user["email"] for user in users if user.get("email")],
+            crawl_time_utc_dt,
+        ]
+
+        return True, None, record
+
+
+def _format_money(money):
+    """
+    Formats an API amount the way the portal shows it, e.g. "$1,300.00".
+
+    Arguments:
+        money - {"currency": .., "value": ..} or None
+
+    Returns:
+        formatted amount, "--" if it is missing
+    """
+
+    if money is None or money.get("value") is None:
+        return "--"
+
+    currency = money.get("currency", "USD")
+
+    return "%s%s" % (
+        _CURRENCY_SYMBOLS.get(currency, currency + " "),
+        format(float(money["value"]), ",.2f"),
+    )
+
+
+def _format_count(count):
+    """
+    Formats a count the way the portal grid shows it.
+
+    Arguments:
+        count - a number or None
+
+    Returns:
+        count as a string, "--" if it is missing
+    """
+
+    if count is None:
+        return "--"
+
+    return "%d" % (count)
@@ -0,0 +1,193 @@
+"""
+Incremental crawl cache module.
+"""
+
+import os
+import json
+import threading
+from datetime import datetime
+
+from educrawler.utilities import log
+
+
+class CrawlCache:
+    """
+    On-disk cache of the previous crawl results, used to skip the courses
+        and handouts that have not changed since.
+
+    A course is reused as a whole if its row in the course list (including
+        the consumed credit) is unchanged. A handout's subscription details
+        are reused if its budget and status are unchanged.
+    """
+
+    def __init__(self, file_path):
+        """
+        Loads the cache from a file (if it exists).
+
+        Arguments:
+            file_path - path to the cache file
+        """
+
+        self.file_path = file_path
+        self.lock = threading.Lock()
+
+        self.courses = {}
+        self.handouts = {}
+
+        if os.path.isfile(file_path):
+            with open(file_path, "r") as cache_file:
+                content = json.load(cache_file)
+
+            self.courses = content.get("courses", {})
+            self.handouts = content.get("handouts", {})
+
+            log(
+                "Loaded the crawl cache (%d courses, %d handouts)."
+                % (len(self.courses), len(self.handouts)),
+                level=2,
+            )
+
+    def save(self):
+        """
+        Writes the cache to its file.
+
+        """
+
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+
+        with self.lock:
+            content = {"courses": self.courses, "handouts": self.handouts}
+
+        with open(self.file_path, "w") as cache_file:
+            json.dump(content, cache_file)
+
+    def get_course_records(self, course):
+        """
+        Gets the cached handouts of a course if the course is unchanged.
+
+        Arguments:
+            course - course row of the courses dataframe
+
+        Returns:
+            course_records - handout records with the crawl time set to now,
+                None if the course has changed or is not cached
+        """
+
+        # without the consumed credit, changes can not be told apart
+        if course["Consumed"] in [None, "--"]:
+            return None
+
+        with self.lock:
+            cached = self.courses.get(course["Name"])
+
+        if cached is None or cached["row"] != _course_row(course):
+            return None
+
+        log(
+            "(%s) course is unchanged, reusing it." % (course["Name"]),
+            level=1,
+        )
+
+        crawl_time_utc_dt = datetime.utcnow()
+
+        return [
+            handout + [crawl_time_utc_dt] for handout in cached["handouts"]
+        ]
+
+    def set_course(self, course, course_records):
+        """
+        Stores the handouts of a course.
+
+        Arguments:
+            course - course row of the courses dataframe
+            course_records - handout records of the course
+        """
+
+        # the crawl time is not cached, reused handouts get the current time
+        handouts = [list(record[:-1]) for record in course_records]
+
+        with self.lock:
+            self.courses[course["Name"]] = {
+                "row": _course_row(course),
+                "handouts": handouts,
+            }
+
+    def get_handout_details(
+        self, course_name, lab_name, handout_name, state
+    ):
+        """
+        Gets the cached subscription details of a handout if it is unchanged.
+
+        Arguments:
+            course_name - name of the course
+            lab_name - name of the lab
+            handout_name - name of the handout
+            state - [handout budget, handout status] as shown in the lab
+
+        Returns:
+            details - [sub_name, sub_id, sub_status, sub_expiry_date,
+                sub_user_email_list], None if the handout has changed or is
+                not cached
+        """
+
+        with self.lock:
+            cached = self.handouts.get(
+                _handout_key(course_name, lab_name, handout_name)
+            )
+
+        if cached is None or cached["state"] != list(state):
+            return None
+
+        return cached["details"]
+
+    def set_handout_details(
+        self, course_name, lab_name, handout_name, state, details
+    ):
+        """
+        Stores the subscription details of a handout.
+
+        Arguments:
+            course_name - name of the course
+            lab_name - name of the lab
+            handout_name - name of the handout
+            state - [handout budget, handout status] as shown in the lab
+            details - [sub_name, sub_id, sub_status, sub_expiry_date,
+                sub_user_email_list]
+        """
+
+        key = _handout_key(course_name, lab_name, handout_name)
+
+        with self.lock:
+            self.handouts[key] = {
+                "state": list(state),
+                "details": list(details),
+            }
+
+
+def _course_row(course):
+    """
+    Course row values compared to tell if a course has changed.
+
+    Arguments:
+        course - course row of the courses dataframe
+
+    Returns:
+        a list of the row's values
+    """
+
+    return [
+        course["Assigned credit"],
+        course["Consumed"],
+        course["Students"],
+        course["Project groups"],
+    ]
+
+
+def _handout_key(course_name, lab_name, handout_name):
+    """
+    Cache key of a handout: the JSON list of the names, as the names
+        themselves may contain any separator.
+
+    """
+
+    return json.dumps([course_name, lab_name, handout_name])
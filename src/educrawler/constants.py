@@ -4,40 +4,335 @@ Constants module.
 
 import os
 
-CONST_PORTAL_ADDRESS = "https://portal.azure.com/"
+try:
+    CONST_PORTAL_ADDRESS = os.environ["EC_PORTAL_ADDRESS"]
+except KeyError:
+    CONST_PORTAL_ADDRESS = "https://portal.azure.com/"
+
 CONST_PORTAL_OVERVIEW_ADDRESS = (
-    "https://portal.azure.com"
+    CONST_PORTAL_ADDRESS.rstrip("/")
     + "/#blade/Microsoft_Azure_Education/EducationMenuBlade/overview"
 )
 CONST_PORTAL_COURSES_ADDRESS = (
-    "https://portal.azure.com"
+    CONST_PORTAL_ADDRESS.rstrip("/")
     + "/#blade/Microsoft_Azure_Education/EducationMenuBlade/classrooms"
 )
 
 CONST_WEBDRIVER_HEADLESS = True
 
+try:
+    CONST_STATE_DIR = os.environ["EC_STATE_DIR"]
+except KeyError:
+    CONST_STATE_DIR = os.path.join(os.path.expanduser("~"), ".educrawler")
+
+CONST_SESSION_DIR = os.path.join(CONST_STATE_DIR, "session")
+CONST_CACHE_FILE = os.path.join(CONST_STATE_DIR, "cache.json")
+CONST_JOURNAL_FILE = os.path.join(CONST_STATE_DIR, "journal.jsonl")
+CONST_DRIVER_INDEX_FILE = os.path.join(CONST_STATE_DIR, "drivers.json")
+CONST_LINKS_FILE = os.path.join(CONST_STATE_DIR, "links.json")
+
+try:
+    CONST_USAGE_STORE = os.environ["EC_USAGE_STORE"]
+except KeyError:
+    CONST_USAGE_STORE = os.path.join(CONST_STATE_DIR, "usage.sqlite3")
+
+try:
+    CONST_HISTORY_STORE = os.environ["EC_HISTORY_STORE"]
+except KeyError:
+    CONST_HISTORY_STORE = os.path.join(CONST_STATE_DIR, "history.sqlite3")
+
+# chromedriver to use as it is, without looking for a matching one
+try:
+    CONST_CHROMEDRIVER = os.environ["EC_CHROMEDRIVER"]
+except KeyError:
+    CONST_CHROMEDRIVER = None
+
 try:
     CONST_VERBOSE_LEVEL = int(os.environ["EC_VERBOSE_LEVEL"])
 except KeyError:
     CONST_VERBOSE_LEVEL = 2
 
 CONST_REFRESH_SLEEP_TIME = 0.05
-CONST_MAX_REFRESH_COUNT = 200
-CONST_COURSE_SLEEP_TIME = 5.0
 CONST_SLEEP_TIME = 1.5
 CONST_TIMEOUT = 30
+CONST_MFA_TIMEOUT = 60
 
 CONST_USAGE_ACTION = "usage_action"
+CONST_USAGE_DOWNLOAD = "download"
+CONST_USAGE_INGEST = "ingest"
+CONST_USAGE_SYNC = "sync"
+CONST_USAGE_LIST = [CONST_USAGE_DOWNLOAD, CONST_USAGE_INGEST, CONST_USAGE_SYNC]
+CONST_SERVE_ACTION = "serve_action"
+CONST_HISTORY_ACTION = "history_action"
+CONST_HISTORY_LIST = "list"
+CONST_HISTORY_TOP = "top"
+CONST_FORECAST_ACTION = "forecast_action"
 
 CONST_ACTION_LIST = "list"
 
 CONST_OUTPUT_TABLE = "table"
 CONST_OUTPUT_CSV = "csv"
 CONST_OUTPUT_JSON = "json"
+CONST_OUTPUT_JSONL = "jsonl"
 CONST_OUTPUT_DF = "df"
-CONST_OUTPUT_LIST = [CONST_OUTPUT_TABLE, CONST_OUTPUT_CSV, CONST_OUTPUT_JSON]
+CONST_OUTPUT_PARQUET = "parquet"
+CONST_OUTPUT_ARROW = "arrow"
+CONST_OUTPUT_SQLITE = "sqlite"
+CONST_OUTPUT_LIST = [
+    CONST_OUTPUT_TABLE,
+    CONST_OUTPUT_CSV,
+    CONST_OUTPUT_JSON,
+    CONST_OUTPUT_JSONL,
+    CONST_OUTPUT_PARQUET,
+    CONST_OUTPUT_ARROW,
+    CONST_OUTPUT_SQLITE,
+]
+
+# outputs with typed schemas, always written with the typed records
+CONST_TYPED_OUTPUTS = [
+    CONST_OUTPUT_PARQUET,
+    CONST_OUTPUT_ARROW,
+    CONST_OUTPUT_SQLITE,
+]
+
+# outputs collected into a dataframe
+CONST_DF_OUTPUTS = [CONST_OUTPUT_DF, CONST_OUTPUT_PARQUET, CONST_OUTPUT_ARROW]
 
 CONST_DEFAULT_OUTPUT_FILE_NAME = "ec_output"
 
-CONST_USAGE_PATH = "/tmp/"
-CONST_USAGE_CSV_FILE_NAME = "azure-usage.csv"
+# file extensions of the outputs written to files
+CONST_OUTPUT_EXTENSIONS = {
+    CONST_OUTPUT_CSV: "csv",
+    CONST_OUTPUT_JSON: "json",
+    CONST_OUTPUT_JSONL: "jsonl",
+    CONST_OUTPUT_PARQUET: "parquet",
+    CONST_OUTPUT_ARROW: "arrow",
+    CONST_OUTPUT_SQLITE: "sqlite3",
+}
+
+# records with the same values of these columns are replaced when appended
+CONST_OUTPUT_KEY_COLUMNS = ["Subscription id", "Crawl time utc"]
+
+# crawl times as text (the JSON, SQLite and history outputs), always with
+#   microseconds so that they sort as text and parse with one format
+CONST_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+CONST_BACKEND_BROWSER = "browser"
+CONST_BACKEND_API = "api"
+CONST_BACKEND_LIST = [CONST_BACKEND_BROWSER, CONST_BACKEND_API]
+
+try:
+    CONST_API_ADDRESS = os.environ["EC_API_ADDRESS"]
+except KeyError:
+    CONST_API_ADDRESS = "https://management.azure.com"
+
+CONST_API_VERSION = "2020-05-01-preview"
+CONST_API_WORKERS = 8
+
+# times a course that failed in a browser pool (--workers) is crawled again
+CONST_WORKER_COURSE_RETRIES = 1
+
+CONST_SERVE_HOST = "127.0.0.1"
+
+try:
+    CONST_SERVE_PORT = int(os.environ["EC_SERVE_PORT"])
+except KeyError:
+    CONST_SERVE_PORT = 8478
+
+# token the requests to `ec serve` are authorized with, readable only by
+#   the user running it
+CONST_SERVE_TOKEN_FILE = os.path.join(CONST_STATE_DIR, "serve_token")
+
+CONST_COURSE_COLUMNS = [
+    "Name",
+    "Assigned credit",
+    "Consumed",
+    "Students",
+    "Project groups",
+]
+
+CONST_HANDOUT_COLUMNS = [
+    "Course name",
+    "Lab name",
+    "Handout name",
+    "Handout budget",
+    "Handout consumed",
+    "Handout status",
+    "Subscription name",
+    "Subscription id",
+    "Subscription status",
+    "Subscription expiry date",
+    "Subscription users",
+    "Crawl time utc",
+]
+
+# the columns of the typed records (--typed), the amounts are in cents
+CONST_COURSE_TYPED_COLUMNS = [
+    "Name",
+    "Assigned credit cents",
+    "Consumed cents",
+    "Students",
+    "Project groups",
+]
+
+CONST_HANDOUT_TYPED_COLUMNS = [
+    "Course name",
+    "Lab name",
+    "Handout name",
+    "Handout budget cents",
+    "Handout consumed cents",
+    "Handout status",
+    "Subscription name",
+    "Subscription id",
+    "Subscription status",
+    "Subscription expiry date",
+    "Subscription users",
+    "Crawl time utc",
+]
+
+# lean browser mode (EC_LEAN): URL patterns of the requests blocked, the
+#   portal's blades only need its scripts, styles and API responses
+CONST_LEAN_BLOCKED_URLS = [
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.svg",
+    "*.ico",
+    "*.webp",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.eot",
+    "*.mp4",
+    "*.webm",
+    "*dc.services.visualstudio.com/*",
+    "*.applicationinsights.azure.com/*",
+    "*js.monitor.azure.com/*",
+    "*browser.events.data.microsoft.com/*",
+    "*.clarity.ms/*",
+]
+
+# comma separated URL patterns added to/removed from the blocked ones
+try:
+    CONST_LEAN_BLOCK = [
+        pattern.strip()
+        for pattern in os.environ["EC_LEAN_BLOCK"].split(",")
+        if len(pattern.strip()) != 0
+    ]
+except KeyError:
+    CONST_LEAN_BLOCK = []
+
+try:
+    CONST_LEAN_ALLOW = [
+        pattern.strip()
+        for pattern in os.environ["EC_LEAN_ALLOW"].split(",")
+        if len(pattern.strip()) != 0
+    ]
+except KeyError:
+    CONST_LEAN_ALLOW = []
+
+# browser features the crawler never uses
+CONST_LEAN_ARGUMENTS = [
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-client-side-phishing-detection",
+    "--disable-features=Translate,MediaRouter,OptimizationHints",
+    "--no-first-run",
+    "--mute-audio",
+]
+
+CONST_LEAN_PREFS = {
+    "profile.default_content_setting_values.notifications": 2,
+    "profile.default_content_setting_values.geolocation": 2,
+    "credentials_enable_service": False,
+    "profile.password_manager_enabled": False,
+}
+
+# every usage download gets a directory of its own in here
+try:
+    CONST_USAGE_PATH = os.environ["EC_USAGE_DIR"]
+except KeyError:
+    CONST_USAGE_PATH = "/tmp/"
+
+# downloaded usage windows, kept for reuse
+CONST_USAGE_WINDOWS_DIR = os.path.join(CONST_STATE_DIR, "usage_windows")
+# days of usage data per download of a date range
+CONST_USAGE_WINDOW_DAYS = 7
+# windows ending longer ago than this are not updated anymore by the portal
+#   and are reused
+CONST_USAGE_SETTLED_DAYS = 2
+
+# days of usage data the first sync downloads
+CONST_USAGE_SYNC_DAYS = 30
+# days before the last synced day that a sync downloads again, for the
+#   records the portal adds late
+try:
+    CONST_USAGE_SYNC_OVERLAP_DAYS = int(os.environ["EC_USAGE_SYNC_OVERLAP"])
+except KeyError:
+    CONST_USAGE_SYNC_OVERLAP_DAYS = 2
+
+CONST_DOWNLOAD_TIMEOUT = 600
+CONST_DOWNLOAD_POLL_TIME = 0.2
+CONST_DOWNLOAD_SETTLE_TIME = 1.0
+
+# paged reading of the virtualized handout grid: the fraction of its
+#   viewport scrolled at a time, the seconds to wait for more rows once it
+#   is scrolled to the bottom, the reads at the bottom without new rows
+#   after which all the rows are read and the most scrolls of a grid
+CONST_GRID_SCROLL_STEP = 0.8
+CONST_GRID_BOTTOM_WAIT = 1.0
+CONST_GRID_STABLE_PAGES = 2
+CONST_GRID_MAX_PAGES = 200
+
+# usage rows written to the usage store at a time
+CONST_INGEST_CHUNK_ROWS = 10000
+
+CONST_DAILY_COST_COLUMNS = ["Subscription id", "Date", "Cost", "Rows"]
+
+CONST_HISTORY_COLUMNS = [
+    "Crawl time utc",
+    "Course name",
+    "Lab name",
+    "Handout name",
+    "Subscription id",
+    "Handout budget cents",
+    "Handout consumed cents",
+    "Handout status",
+    "Subscription status",
+]
+
+CONST_BURNER_COLUMNS = [
+    "Subscription id",
+    "Course name",
+    "Lab name",
+    "Handout name",
+    "Handout budget cents",
+    "Handout consumed cents",
+    "Burn cents",
+    "Burn cents per day",
+    "First crawl time utc",
+    "Last crawl time utc",
+]
+
+CONST_FORECAST_COLUMNS = [
+    "Subscription id",
+    "Course name",
+    "Lab name",
+    "Handout name",
+    "Handout budget cents",
+    "Handout consumed cents",
+    "Remaining cents",
+    "Spend cents per day",
+    "Days left",
+    "Exhaustion date",
+    "Subscription expiry date",
+    "Exhausted before expiry",
+]
+
+# default period of the history queries
+CONST_HISTORY_SINCE = "30d"
+CONST_HISTORY_TOP_LIMIT = 10
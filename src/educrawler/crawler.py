@@ -3,39 +3,56 @@ EduHub portal crawling module.
 """
 
 import os
+import json
+import tempfile
 from datetime import datetime, timedelta
-from time import sleep, time
+from time import sleep
 import pandas as pd
-from tabulate import tabulate
 
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
 
-from webdriver_manager.chrome import ChromeDriverManager
-
+from educrawler import tracing
 from educrawler.utilities import log
+from educrawler.waiter import Waiter
+from educrawler.driver import resolve_chromedriver
+from educrawler.download import wait_for_download
+from educrawler import lean
+from educrawler.profiler import CommandProfiler
+from educrawler.pipeline import collect_df, tee
+from educrawler.grid import (
+    extract_grid,
+    extract_links,
+    find_viewport,
+    scroll_viewport,
+    viewport_state,
+    COURSE_ROW_SELECTOR,
+    HANDOUT_ROW_SELECTOR,
+)
 
 from educrawler.constants import (
     CONST_PORTAL_ADDRESS,
     CONST_REFRESH_SLEEP_TIME,
-    CONST_MAX_REFRESH_COUNT,
     CONST_SLEEP_TIME,
-    CONST_COURSE_SLEEP_TIME,
     CONST_TIMEOUT,
+    CONST_MFA_TIMEOUT,
     CONST_PORTAL_COURSES_ADDRESS,
-    CONST_VERBOSE_LEVEL,
-    CONST_ACTION_LIST,
-    CONST_USAGE_ACTION,
+    CONST_PORTAL_OVERVIEW_ADDRESS,
     CONST_USAGE_PATH,
-    CONST_USAGE_CSV_FILE_NAME,
-    CONST_OUTPUT_TABLE,
-    CONST_OUTPUT_CSV,
-    CONST_OUTPUT_JSON,
-    CONST_OUTPUT_DF,
-    CONST_DEFAULT_OUTPUT_FILE_NAME,
-    CONST_WEBDRIVER_HEADLESS,
+    CONST_COURSE_COLUMNS,
+    CONST_HANDOUT_COLUMNS,
+    CONST_API_ADDRESS,
+    CONST_GRID_SCROLL_STEP,
+    CONST_GRID_BOTTOM_WAIT,
+    CONST_GRID_STABLE_PAGES,
+    CONST_GRID_MAX_PAGES,
 )
 
+_LOGIN_ERROR = "login error"
+_SESSION_VALID = "session valid"
+
 
 class Crawler:
     """
@@ -43,7 +60,22 @@ class Crawler:
 
     """
 
-    def __init__(self, login_email, login_pass, hide=True, mfa=True):
+    def __init__(
+        self,
+        login_email,
+        login_pass,
+        hide=True,
+        mfa=True,
+        session_dir=None,
+        network_log=False,
+        cache=None,
+        journal=None,
+        links=None,
+        profile_webdriver=False,
+        lean_mode=False,
+        network_stats=False,
+        paged_grid=True,
+    ):
         """
         Creates a cleint and logins to the EduHub portal.
 
@@ -52,24 +84,48 @@ class Crawler:
             login_pass - login password
             hide - hide chromium while the action are taken
             mfa - does login involve mfa, if so wait some more time for it.
+            session_dir - chrome user data directory to keep the login
+                session in between runs (optional). If the session stored
+                there is still valid, login (and mfa) is skipped.
+            network_log - record the browser's network requests (needed to
+                read the API token, see get_api_token)
+            cache - crawl cache (see cache.CrawlCache) to reuse the unchanged
+                courses and handouts from (optional)
+            journal - crawl journal (see journal.CrawlJournal) to record the
+                completed courses, labs and handouts in and to skip them
+                when resuming (optional)
+            links - blade links (see links.BladeLinks) to open the course
+                and lab blades from, and to store the learned links in
+                (optional)
+            profile_webdriver - count and time the webdriver commands,
+                reported when the crawler is turned off
+            lean_mode - start the browser without the features the crawler
+                does not use and block the requests it does not need (see
+                lean.py)
+            network_stats - count the browser's requests and their bytes,
+                reported when the crawler is turned off
+            paged_grid - read the handout grid a page at a time, scrolling
+                it, so that the handouts the virtualized grid does not
+                render at once (long labs) are read too
 
         Returns:
             client - webdriver client if login was successful, otherwise None
         """
 
-        success = True
-        error = None
-
-        usage_file_path = os.path.join(
-            CONST_USAGE_PATH, CONST_USAGE_CSV_FILE_NAME
-        )
-
-        if os.path.isfile(usage_file_path):
-            os.rename(
-                usage_file_path,
-                "%s_backup_%s"
-                % (usage_file_path, datetime.now().strftime("%Y%m%d_%H%M%S")),
-            )
+        self.hide = hide
+        self.mfa = mfa
+        self.session_dir = session_dir
+        self.network_log = network_log
+        self.cache = cache
+        self.journal = journal
+        self.links = links
+        self.profile_webdriver = profile_webdriver
+        self.lean_mode = lean_mode
+        self.paged_grid = paged_grid
+        self.network_stats = None
+
+        self._login_email = login_email
+        self._login_pass = login_pass
 
         options = Options()
 
@@ -79,114 +135,193 @@ class Crawler:
             options.add_argument("--disable-dev-shm-usage")
             options.add_argument("--log-level=0")
 
-        options.add_experimental_option(
-            "prefs",
-            {
-                "download.default_directory": r"%s" % (CONST_USAGE_PATH),
-                "download.prompt_for_download": False,
-                "download.directory_upgrade": True,
-                "safebrowsing.enabled": True,
-            },
-        )
+        prefs = {
+            "download.default_directory": r"%s" % (CONST_USAGE_PATH),
+            "download.prompt_for_download": False,
+            "download.directory_upgrade": True,
+            "safebrowsing.enabled": True,
+        }
 
-        self.client = webdriver.Chrome(
-            ChromeDriverManager().install(), options=options
-        )
+        if lean_mode:
+            lean.add_options(options, prefs)
+
+        options.add_experimental_option("prefs", prefs)
+
+        if network_log or network_stats:
+            options.set_capability(
+                "goog:loggingPrefs", {"performance": "ALL"}
+            )
+            options.add_experimental_option(
+                "perfLoggingPrefs",
+                {"enableNetwork": True, "enablePage": False},
+            )
+
+        if session_dir is not None:
+            os.makedirs(session_dir, exist_ok=True)
+            options.add_argument("--user-data-dir=%s" % (session_dir))
+
+        success, _, driver_path = resolve_chromedriver()
+
+        if not success:
+            self.client = None
+            return
+
+        self.client = webdriver.Chrome(driver_path, options=options)
+
+        if lean_mode:
+            lean.block_requests(self.client)
+
+        if network_stats:
+            self.network_stats = lean.NetworkStats()
+
+        self.waiter = Waiter(self.client)
+
+        if profile_webdriver:
+            self.profiler = CommandProfiler(self.client)
+        else:
+            self.profiler = None
+
+        self.client.get(CONST_PORTAL_OVERVIEW_ADDRESS)
+
+        # a valid saved session lands straight on the portal
+        _, _, page = self.waiter.until("session check", _session_page)
+
+        if page == _SESSION_VALID:
+            log("Reusing the saved login session.", level=1)
+        else:
+            with tracing.span("login"):
+                self._login(login_email, login_pass, mfa)
+
+    def _login(self, login_email, login_pass, mfa):
+        """
+        Logins to the EduHub portal. Expects the login page to be open.
+            On failure, the client is closed and set to None.
+
+        Arguments:
+            login_email - login email
+            login_pass - login password
+            mfa - does login involve mfa, if so wait some more time for it.
+        """
 
         log(
             "Logging to %s as %s" % (CONST_PORTAL_ADDRESS, login_email),
             level=1,
         )
 
-        self.client.get(CONST_PORTAL_ADDRESS)
-
-        sleep(CONST_SLEEP_TIME)
-
         # entering email address
-        self.client.find_element_by_xpath("//input[@type='email']").send_keys(
-            login_email
+        success, error, email_input = self.waiter.until(
+            "login page",
+            EC.element_to_be_clickable((By.XPATH, "//input[@type='email']")),
         )
-        self.client.find_element_by_xpath("//input[@type='submit']").click()
 
-        sleep(CONST_SLEEP_TIME)
+        if success:
+            email_input.send_keys(login_email)
+            self.client.find_element_by_xpath(
+                "//input[@type='submit']"
+            ).click()
+
+            success, error, password_input = self.waiter.until(
+                "password page", _password_page
+            )
 
         # check if username error occured
-        try:
-            _ = self.client.find_element_by_id("usernameError")
+        if success and password_input == _LOGIN_ERROR:
             success = False
             error = "Username might be incorrect. Stopping."
-            log(error, level=0)
-        except Exception:
-            success = True
 
         if success:
             # entering password
-            self.client.find_element_by_xpath(
-                "//input[@name='passwd']"
-            ).send_keys(login_pass)
+            password_input.send_keys(login_pass)
 
             self.client.find_element_by_xpath(
                 "//input[@type='submit']"
             ).click()
 
-            sleep(CONST_SLEEP_TIME)
+            # wait until the mfa has been approved
+            if mfa:
+                log("Waiting for MFA approval.", level=1)
 
-            # check if password error occured
-            try:
-                _ = self.client.find_element_by_id("passwordError")
-                success = False
-                error = "Password might be incorrect. Stopping."
-                log(error, level=0)
-            except Exception:
-                error = False
+            success, error, stay_signed_in_button = self.waiter.until(
+                "MFA approval" if mfa else "sign in",
+                _stay_signed_in_page,
+                timeout=CONST_MFA_TIMEOUT if mfa else CONST_TIMEOUT,
+            )
+
+            if not success and mfa:
+                error = "MFA was not approved! Stopping."
+
+        # check if password error occured
+        if success and stay_signed_in_button == _LOGIN_ERROR:
+            success = False
+            error = "Password might be incorrect. Stopping."
 
-        # wait until the mfa has been approved
         if success and mfa:
+            log("MFA approved!", level=1)
 
-            log("Waiting for MFA approval.", level=1)
+        if not success:
+            log(error, level=0)
 
-            sleep_counter = 0
-            sleep_wait = True
+            self.client.quit()
+            self.client = None
+        else:
+            # stay signed in
+            stay_signed_in_button.click()
 
-            while sleep_wait and sleep_counter < CONST_MAX_REFRESH_COUNT:
-                log(
-                    "Sleeping (%f).." % (CONST_REFRESH_SLEEP_TIME),
-                    level=3,
-                    indent=2,
-                )
-                sleep(CONST_REFRESH_SLEEP_TIME)
+            self.waiter.until(
+                "portal redirect", EC.staleness_of(stay_signed_in_button)
+            )
 
-                # wait for MFA approval if needed
-                try:
-                    _ = self.client.find_element_by_id("idDiv_SAOTCAS_Title")
-                except Exception:
-                    try:
-                        self.client.find_element_by_xpath(
-                            "//input[@type='submit']"
-                        )
+    def spawn(self, session_dir):
+        """
+        Creates another crawler with the same login details and settings.
 
-                        log("MFA approved!", level=1)
-                        sleep_wait = False
-                    except Exception:
-                        sleep_wait = True
+        Arguments:
+            session_dir - chrome user data directory of the new crawler
 
-                sleep_counter += 1
+        Returns:
+            crawler - new crawler object
+        """
 
-            if sleep_wait:
-                success = False
-                error = "MFA was not approved! Stopping."
-                log(error, level=0)
+        return Crawler(
+            self._login_email,
+            self._login_pass,
+            hide=self.hide,
+            mfa=self.mfa,
+            session_dir=session_dir,
+            network_log=self.network_log,
+            cache=self.cache,
+            journal=self.journal,
+            links=self.links,
+            profile_webdriver=self.profile_webdriver,
+            lean_mode=self.lean_mode,
+            network_stats=self.network_stats is not None,
+            paged_grid=self.paged_grid,
+        )
+
+    def get_api_token(self):
+        """
+        Reads the bearer token the portal uses for its API requests.
+            Requires the crawler to be created with network_log=True.
+
+        Returns:
+            success - flag if the action was succesful
+            error - error message
+            token - bearer token
+        """
+
+        log("Reading the API token", level=1)
+
+        # the courses blade is filled from the API
+        self.client.get(CONST_PORTAL_COURSES_ADDRESS)
+
+        success, error, token = self.waiter.until(
+            "API token", _api_token_from_log
+        )
 
         if not success:
-            self.client.quit()
-            self.client = None
-        else:
-            # stay signed in
-            self.client.find_element_by_xpath(
-                "//input[@type='submit']"
-            ).click()
+            log(error, level=0)
 
-            sleep(CONST_SLEEP_TIME)
+        return success, error, token
 
     def get_courses(self):
         """
@@ -195,47 +330,25 @@ class Crawler:
         Returns:
             success - flag if the action was succesful
             error - error message
-            entries - a list of courses
+            entries - a list of courses (grid rows, see grid.extract_grid)
         """
 
-        success = True
-        error = None
-
         log("Getting the list of courses", level=1)
 
         log("Loading %s" % (CONST_PORTAL_COURSES_ADDRESS), level=2, indent=2)
         self.client.get(CONST_PORTAL_COURSES_ADDRESS)
 
-        sleep_wait = True
-        time_start = time()
-
         # Finds table entries
-        while sleep_wait:
-
-            time_elapsed = time() - time_start
-
-            if time_elapsed > CONST_TIMEOUT:
-                success = False
-                error = "ERROR: Time out (%d)" % (CONST_TIMEOUT)
-                log(error, level=0)
-                break
-
-            log(
-                "Sleeping while courses are loading (%f).."
-                % (CONST_REFRESH_SLEEP_TIME),
-                level=3,
-                indent=2,
-            )
-            sleep(CONST_REFRESH_SLEEP_TIME)
-
-            entries = self.client.find_elements_by_xpath(
-                '//*[@class="fxs-portal-hover fxs-portal-focus azc-grid-row"]'
-            )
+        success, error, entries = self.waiter.until(
+            "course list",
+            lambda client: extract_grid(client, COURSE_ROW_SELECTOR)["rows"],
+        )
 
-            if len(entries) != 0:
-                sleep_wait = False
-                log("List of courses loaded!", level=2, indent=2)
-                log("Found %d courses." % (len(entries)), level=1, indent=2)
+        if success:
+            log("List of courses loaded!", level=2, indent=2)
+            log("Found %d courses." % (len(entries)), level=1, indent=2)
+        else:
+            log(error, level=0)
 
         return success, error, entries
 
@@ -257,27 +370,16 @@ class Crawler:
         data = []
 
         for entry in entries:
-            elements = entry.find_elements_by_class_name(
-                "azc-grid-cellContent"
-            )
+            cells = entry["cells"][:5]
+            cells += [None] * (5 - len(cells))
 
-            course_name = None
-            course_budget = None
-            course_usage = None
-            course_students = None
-            course_project_groups = None
-
-            for index, element in enumerate(elements):
-                if index == 0:
-                    course_name = element.text
-                elif index == 1:
-                    course_budget = element.text
-                elif index == 2:
-                    course_usage = element.text
-                elif index == 3:
-                    course_students = element.text
-                elif index == 4:
-                    course_project_groups = element.text
+            (
+                course_name,
+                course_budget,
+                course_usage,
+                course_students,
+                course_project_groups,
+            ) = cells
 
             if course_name is not None:
                 data.append(
@@ -290,16 +392,7 @@ class Crawler:
                     ]
                 )
 
-        courses_df = pd.DataFrame(
-            data,
-            columns=[
-                "Name",
-                "Assigned credit",
-                "Consumed",
-                "Students",
-                "Project groups",
-            ],
-        )
+        courses_df = pd.DataFrame(data, columns=CONST_COURSE_COLUMNS)
 
         return success, error, courses_df
 
@@ -320,12 +413,173 @@ class Crawler:
                 handouts and their details
         """
 
-        sleep(CONST_COURSE_SLEEP_TIME)
+        return collect_df(
+            self.iter_course_details(course_name, lab_name, handout_name),
+            CONST_HANDOUT_COLUMNS,
+        )
 
-        details_df = None
+    def iter_course_details(
+        self, course_name, lab_name=None, handout_name=None
+    ):
+        """
+        Yields the handouts in a course and their details.
+
+        Arguments:
+            course_name: name of a course
+            lab_name: name of a lab (optional)
+            handout_name: name of a handout (optional)
+        Yields:
+            handout records (see CONST_HANDOUT_COLUMNS)
+        Returns:
+            success - flag if the action was succesful
+            error - error message
+        """
+
+        return tracing.traced(
+            "course",
+            self._iter_course_details(course_name, lab_name, handout_name),
+            course=course_name,
+        )
+
+    def _iter_course_details(self, course_name, lab_name, handout_name):
+        """
+        Yields the handouts in a course and their details
+            (see iter_course_details).
+
+        """
 
         log("Looking for %s course details" % (course_name), level=1)
 
+        whole_course = lab_name is None and handout_name is None
+
+        if self.journal is not None and whole_course:
+            course_records = self.journal.get_course_records(course_name)
+
+            if course_records is not None:
+                log(
+                    "(%s) course was completed before, resuming after it."
+                    % (course_name),
+                    level=1,
+                )
+                yield from course_records
+                return True, None
+
+        # read at every course, not to pile the log up in the browser
+        if self.network_stats is not None:
+            self.network_stats.collect(self.client)
+
+        # a specific lab can be opened straight away
+        if lab_name is not None and self._open_lab_link(course_name, lab_name):
+            success, error = yield from self._iter_lab(
+                course_name, lab_name, handout_name, None
+            )
+            return success, error
+
+        success, error = self._open_course(course_name)
+
+        if not success:
+            return success, error
+
+        ###########################################################
+        # finding all the labs that belong to the course and
+        #   getting their details
+        ###########################################################
+
+        success, error, classroom_grid = self.waiter.until(
+            "lab list",
+            lambda client: client.find_element_by_class_name(
+                "ext-classroom-overview-assignment-grid"
+            ),
+        )
+
+        if not success:
+            log(error, level=0)
+            return success, error
+
+        # a course without labs never shows any links, hence the short wait
+        _, _, entries = self.waiter.until(
+            "lab links",
+            lambda client: extract_links(
+                client, "ext-grid-clickable-link", root=classroom_grid
+            ),
+            timeout=CONST_SLEEP_TIME,
+        )
+
+        if entries is None:
+            entries = []
+
+        log(
+            "(%s) course has %d lab(s)." % (course_name, len(entries)), level=1
+        )
+
+        for el_lab_text, element in entries:
+
+            el_lab_name = el_lab_text.lower()
+
+            # are we are looking for a particular lab?
+            if lab_name is not None and lab_name != el_lab_name:
+                continue
+
+            success, error = yield from self._iter_lab(
+                course_name, el_lab_name, handout_name, element
+            )
+
+            if not success:
+                break
+
+            # if we found the lab, do not need to continue
+            if lab_name is not None and lab_name == el_lab_name:
+                break
+
+        if success and self.journal is not None and whole_course:
+            self.journal.complete_course(course_name)
+
+        return success, error
+
+    def _open_course(self, course_name):
+        """
+        Opens the overview blade of a course, straight from its link if it
+            is known, otherwise by clicking it in the course list.
+
+        Arguments:
+            course_name - name of the course
+
+        Returns:
+            success - flag if the action was succesful
+            error - error message
+        """
+
+        address = None
+
+        if self.links is not None:
+            address = self.links.get_course(course_name)
+
+        if address is not None:
+            log("Loading (%s) course from its link" % (course_name), level=1)
+
+            self.client.get(address)
+
+            # the same blades as when clicked through the course list
+            success, _, _ = self.waiter.until(
+                "course overview link",
+                lambda client: _blade_opened(
+                    client,
+                    "ext-classroom-overview-class-name-title",
+                    course_name,
+                    2,
+                ),
+            )
+
+            if success:
+                return True, None
+
+            log(
+                "The (%s) course link did not open, " % (course_name)
+                + "going through the course list.",
+                level=1,
+            )
+            self.links.forget_course(course_name)
+
         ###########################################################
         # first navigate to the courses page and wait till it loads
         ###########################################################
@@ -333,7 +587,7 @@ class Crawler:
         success, error, entries = self.get_courses()
 
         if not success:
-            return success, error, details_df
+            return success, error
 
         ###########################################################
         # select the course
@@ -341,11 +595,7 @@ class Crawler:
 
         found = False
         for entry in entries:
-            elements = entry.find_elements_by_class_name(
-                "azc-grid-cellContent"
-            )
-
-            if elements[0].text == course_name:
+            if len(entry["cells"]) != 0 and entry["cells"][0] == course_name:
                 log("(%s) course found." % (course_name), level=1)
                 found = True
                 break
@@ -355,57 +605,29 @@ class Crawler:
             error = "Could not find (%s) course. Returning." % (course_name)
             log(error, level=0)
 
-            return success, error, details_df
+            return success, error
 
         ###########################################################
         # wait until the course overview page is loaded
         ###########################################################
 
-        elements[0].click()
+        entry["handle"].click()
 
         log("Loading (%s) course " % (course_name), level=1)
 
-        found = False
-        course_title = None
-
-        timeout = False
-        time_start = time()
-
-        while not found:
-
-            time_elapsed = time() - time_start
-            if time_elapsed > CONST_TIMEOUT:
-                timeout = True
-                break
-
-            log(
-                "Sleeping while the (%s) course overview is loading (%f).."
-                % (course_name, CONST_REFRESH_SLEEP_TIME),
-                level=3,
-                indent=2,
-            )
-            sleep(CONST_REFRESH_SLEEP_TIME)
-
-            course_title_list = self.client.find_elements_by_class_name(
+        success, error, course_title_list = self.waiter.until(
+            "course overview",
+            lambda client: client.find_elements_by_class_name(
                 "ext-classroom-overview-class-name-title"
-            )
-
-            if len(course_title_list) != 0:
-                log("(%s) course overview loaded." % (course_name), level=2)
-                found = True
-                course_title = course_title_list[0].text
+            ),
+        )
 
-        if timeout:
-            success = False
-            error = "ERROR: Time out (%d)" % (CONST_TIMEOUT)
+        if not success:
             log(error, level=0)
-            return success, error, details_df
+            return success, error
 
-        if not found:
-            success = False
-            error = "Could not load (%s) course. Returning." % (course_name)
-            log(error, level=0, indent=2)
-            return success, error, details_df
+        log("(%s) course overview loaded." % (course_name), level=2)
+        course_title = course_title_list[0].text
 
         if course_title != course_name:
             success = False
@@ -414,63 +636,148 @@ class Crawler:
             ) + "doesn't match the given name (%s)." % (course_name)
             log(error, level=0, indent=2)
 
-            return success, error, details_df
+            return success, error
 
-        ###########################################################
-        # finding all the labs that belong to the course and
-        #   getting their details
-        ###########################################################
+        if self.links is not None:
+            self._learn_link(
+                lambda address: self.links.set_course(course_name, address),
+                "ext-classroom-overview-class-name-title",
+                course_name,
+                2,
+            )
 
-        sleep(CONST_SLEEP_TIME)
+        return success, error
 
-        classroom_grid = self.client.find_element_by_class_name(
-            "ext-classroom-overview-assignment-grid"
-        )
+    def _open_lab_link(self, course_name, lab_name):
+        """
+        Opens the blade of a lab from its link.
 
-        entries = classroom_grid.find_elements_by_class_name(
-            "ext-grid-clickable-link"
-        )
+        Arguments:
+            course_name - name of the course
+            lab_name - name of the lab (lower case)
+
+        Returns:
+            True if the link is known and opened the lab's blade
+        """
+
+        if self.links is None:
+            return False
+
+        address = self.links.get_lab(course_name, lab_name)
+
+        if address is None:
+            return False
 
         log(
-            "(%s) course has %d lab(s)." % (course_name, len(entries)), level=1
+            "Loading (%s) course -> (%s) lab from its link"
+            % (course_name, lab_name),
+            level=1,
         )
 
-        for element in entries:
+        self.client.get(address)
+
+        # the same blades as when clicked through the course overview
+        success, _, _ = self.waiter.until(
+            "lab link",
+            lambda client: _blade_opened(
+                client,
+                "ext-assignment-detail-more-handout-link",
+                lab_name,
+                3,
+            ),
+        )
 
-            el_lab_name = element.text.lower()
+        if not success:
+            log(
+                "The (%s) course -> (%s) lab link did not open."
+                % (course_name, lab_name),
+                level=1,
+            )
+            self.links.forget_lab(course_name, lab_name)
 
-            # are we are looking for a particular lab?
-            if lab_name is not None and lab_name != el_lab_name:
-                continue
+        return success
+
+    def _iter_lab(self, course_name, lab_name, handout_name, element):
+        """
+        Yields the details of a lab's handouts, skipping the lab if the
+            journal has it completed.
 
+        Arguments:
+            course_name - name of the course
+            lab_name - name of the lab (lower case)
+            handout_name - name of a handout (optional)
+            element - the lab's link in the course overview, None if the
+                lab's blade is already open
+
+        Yields:
+            handout records (see CONST_HANDOUT_COLUMNS)
+        Returns:
+            success - flag if the action was succesful
+            error - error message
+        """
+
+        if self.journal is not None and handout_name is None:
+            lab_records = self.journal.get_lab_records(course_name, lab_name)
+
+            if lab_records is not None:
+                log(
+                    "(%s) course -> (%s) lab was completed before."
+                    % (course_name, lab_name),
+                    level=1,
+                )
+                yield from lab_records
+                return True, None
+
+        if element is not None:
             log(
                 "Loading (%s) course -> (%s) lab blade."
-                % (course_name, el_lab_name),
+                % (course_name, lab_name),
                 level=1,
             )
 
+            # the blade of the previously crawled lab (if any) gets replaced
+            previous_blade = self.client.find_elements_by_class_name(
+                "ext-assignment-detail-more-handout-link"
+            )
+
             element.click()
 
-            # give some time to load
-            sleep(CONST_SLEEP_TIME)
+            if len(previous_blade) != 0:
+                self.waiter.until(
+                    "previous lab blade to close",
+                    EC.staleness_of(previous_blade[0]),
+                )
 
-            success, error, handouts_df = self.get_lab_details(
-                course_name, el_lab_name, handout_name
-            )
+        success, error = yield from self.iter_lab_details(
+            course_name, lab_name, handout_name
+        )
 
-            if not success:
-                break
+        if success and self.journal is not None and handout_name is None:
+            self.journal.complete_lab(course_name, lab_name)
 
-            if details_df is None:
-                details_df = handouts_df
-            else:
-                details_df = details_df.append(handouts_df)
+        return success, error
 
-            # if we found the lab, do not need to continue
-            if lab_name is not None and lab_name == el_lab_name:
-                break
+    def _learn_link(self, store, marker_class, title, depth):
+        """
+        Stores the address of the blade just opened, if the portal gave it
+            one. Only the links that can be checked when they are opened
+            (see _blade_opened) are stored.
+
+        Arguments:
+            store - function taking the address
+            marker_class, title, depth - see _blade_opened
+        """
+
+        address = self.client.current_url
 
-        return success, error, details_df
+        if address in [
+            CONST_PORTAL_COURSES_ADDRESS,
+            CONST_PORTAL_OVERVIEW_ADDRESS,
+        ]:
+            return
+
+        if _blade_opened(self.client, marker_class, title, depth):
+            store(address)
 
     def get_lab_details(self, course_name, lab_name, handout_name=None):
         """
@@ -486,57 +793,70 @@ class Crawler:
             handouts_df: pandas dataframe
         """
 
-        success = True
-        error = None
-
-        log(
-            "Loading (%s) course -> (%s) lab -> more blade."
-            % (course_name, lab_name),
-            level=1,
+        return collect_df(
+            self.iter_lab_details(course_name, lab_name, handout_name),
+            CONST_HANDOUT_COLUMNS,
         )
 
-        found = False
-        more_buttom = None
+    def iter_lab_details(self, course_name, lab_name, handout_name=None):
+        """
+        Yields the details (handouts' details) of a selected lab.
+
+        Arguments:
+            course_name: the name of the course
+            lab_name: the name of the lab
+            handout_name: name of a handout (optional)
+        Yields:
+            handout records (see CONST_HANDOUT_COLUMNS)
+        Returns:
+            success - flag if the action was succesful
+            error - error message
+        """
 
-        time_start = time()
-        timeout = False
+        return tracing.traced(
+            "lab",
+            self._iter_lab_details(course_name, lab_name, handout_name),
+            course=course_name,
+            lab=lab_name,
+        )
 
-        while not found:
-            time_elapsed = time() - time_start
-            if time_elapsed > CONST_TIMEOUT:
-                timeout = True
-                break
+    def _iter_lab_details(self, course_name, lab_name, handout_name):
+        """
+        Yields the details (handouts' details) of a selected lab
+            (see iter_lab_details).
 
-            log(
-                "Sleeping while the initial handout list is loading (%f).."
-                % (CONST_REFRESH_SLEEP_TIME),
-                level=3,
-                indent=2,
-            )
+        """
 
-            sleep(CONST_REFRESH_SLEEP_TIME)
+        log(
+            "Loading (%s) course -> (%s) lab -> more blade."
+            % (course_name, lab_name),
+            level=1,
+        )
 
-            try:
-                more_buttom = self.client.find_element_by_class_name(
-                    "ext-assignment-detail-more-handout-link"
-                )
-                found = True
-            except Exception:
-                found = False
+        success, error, more_buttom = self.waiter.until(
+            "more button",
+            lambda client: client.find_element_by_class_name(
+                "ext-assignment-detail-more-handout-link"
+            ),
+        )
 
-        if timeout:
-            success = False
-            error = "ERROR: Time out (%d)" % (CONST_TIMEOUT)
+        if not success:
             log(error, level=0)
-            return success, error, None
-
-        if not found:
-            success = False
             error = "Could not find 'more' button in the (%s) " % (
                 course_name
             ) + "course -> (%s) lab blade. Returning." % (lab_name)
             log(error, level=0, indent=2)
-            return success, error, None
+            return success, error
+
+        if self.links is not None:
+            self._learn_link(
+                lambda address: self.links.set_lab(
+                    course_name, lab_name, address
+                ),
+                "ext-assignment-detail-more-handout-link",
+                lab_name,
+                3,
+            )
 
         more_buttom.click()
 
@@ -550,11 +870,11 @@ class Crawler:
             level=1,
         )
 
-        success, error, handouts_df = self.get_handouts_details(
+        success, error = yield from self.iter_handouts_details(
             course_name, lab_name, handout_name
         )
 
-        return success, error, handouts_df
+        return success, error
 
     def get_handouts_details(self, course_name, lab_name, handout_name=None):
         """
@@ -571,222 +891,326 @@ class Crawler:
             handouts_df: pandas dataframe
         """
 
-        success = True
-        error = None
-        handouts_df = None
+        return collect_df(
+            self.iter_handouts_details(course_name, lab_name, handout_name),
+            CONST_HANDOUT_COLUMNS,
+        )
 
-        data = []
+    def iter_handouts_details(self, course_name, lab_name, handout_name=None):
+        """
+        Yields the details of all the handouts of a selected lab in a course,
+            one handout at a time.
 
-        found = False
-        handout_list_table = None
+        Arguments:
+            course_name: the name of the course
+            lab_name: the name of the lab
+            handout_name: name of a handout (optional)
+        Yields:
+            handout records (see CONST_HANDOUT_COLUMNS)
+        Returns:
+            success - flag if the action was succesful
+            error - error message
+        """
 
-        time_start = time()
-        timeout = False
+        # wait until handout list table is loaded
+        success, error, handout_list_table = self.waiter.until(
+            "handout list",
+            lambda client: client.find_element_by_class_name(
+                "ext-classroster-grid"
+            ),
+            indent=4,
+        )
 
-        # wait until handout list table is loading
-        while not found:
+        if not success:
+            log(error, level=0)
+            error = "Could not load the (%s) course -> " % (
+                course_name
+            ) + "(%s) lab -> more blade: handout list table." % (lab_name)
+            log(error, level=0, indent=4)
 
-            time_elapsed = time() - time_start
-            if time_elapsed > CONST_TIMEOUT:
-                timeout = True
-                break
+            return success, error
 
-            log(
-                "Sleeping while the (%s) course -> " % (course_name)
-                + "(%s) lab -> more blade: handout list " % (lab_name)
-                + "table is loading (%.2f).." % (CONST_REFRESH_SLEEP_TIME),
-                level=3,
+        # Checks if the correct lab is loaded
+        blade_titles = self.client.find_elements_by_class_name(
+            "fxs-blade-title-content"
+        )
+        blade_titles_cnt = len(blade_titles)
+
+        if blade_titles_cnt != 4:
+            success = False
+            error = (
+                "Expected to be in the (%s) course -> " % (course_name)
+                + "(%s) lab -> more blade (depth = 4). " % (lab_name)
+                + "Current depth = %d." % (blade_titles_cnt)
+            )
+            log(error, level=0, indent=4)
+
+            return success, error
+
+        viewport = None
+
+        if self.paged_grid:
+            viewport = find_viewport(self.client, handout_list_table)
+
+        # names of the handouts read, the pages overlap
+        handout_names = set()
+        at_bottom = False
+        stable_pages = 0
+        page = 0
+
+        while True:
+            success, error, handout_grid = self.waiter.until(
+                "consumption data",
+                lambda client: _consumption_loaded(
+                    client, handout_list_table
+                ),
                 indent=4,
             )
 
-            sleep(CONST_REFRESH_SLEEP_TIME)
+            if not success:
+                log(error, level=0)
+                return success, error
+
+            page_handouts = [
+                el_handout
+                for el_handout in handout_grid["rows"]
+                if len(el_handout["cells"]) >= 6
+                and len(el_handout["links"]) != 0
+                and el_handout["link_texts"][0] not in handout_names
+            ]
+
+            handout_names.update(
+                el_handout["link_texts"][0] for el_handout in page_handouts
+            )
 
-            try:
-                handout_list_table = self.client.find_element_by_class_name(
-                    "ext-classroster-grid"
+            success, error = yield from self._iter_handout_rows(
+                course_name, lab_name, handout_name, page_handouts
+            )
+
+            # the whole grid is shown, the handout is found or failed
+            if (
+                not success
+                or viewport is None
+                or (handout_name is not None and handout_name in handout_names)
+            ):
+                break
+
+            if at_bottom and len(page_handouts) == 0:
+                stable_pages += 1
+            else:
+                stable_pages = 0
+
+            page += 1
+
+            # the grid stopped adding rows at the bottom: all the rows are
+            #   read
+            if stable_pages >= CONST_GRID_STABLE_PAGES:
+                break
+
+            if page >= CONST_GRID_MAX_PAGES:
+                success = False
+                error = (
+                    "Could not read all the (%s) course -> " % (course_name)
+                    + "(%s) lab handouts in %d pages." % (lab_name, page)
                 )
-                found = True
-            except Exception:
-                found = False
+                log(error, level=0, indent=4)
+
+                return success, error
+
+            state = viewport_state(
+                self.client, viewport, HANDOUT_ROW_SELECTOR
+            )
+
+            at_bottom = not scroll_viewport(
+                self.client, viewport, CONST_GRID_SCROLL_STEP
+            )
+
+            # at the bottom already, the grid may still be adding rows
+            if at_bottom:
+                self.waiter.until(
+                    "more handouts",
+                    lambda client: _grid_grown(client, viewport, state),
+                    timeout=CONST_GRID_BOTTOM_WAIT,
+                    indent=4,
+                )
+                continue
 
-        if timeout:
-            success = False
-            error = "ERROR: Time out (%d)" % (CONST_TIMEOUT)
-            log(error, level=0)
-            return success, error, handouts_df
+            success, error, _ = self.waiter.until(
+                "handout grid scroll",
+                lambda client: _grid_scrolled(client, viewport, state),
+                indent=4,
+            )
 
-        if not found:
-            success = False
-            error = "Could not load the (%s) course -> " % (
-                course_name
-            ) + "(%s) lab -> more blade: handout list table." % (lab_name)
-            log(error, level=0, indent=4)
+            if not success:
+                log(error, level=0)
+                return success, error
 
-            return success, error, handouts_df
+        if not success:
+            return success, error
 
-        # Checks if the correct lab is loaded
-        blade_titles = self.client.find_elements_by_class_name(
-            "fxs-blade-title-content"
+        log(
+            "Finished getting the (%s) course " % (course_name)
+            + "-> (%s) lab -> more blade: handout details" % (lab_name),
+            level=1,
         )
-        blade_titles_cnt = len(blade_titles)
 
-        if blade_titles_cnt != 4:
-            success = False
-            error = (
-                "Expected to be in the (%s) course -> " % (course_name)
-                + "(%s) lab -> more blade (depth = 4). " % (lab_name)
-                + "Current depth = %d." % (blade_titles_cnt)
-            )
-            log(error, level=0, indent=4)
+        return success, error
 
-            return success, error, handouts_df
+    def _iter_handout_rows(
+        self, course_name, lab_name, handout_name, handout_rows
+    ):
+        """
+        Yields the details of the handouts of rows of the handout grid.
 
-        consumption_loaded = False
+        Arguments:
+            course_name: the name of the course
+            lab_name: the name of the lab
+            handout_name: name of a handout (optional)
+            handout_rows: handout grid rows (see grid.extract_grid)
+        Yields:
+            handout records (see CONST_HANDOUT_COLUMNS)
+        Returns:
+            success - flag if the action was succesful
+            error - error message
+        """
 
-        time_start = time()
-        timeout = False
+        success = True
+        error = None
 
-        while not consumption_loaded:
+        # Getting details for handouts/subscriptions
+        for el_handout in handout_rows:
 
-            time_elapsed = time() - time_start
-            if time_elapsed > CONST_TIMEOUT:
-                timeout = True
-                break
+            el_handout_details = el_handout["cells"]
 
-            consumption_loaded = True
+            if len(el_handout_details) < 6 or len(el_handout["links"]) == 0:
+                # something wrong, incorrect number of cells
+                continue
 
-            log(
-                "Sleeping while the (%s) course -> " % (course_name)
-                + "(%s) lab -> more blade: handout list table is " % (lab_name)
-                + "loading consumption data "
-                + "(%.2f).." % (CONST_REFRESH_SLEEP_TIME),
-                level=3,
-                indent=4,
-            )
+            el_handout_link = el_handout["links"][0]
 
-            sleep(CONST_REFRESH_SLEEP_TIME)
+            el_handout_name = el_handout["link_texts"][0]
+            el_handout_budget = el_handout_details[3].lower()
+            el_handout_consumed = el_handout_details[4].lower()
+            el_handout_status = el_handout_details[5].lower()
 
-            # Finding the list of handouts
-            handout_list = handout_list_table.find_elements_by_class_name(
-                "azc-grid-row"
-            )
+            # are we are looking for a particular handout?
+            if (handout_name is not None) and (
+                handout_name != el_handout_name
+            ):
 
-            # Getting details for handouts/subscriptions
-            for el_handout in handout_list:
+                continue
 
-                el_handout_details = el_handout.find_elements_by_class_name(
-                    "azc-grid-cellContent"
+            if self.journal is not None:
+                record = self.journal.get_handout_record(
+                    course_name, lab_name, el_handout_name
                 )
 
-                if len(el_handout_details) < 6:
-                    # something wrong, incorrect number of cells
-                    continue
-
-                el_handout_link = el_handout_details[
-                    0
-                ].find_element_by_class_name("ext-grid-clickable-link")
+                if record is not None:
+                    yield record
 
-                el_handout_name = el_handout_link.text
-                el_handout_budget = el_handout_details[3].text.lower()
-                el_handout_consumed = el_handout_details[4].text.lower()
-                el_handout_status = el_handout_details[5].text.lower()
+                    if handout_name is not None:
+                        break
 
-                if el_handout_consumed == "--":
-                    consumption_loaded = False
-                    break
+                    continue
 
-                # are we are looking for a particular handout?
-                if (handout_name is not None) and (
-                    handout_name != el_handout_name
-                ):
+            handout_state = [el_handout_budget, el_handout_status]
+            cached_details = None
 
-                    continue
+            if self.cache is not None:
+                cached_details = self.cache.get_handout_details(
+                    course_name, lab_name, el_handout_name, handout_state
+                )
 
-                el_handout_link.click()
+            if cached_details is not None:
+                log(
+                    "(%s) handout is unchanged, reusing its details."
+                    % (el_handout_name),
+                    level=1,
+                    indent=2,
+                )
 
+                success = True
                 (
-                    success,
-                    error,
                     sub_name,
                     sub_id,
                     sub_status,
                     sub_expiry_date,
                     sub_user_email_list,
-                    crawltime_utc,
-                ) = self.get_handout_details(el_handout_name)
+                ) = cached_details
+                crawltime_utc = datetime.utcnow()
 
-                if success:
-                    data.append(
+            else:
+                with tracing.span(
+                    "handout",
+                    course=course_name,
+                    lab=lab_name,
+                    handout=el_handout_name,
+                ):
+                    el_handout_link.click()
+
+                    (
+                        success,
+                        error,
+                        sub_name,
+                        sub_id,
+                        sub_status,
+                        sub_expiry_date,
+                        sub_user_email_list,
+                        crawltime_utc,
+                    ) = self.get_handout_details(el_handout_name)
+
+                if success and self.cache is not None:
+                    self.cache.set_handout_details(
+                        course_name,
+                        lab_name,
+                        el_handout_name,
+                        handout_state,
                         [
-                            course_name,
-                            lab_name,
-                            el_handout_name,
-                            el_handout_budget,
-                            el_handout_consumed,
-                            el_handout_status,
                             sub_name,
                             sub_id,
                             sub_status,
                             sub_expiry_date,
                             sub_user_email_list,
-                            crawltime_utc,
-                        ]
-                    )
-                else:
-                    error = (
-                        "(%s) course -> " % (course_name)
-                        + "(%s) lab -> " % (lab_name)
-                        + "(%s) handout subscription " % (el_handout_name)
-                        + "details could not be read!"
+                        ],
                     )
 
-                    log(error, level=0, indent=4)
-                    break
-
-                # if we found the handout, do not need to continue
-                if (
-                    handout_name is not None
-                    and handout_name == el_handout_name
-                ):
-                    break
+            if success:
+                record = [
+                    course_name,
+                    lab_name,
+                    el_handout_name,
+                    el_handout_budget,
+                    el_handout_consumed,
+                    el_handout_status,
+                    sub_name,
+                    sub_id,
+                    sub_status,
+                    sub_expiry_date,
+                    sub_user_email_list,
+                    crawltime_utc,
+                ]
 
-            if not success:
-                break
+                # journaled before it is passed on
+                if self.journal is not None:
+                    self.journal.add_handout(record)
 
-        if timeout:
-            success = False
-            error = "ERROR: Time out (%d)" % (CONST_TIMEOUT)
-            log(error, level=0)
-            return success, error, handouts_df
+                yield record
+            else:
+                error = (
+                    "(%s) course -> " % (course_name)
+                    + "(%s) lab -> " % (lab_name)
+                    + "(%s) handout subscription " % (el_handout_name)
+                    + "details could not be read!"
+                )
 
-        if not success:
-            return success, error, handouts_df
-
-        handouts_df = pd.DataFrame(
-            data,
-            columns=[
-                "Course name",
-                "Lab name",
-                "Handout name",
-                "Handout budget",
-                "Handout consumed",
-                "Handout status",
-                "Subscription name",
-                "Subscription id",
-                "Subscription status",
-                "Subscription expiry date",
-                "Subscription users",
-                "Crawl time utc",
-            ],
-        )
+                log(error, level=0, indent=4)
+                break
 
-        log(
-            "Finished getting the (%s) course " % (course_name)
-            + "-> (%s) lab -> more blade: handout details" % (lab_name),
-            level=1,
-        )
+            # if we found the handout, do not need to continue
+            if handout_name is not None and handout_name == el_handout_name:
+                break
 
-        return success, error, handouts_df
+        return success, error
 
     def get_handout_details(self, handout_name):
         """
@@ -806,84 +1230,29 @@ class Crawler:
             sub_name, sub_id, sub_status, sub_expiry_date, sub_user_email_list
         """
 
-        success = True
-        error = None
-
-        sub_details_loaded = False
         sub_name = None
         sub_id = None
         sub_status = None
         sub_expiry_date = None
         sub_user_email_list = []
+        crawl_time_utc_dt = None
 
-        time_start = time()
-        timeout = False
-
-        while not sub_details_loaded:
-
-            time_elapsed = time() - time_start
-            if time_elapsed > CONST_TIMEOUT:
-                timeout = True
-                break
-
-            log(
-                "Sleeping while handout (%s) details are loading (%f).."
-                % (handout_name, CONST_REFRESH_SLEEP_TIME),
-                level=3,
-                indent=4,
-            )
-            sleep(CONST_REFRESH_SLEEP_TIME)
-
-            try:
-                crawl_time_utc_dt = datetime.utcnow()
-
-                sub_name = self.client.find_element_by_class_name(
-                    "ext-classroom-handout-edit-subscription-name"
-                ).text
-                sub_id = self.client.find_element_by_class_name(
-                    "ext-classroom-handout-edit-subscription-id"
-                ).text
-
-                user_email_list = self.client.find_elements_by_class_name(
-                    "ext-classroom-handout-edit-user-email"
-                )
-
-                sub_status_data = self.client.find_elements_by_class_name(
-                    "ext-classroom-handout-edit-subscription-status-data"
-                )
-
-                if len(sub_status_data) == 2:
-                    sub_status = sub_status_data[0].text
-                    try:
-                        sub_expiry_date = datetime.strptime(
-                            sub_status_data[1].text, "%b %d, %Y"
-                        ).strftime("%Y-%m-%d")
-                    except Exception:
-                        sub_expiry_date = ""
-
-                if sub_name == handout_name and len(user_email_list) > 0:
-                    sub_details_loaded = True
-                else:
-                    continue
-
-                for user_email_li in user_email_list:
-                    try:
-                        user_email = user_email_li.text
-                    except Exception:
-                        user_email = None
-
-                    if user_email is not None:
-                        sub_user_email_list.append(user_email)
-
-            except Exception:
-                sub_details_loaded = False
+        success, error, details = self.waiter.until(
+            "handout details",
+            lambda client: _handout_details_loaded(client, handout_name),
+            indent=4,
+        )
 
-        if timeout:
-            success = False
-            error = "ERROR: Time out (%d)" % (CONST_TIMEOUT)
-            log(error, level=0)
+        if success:
+            (
+                sub_name,
+                sub_id,
+                sub_status,
+                sub_expiry_date,
+                sub_user_email_list,
+                crawl_time_utc_dt,
+            ) = details
 
-        if sub_details_loaded:
             log(
                 "(%s) handout details read." % (handout_name),
                 level=1,
@@ -891,7 +1260,7 @@ class Crawler:
             )
 
         else:
-            success = False
+            log(error, level=0)
             error = "Could not read (%s) handout details" % (handout_name)
             log(error, level=1, indent=2)
 
@@ -920,33 +1289,92 @@ class Crawler:
             eduhub_df - aggregated details
         """
 
-        eduhub_df = None
+        return collect_df(
+            self.iter_eduhub_details(course_name), CONST_HANDOUT_COLUMNS
+        )
+
+    def iter_eduhub_details(self, course_name=None):
+        """
+        Yields details of handouts (subscriptions) from courses/labs.
+
+        Arguments:
+            course_name - name of a course
+
+        Yields:
+            handout records (see CONST_HANDOUT_COLUMNS)
+        Returns:
+            success - flag if the action was succesful
+            error - error message
+        """
+
+        if course_name is not None:
+            success, error = yield from self.iter_course_details(course_name)
+            return success, error
 
         success, error, courses_df = self.get_courses_df()
 
         if not success:
-            return success, error, eduhub_df
+            return success, error
 
         for _, course in courses_df.iterrows():
 
-            self.client.refresh()
-            success, error, course_df = self.get_course_details_df(
-                course["Name"]
+            course_records = None
+
+            if self.journal is not None:
+                course_records = self.journal.get_course_records(
+                    course["Name"]
+                )
+
+            if self.cache is not None and course_records is None:
+                course_records = self.cache.get_course_records(course)
+
+            if course_records is not None:
+                yield from course_records
+                continue
+
+            course_records = []
+
+            # the course list is reloaded, unless the course has a link
+            if self.links is None or (
+                self.links.get_course(course["Name"]) is None
+            ):
+                self.client.refresh()
+
+            success, error = yield from tee(
+                self.iter_course_details(course["Name"]), course_records
             )
 
             if not success:
                 break
 
-            if eduhub_df is None:
-                eduhub_df = course_df
-            else:
-                eduhub_df = eduhub_df.append(course_df)
+            if self.cache is not None:
+                self.cache.set_course(course, course_records)
 
-        return success, error, eduhub_df
+        return success, error
 
     def download_usage(self, start_dt=None, end_dt=None):
         """
-        Downloads usage data
+        Downloads usage data into a directory of its own (in
+            CONST_USAGE_PATH), so that the downloads of concurrent runs do
+            not overwrite each other.
+
+        Arguments:
+            start_dt - start of the usage period (default: 10 days before
+                the end)
+            end_dt - end of the usage period (default: now)
+
+        Returns:
+            success - flag if the action was succesful
+            error - error message
+            usage_file_path - path to the downloaded usage file
+        """
+
+        with tracing.span("usage download"):
+            return self._download_usage(start_dt, end_dt)
+
+    def _download_usage(self, start_dt, end_dt):
+        """
+        Downloads usage data (see download_usage).
 
         """
 
@@ -963,7 +1391,7 @@ class Crawler:
         success, error, _ = self.get_courses()
 
         if not success:
-            return success, error
+            return success, error, None
 
         # Clicking the Usage button
         sleep(CONST_REFRESH_SLEEP_TIME)
@@ -982,7 +1410,7 @@ class Crawler:
             success = False
             error = "Could not find 'Usage' button"
             log(error, level=0, indent=2)
-            return success, error
+            return success, error, None
 
         element.click()
 
@@ -1001,7 +1429,7 @@ class Crawler:
             success = False
             error = "Could not find 'Start' and 'End' input fields"
             log(error, level=0, indent=2)
-            return success, error
+            return success, error, None
 
         start_el_dt = start_el.find_element_by_class_name(
             "azc-datePicker"
@@ -1051,26 +1479,38 @@ class Crawler:
             "fxc-fileDownloadButton"
         )
 
-        element.click()
+        os.makedirs(CONST_USAGE_PATH, exist_ok=True)
+        download_dir = tempfile.mkdtemp(
+            prefix="ec_usage_", dir=CONST_USAGE_PATH
+        )
 
-        # wait for the file to be downloaded
-        sleep(60)
+        self.client.execute_cdp_cmd(
+            "Page.setDownloadBehavior",
+            {"behavior": "allow", "downloadPath": download_dir},
+        )
 
-        # check if file exists
+        element.click()
 
-        usage_file_path = os.path.join(
-            CONST_USAGE_PATH, CONST_USAGE_CSV_FILE_NAME
-        )
+        success, error, usage_file_path = wait_for_download(download_dir)
 
-        if not os.path.isfile(usage_file_path):
-            success = False
-            error = "Could not download usage data for %s - %s" % (
+        if not success:
+            error = "Could not download usage data for %s - %s: %s" % (
                 start_dt,
                 end_dt,
+                error,
             )
             log(error, level=0, indent=2)
 
-        return success, error
+            try:
+                os.rmdir(download_dir)
+            except OSError:
+                pass
+
+            return success, error, None
+
+        log("Usage data downloaded to %s" % (usage_file_path), level=1)
+
+        return success, error, usage_file_path
 
     def quit(self):
         """
@@ -1080,199 +1520,274 @@ class Crawler:
 
         if self.client is not None:
 
+            self.waiter.report()
+
+            if self.profiler is not None:
+                self.profiler.report()
+
+            if self.network_stats is not None:
+                self.network_stats.collect(self.client)
+                self.network_stats.report()
+
             self.client.quit()
 
             self.client = None
 
 
-def crawl(args):
+def _blade_opened(client, marker_class, title, depth):
     """
-    The main crawling routine.
+    Wait condition for a blade opened from a link: the blade shows its
+        marker element and title and is as deep in the blade stack as when
+        clicked to.
 
     Arguments:
-        args: command line arguments
+        client - webdriver client
+        marker_class - class name of an element of the blade
+        title - expected title of the blade (case insensitive)
+        depth - expected number of blades
+
     Returns:
-        success - flag if the action was succesful
-        error - error message
-        return_result - if output is df - resulting dataframe
+        True if the blade is open
     """
 
-    success = True
-    error = None
-    return_result = None
+    if len(client.find_elements_by_class_name(marker_class)) == 0:
+        return False
 
-    # check if any action is specified
-    if not (
-        hasattr(args, "courses_action")
-        or hasattr(args, "handout_action")
-        or hasattr(args, "usage_action")
-    ):
+    titles = client.find_elements_by_class_name("fxs-blade-title-content")
 
-        success = False
-        error = "Unrecognised/unspecified action. Skipping."
-        log(error, level=0)
+    return len(titles) == depth and titles[-1].text.lower() == title.lower()
 
-    if success:
-        log("Crawler started", level=1)
 
-        os.environ["WDM_LOG_LEVEL"] = "%d" % CONST_VERBOSE_LEVEL
+def _api_token_from_log(client):
+    """
+    Wait condition looking for an authorised API request in the browser's
+        network log.
 
-        try:
-            login_email = os.environ["EC_EMAIL"]
-            login_password = os.environ["EC_PASSWORD"]
-        except Exception:
-            login_email = None
-            login_password = None
+    Arguments:
+        client - webdriver client
 
-        if (
-            login_email is None
-            or login_password is None
-            or len(login_email) == 0
-            or len(login_password) == 0
-        ):
+    Returns:
+        the bearer token of the request if found, otherwise False
+    """
 
-            success = False
-            error = (
-                "Missing login credentials. Have you "
-                + "set the environmental parameters? Exiting."
-            )
-            log(error, level=0)
+    for entry in client.get_log("performance"):
+        message = json.loads(entry["message"])["message"]
 
-    if success:
-        result = None
+        if message["method"] != "Network.requestWillBeSent":
+            continue
 
-        try:
-            webdriver_headless = os.environ["EC_HIDE"].lower() == "true"
-        except Exception:
-            webdriver_headless = CONST_WEBDRIVER_HEADLESS
+        request = message["params"]["request"]
 
-        try:
-            if os.environ["EC_MFA"].lower() == "false":
-                mfa_on = False
-            else:
-                mfa_on = True
-        except Exception:
-            mfa_on = True
+        if not request["url"].startswith(CONST_API_ADDRESS):
+            continue
 
-        # instantiate the crawler
-        crawler = Crawler(
-            login_email, login_password, hide=webdriver_headless, mfa=mfa_on
-        )
+        for header, value in request.get("headers", {}).items():
+            if header.lower() == "authorization" and value.startswith(
+                "Bearer "
+            ):
+                return value[len("Bearer "):]
 
-        # take the specified action
-        if crawler.client is not None:
-            success, error, result = _take_action(args, crawler)
-        else:
-            success = False
-            error = "Client not established"
-            result = None
+    return False
 
-        crawler.quit()
 
-        if success and result is not None:
-            if args.output != CONST_OUTPUT_DF:
-                _output_result(args.output, result)
-            else:
-                return_result = result
+def _session_page(client):
+    """
+    Wait condition for the first page shown after opening the portal.
+
+    Arguments:
+        client - webdriver client
+
+    Returns:
+        _SESSION_VALID if a portal blade is shown, "login" if the login page
+            is shown, otherwise False
+    """
+
+    if len(client.find_elements_by_class_name("fxs-blade-title-content")) != 0:
+        return _SESSION_VALID
 
-    log("Crawler finished", level=1)
+    if len(client.find_elements_by_xpath("//input[@type='email']")) != 0:
+        return "login"
 
-    return success, error, return_result
+    return False
 
 
-def _take_action(args, crawler):
+def _password_page(client):
     """
-    The main routine to handle all command line actions.
+    Wait condition for the password page of the login form.
 
     Arguments:
-        args: command line arguments
-        crawler: eduhub crawler object
+        client - webdriver client
 
+    Returns:
+        the password input field once it is shown, _LOGIN_ERROR if the
+            username was rejected, otherwise False
     """
-    results_df = None
 
-    if hasattr(args, "courses_action"):
-        if args.courses_action == CONST_ACTION_LIST:
-            success, error, results_df = crawler.get_courses_df()
-        else:
-            log("Unrecognised subaction. Skipping.", level=0)
+    if len(client.find_elements_by_id("usernameError")) != 0:
+        return _LOGIN_ERROR
 
-    elif hasattr(args, "handout_action"):
+    password_inputs = client.find_elements_by_xpath("//input[@name='passwd']")
 
-        if hasattr(args, "course_name"):
-            course_name = args.course_name
-        else:
-            course_name = None
+    if len(password_inputs) != 0 and password_inputs[0].is_displayed():
+        return password_inputs[0]
 
-        if hasattr(args, "lab_name"):
-            lab_name = args.lab_name
-        else:
-            lab_name = None
+    return False
 
-        if hasattr(args, "handout_name"):
-            handout_name = args.handout_name
-        else:
-            handout_name = None
 
-        if args.handout_action == CONST_ACTION_LIST:
-            # all courses
-            if course_name is None:
-                success, error, results_df = crawler.get_eduhub_details()
-            # specific course (optionally, specific lab, handout)
-            else:
-                success, error, results_df = crawler.get_course_details_df(
-                    course_name, lab_name, handout_name
-                )
+def _stay_signed_in_page(client):
+    """
+    Wait condition for the "stay signed in" page, which is shown once the
+        password has been accepted (and the MFA, if any, approved).
 
-        else:
-            log("Unrecognised subaction. Skipping.", level=0)
+    Arguments:
+        client - webdriver client
+
+    Returns:
+        the submit button of the page, _LOGIN_ERROR if the password was
+            rejected, otherwise False
+    """
+
+    if len(client.find_elements_by_id("passwordError")) != 0:
+        return _LOGIN_ERROR
+
+    # still waiting for the MFA approval
+    if len(client.find_elements_by_id("idDiv_SAOTCAS_Title")) != 0:
+        return False
+
+    # still on the password page
+    password_inputs = client.find_elements_by_xpath("//input[@name='passwd']")
 
-    elif hasattr(args, CONST_USAGE_ACTION):
-        success, error = crawler.download_usage()
+    if len(password_inputs) != 0 and password_inputs[0].is_displayed():
+        return False
 
-    else:
-        log("Unrecognised/unspecified action. Skipping.", level=0)
+    submit_buttons = client.find_elements_by_xpath("//input[@type='submit']")
 
-    return success, error, results_df
+    if len(submit_buttons) != 0 and submit_buttons[0].is_displayed():
+        return submit_buttons[0]
 
+    return False
 
-def _output_result(output, result):
+
+def _consumption_loaded(client, handout_list_table):
     """
-    Outputs result of the action (if any) in the chosen format.
+    Wait condition for the consumption data of the handout list table.
+
+    Arguments:
+        client - webdriver client
+        handout_list_table - handout list table element
 
-    Argument:
-        output: command line argument for output
-        result: result object of the previously taken action
     Returns:
-        success - flag if the action was succesful
-        error - error message
+        the handout grid (see grid.extract_grid) once none of the handouts
+            shows the "--" placeholder anymore, otherwise False
     """
 
-    success = True
-    error = None
+    handout_grid = extract_grid(
+        client, HANDOUT_ROW_SELECTOR, root=handout_list_table
+    )
 
-    if not isinstance(result, pd.DataFrame):
-        success = False
-        error = "Expecting result as pandas dataframe. Got %s" % (type(result))
-        log(error, level=0)
-        return success, error
+    for el_handout in handout_grid["rows"]:
+        if len(el_handout["cells"]) >= 6 and el_handout["cells"][4] == "--":
+            return False
 
-    if output == CONST_OUTPUT_TABLE:
-        print(
-            tabulate(result, headers="keys", tablefmt="psql", showindex=False)
-        )
+    return handout_grid
 
-    elif output == CONST_OUTPUT_CSV:
-        result.to_csv("%s.csv" % CONST_DEFAULT_OUTPUT_FILE_NAME)
 
-    elif output == CONST_OUTPUT_JSON:
-        result.to_json(
-            "%s.json" % CONST_DEFAULT_OUTPUT_FILE_NAME, orient="records"
-        )
+def _grid_scrolled(client, viewport, state):
+    """
+    Wait condition for the rows of a scrolled grid.
+
+    Arguments:
+        client - webdriver client
+        viewport - scrollable element of the grid
+        state - viewport state before the scroll (see grid.viewport_state)
+
+    Returns:
+        True once the grid renders other rows than before the scroll, or
+            its rendered rows fill the scrolled viewport, otherwise False
+    """
+
+    scrolled = viewport_state(client, viewport, HANDOUT_ROW_SELECTOR)
+
+    return scrolled["rows"] != state["rows"] or scrolled["covered"]
+
+
+def _grid_grown(client, viewport, state):
+    """
+    Wait condition for more rows at the bottom of a grid.
+
+    Arguments:
+        client - webdriver client
+        viewport - scrollable element of the grid
+        state - viewport state before the scroll (see grid.viewport_state)
+
+    Returns:
+        True once the grid's scroll position, content height or rendered
+            rows changed, otherwise False
+    """
+
+    grown = viewport_state(client, viewport, HANDOUT_ROW_SELECTOR)
+
+    return any(
+        grown[name] != state[name] for name in ["top", "height", "rows"]
+    )
 
-    else:
-        success = False
-        error = "Unrecognised type of output. Skipping."
-        log(error, level=0)
 
-    return success, error
+def _handout_details_loaded(client, handout_name):
+    """
+    Wait condition for the Handout details blade of a handout.
+
+    Arguments:
+        client - webdriver client
+        handout_name - handout name
+
+    Returns:
+        sub_name, sub_id, sub_status, sub_expiry_date, sub_user_email_list,
+            crawl_time_utc_dt once the blade of the handout is loaded,
+            otherwise False
+    """
+
+    crawl_time_utc_dt = datetime.utcnow()
+
+    sub_name = client.find_element_by_class_name(
+        "ext-classroom-handout-edit-subscription-name"
+    ).text
+
+    user_email_list = client.find_elements_by_class_name(
+        "ext-classroom-handout-edit-user-email"
+    )
+
+    if sub_name != handout_name or len(user_email_list) == 0:
+        return False
+
+    sub_id = client.find_element_by_class_name(
+        "ext-classroom-handout-edit-subscription-id"
+    ).text
+
+    sub_status = None
+    sub_expiry_date = None
+
+    sub_status_data = client.find_elements_by_class_name(
+        "ext-classroom-handout-edit-subscription-status-data"
+    )
+
+    if len(sub_status_data) == 2:
+        sub_status = sub_status_data[0].text
+        try:
+            sub_expiry_date = datetime.strptime(
+                sub_status_data[1].text, "%b %d, %Y"
+            ).strftime("%Y-%m-%d")
+        except Exception:
+            sub_expiry_date = ""
+
+    sub_user_email_list = [
+        user_email_li.text for user_email_li in user_email_list
+    ]
+
+    return (
+        sub_name,
+        sub_id,
+        sub_status,
+        sub_expiry_date,
+        sub_user_email_list,
+        crawl_time_utc_dt,
+    )
@@ -0,0 +1,97 @@
+"""
+Browser download module.
+"""
+
+import os
+from time import sleep, time
+
+from educrawler.utilities import log
+
+from educrawler.constants import (
+    CONST_TIMEOUT,
+    CONST_DOWNLOAD_TIMEOUT,
+    CONST_DOWNLOAD_POLL_TIME,
+    CONST_DOWNLOAD_SETTLE_TIME,
+)
+
+# files of the downloads still in progress
+_PARTIAL_SUFFIXES = (".crdownload", ".tmp", ".part")
+
+
+def wait_for_download(
+    directory,
+    start_timeout=CONST_TIMEOUT,
+    timeout=CONST_DOWNLOAD_TIMEOUT,
+):
+    """
+    Waits for a download into an empty directory to complete: a file is
+        there, Chrome's partial (.crdownload) file is gone and the file's
+        size has not changed for CONST_DOWNLOAD_SETTLE_TIME seconds.
+
+    Arguments:
+        directory - download directory, only used for this download
+        start_timeout - seconds for the download to start
+        timeout - seconds for the download to complete
+
+    Returns:
+        success - flag if the download completed
+        error - error message
+        file_path - path to the downloaded file
+    """
+
+    time_start = time()
+
+    file_path = None
+    size = None
+    time_settled = None
+
+    while True:
+        time_elapsed = time() - time_start
+
+        names = os.listdir(directory)
+
+        partial = [name for name in names if name.endswith(_PARTIAL_SUFFIXES)]
+        complete = [
+            name
+            for name in names
+            if not (name.endswith(_PARTIAL_SUFFIXES) or name.startswith("."))
+        ]
+
+        if len(names) == 0 and time_elapsed > start_timeout:
+            return (
+                False,
+                "The download did not start in %d seconds." % (start_timeout),
+                None,
+            )
+
+        if time_elapsed > timeout:
+            return (
+                False,
+                "The download did not complete in %d seconds." % (timeout),
+                None,
+            )
+
+        if len(partial) == 0 and len(complete) != 0:
+            current_path = os.path.join(directory, sorted(complete)[0])
+
+            try:
+                current_size = os.path.getsize(current_path)
+            except OSError:
+                current_size = None
+
+            if current_path != file_path or current_size != size:
+                file_path = current_path
+                size = current_size
+                time_settled = time()
+            elif time() - time_settled >= CONST_DOWNLOAD_SETTLE_TIME:
+                log(
+                    "Downloaded %s (%d bytes) in %.1f s."
+                    % (file_path, size, time_elapsed),
+                    level=2,
+                    indent=2,
+                )
+                return True, None, file_path
+        else:
+            file_path = None
+
+        sleep(CONST_DOWNLOAD_POLL_TIME)
@@ -0,0 +1,290 @@
+"""
+Chromedriver resolution module.
+
+Finds a chromedriver matching the installed Chrome without going online.
+    The drivers are pinned per Chrome major version in a small index
+    (CONST_DRIVER_INDEX_FILE) along with the Chrome version, which is only
+    read again from the browser when its executable has changed. A driver
+    is only downloaded (with webdriver_manager) when no pinned driver
+    matches the Chrome version. EC_CHROMEDRIVER skips the resolution.
+"""
+
+import os
+import re
+import sys
+import json
+import shutil
+import threading
+import subprocess
+
+from educrawler.utilities import log
+
+from educrawler.constants import (
+    CONST_CHROMEDRIVER,
+    CONST_DRIVER_INDEX_FILE,
+)
+
+# Chrome executables, in the order they are looked for
+_CHROME_EXECUTABLES = {
+    "linux": [
+        "google-chrome",
+        "google-chrome-stable",
+        "chromium",
+        "chromium-browser",
+    ],
+    "darwin": [
+        "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+        "/Applications/Chromium.app/Contents/MacOS/Chromium",
+    ],
+}
+
+_CHROME_REGISTRY_KEYS = [
+    r"HKEY_CURRENT_USER\Software\Google\Chrome\BLBeacon",
+    r"HKEY_LOCAL_MACHINE\Software\Google\Chrome\BLBeacon",
+]
+
+_VERSION_PATTERN = re.compile(r"(\d+)\.\d+\.\d+(\.\d+)?")
+
+_lock = threading.Lock()
+
+# driver resolved by this process, shared by its browsers
+_resolved = None
+
+
+def resolve_chromedriver():
+    """
+    Finds the chromedriver to start Chrome with, downloading one only if
+        none of the pinned drivers matches the installed Chrome.
+
+    Returns:
+        success - flag if a driver was found
+        error - error message
+        driver_path - path to the chromedriver executable
+    """
+
+    global _resolved
+
+    if CONST_CHROMEDRIVER is not None:
+        return True, None, CONST_CHROMEDRIVER
+
+    with _lock:
+        if _resolved is None:
+            success, error, driver_path = _resolve()
+
+            if not success:
+                log(error, level=0)
+                return success, error, None
+
+            _resolved = driver_path
+
+    return True, None, _resolved
+
+
+def _resolve():
+    """
+    Looks the driver up in the index, downloading it if needed.
+
+    """
+
+    index = _load_index()
+    chrome = index.get("chrome")
+
+    chrome_version = _chrome_version(index)
+    drivers = index.setdefault("drivers", {})
+
+    if chrome_version is None:
+        log("Could not find the version of Chrome.", level=1)
+        major = index.get("chrome", {}).get("major")
+    else:
+        major = chrome_version.split(".")[0]
+
+    driver_path = drivers.get(major)
+
+    if driver_path is not None and os.access(driver_path, os.X_OK):
+        log(
+            "Using chromedriver %s (Chrome %s)." % (driver_path, major),
+            level=3,
+        )
+
+        if index.get("chrome") != chrome:
+            _save_index(index)
+
+        return True, None, driver_path
+
+    log("Getting a chromedriver for Chrome %s." % (major or "--"), level=1)
+
+    # only loaded for a download, it is slow to import
+    try:
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        driver_path = ChromeDriverManager().install()
+    except Exception as exception:
+        return (
+            False,
+            "Could not get a chromedriver for Chrome %s: %s. Set "
+            % (major or "--", exception)
+            + "EC_CHROMEDRIVER to the path of a matching chromedriver.",
+            None,
+        )
+
+    # without the Chrome version, the driver is pinned as the driver for
+    #   Chrome of its own version
+    if major is None:
+        match = _VERSION_PATTERN.search(driver_path)
+
+        if match is not None:
+            major = match.group(1)
+            index.setdefault("chrome", {})["major"] = major
+
+    if major is None:
+        log(
+            "Could not tell the version of Chrome or of %s, it will be "
+            % (driver_path)
+            + "downloaded again next time. Set EC_CHROMEDRIVER to its "
+            + "path to reuse it.",
+            level=0,
+        )
+    else:
+        drivers[major] = driver_path
+        _save_index(index)
+
+    return True, None, driver_path
+
+
+def _chrome_version(index):
+    """
+    Gets the version of the installed Chrome. The version in the index is
+        reused while the Chrome executable is unchanged.
+
+    Arguments:
+        index - driver index, its Chrome entry is updated
+
+    Returns:
+        version - Chrome version, None if Chrome was not found
+    """
+
+    if sys.platform.startswith("win"):
+        return _registry_chrome_version()
+
+    executable = _chrome_executable()
+
+    if executable is None:
+        return None
+
+    try:
+        modified = os.path.getmtime(executable)
+    except OSError:
+        return None
+
+    chrome = index.get("chrome", {})
+
+    if chrome.get("path") == executable and chrome.get("mtime") == modified:
+        return chrome["version"]
+
+    try:
+        output = subprocess.check_output(
+            [executable, "--version"],
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+            timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+    match = _VERSION_PATTERN.search(output)
+
+    if match is None:
+        return None
+
+    index["chrome"] = {
+        "path": executable,
+        "mtime": modified,
+        "version": match.group(0),
+        "major": match.group(1),
+    }
+
+    return match.group(0)
+
+
+def _chrome_executable():
+    """
+    Path to the Chrome executable, None if it is not found.
+
+    """
+
+    platform = "darwin" if sys.platform == "darwin" else "linux"
+
+    for name in _CHROME_EXECUTABLES[platform]:
+        path = shutil.which(name) if not os.path.isabs(name) else name
+
+        if path is not None and os.path.isfile(path):
+            # the versioned executable behind e.g. /usr/bin/google-chrome
+            return os.path.realpath(path)
+
+    return None
+
+
+def _registry_chrome_version():
+    """
+    Version of Chrome in the Windows registry, None if it is not found.
+
+    """
+
+    for key in _CHROME_REGISTRY_KEYS:
+        try:
+            output = subprocess.check_output(
+                ["reg", "query", key, "/v", "version"],
+                stderr=subprocess.DEVNULL,
+                universal_newlines=True,
+                timeout=10,
+            )
+        except (OSError, subprocess.SubprocessError):
+            continue
+
+        match = _VERSION_PATTERN.search(output)
+
+        if match is not None:
+            return match.group(0)
+
+    return None
+
+
+def _load_index():
+    """
+    Loads the driver index, an empty one if it does not exist or can not be
+        read.
+
+    """
+
+    if not os.path.isfile(CONST_DRIVER_INDEX_FILE):
+        return {}
+
+    try:
+        with open(CONST_DRIVER_INDEX_FILE, "r") as index_file:
+            return json.load(index_file)
+    except (OSError, ValueError):
+        log("Could not read the chromedriver index, ignoring it.", level=1)
+        return {}
+
+
+def _save_index(index):
+    """
+    Writes the driver index. The file is replaced at once, so that the
+        processes starting at the same time never read half of it.
+
+    """
+
+    temp_path = "%s.%d" % (CONST_DRIVER_INDEX_FILE, os.getpid())
+
+    try:
+        os.makedirs(os.path.dirname(CONST_DRIVER_INDEX_FILE), exist_ok=True)
+
+        with open(temp_path, "w") as index_file:
+            json.dump(index, index_file)
+
+        os.replace(temp_path, CONST_DRIVER_INDEX_FILE)
+    except OSError as exception:
+        log(
+            "Could not write the chromedriver index: %s" % (exception),
+            level=1,
+        )
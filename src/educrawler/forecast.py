@@ -0,0 +1,138 @@
+"""
+Budget forecast module.
+
+Forecasts when the handouts run out of budget from their snapshots in the
+    history store (see history.py). The spend rate of a subscription is its
+    consumption over the time between its consecutive snapshots, a drop in
+    the consumption (e.g. a reset handout) counting as no spend. The
+    remaining budget at the spend rate gives the exhaustion date, which is
+    compared to the subscription's expiry date.
+
+All the subscriptions are forecast at once, a column at a time, with pandas.
+"""
+
+from educrawler.constants import CONST_FORECAST_COLUMNS
+
+# Julian day of the unix epoch
+_EPOCH_JULIAN_DAY = 2440587.5
+
+# days since the unix epoch of the last date pandas represents, a budget
+#   lasting longer has no exhaustion date
+_MAX_EPOCH_DAYS = 106751
+
+
+def forecast_df(consumption_df, latest_df):
+    """
+    Forecasts the budget exhaustion of the subscriptions.
+
+    Arguments:
+        consumption_df - consumption of the subscriptions at each snapshot
+            (see HistoryStore.get_consumption_df)
+        latest_df - last snapshot of each subscription (see
+            HistoryStore.get_latest_df)
+
+    Returns:
+        forecast dataframe (see CONST_FORECAST_COLUMNS), the subscriptions
+            running out of budget before they expire first, the soonest
+            first
+    """
+
+    import pandas as pd
+
+    consumption_df = consumption_df.sort_values(
+        ["subscription_id", "crawl_day"], ignore_index=True
+    )
+
+    subscriptions = consumption_df.groupby("subscription_id", sort=False)
+
+    # spend and days between the consecutive snapshots
+    totals = pd.DataFrame(
+        {
+            "subscription_id": consumption_df["subscription_id"],
+            "spend": subscriptions["consumed_cents"].diff().clip(lower=0),
+            "days": subscriptions["crawl_day"].diff(),
+        }
+    ).groupby("subscription_id", sort=False)[["spend", "days"]].sum()
+
+    last = latest_df.set_index("subscription_id")
+    totals = totals.reindex(last.index)
+
+    rate = totals["spend"] / totals["days"].where(totals["days"] > 0)
+
+    remaining = (last["budget_cents"] - last["consumed_cents"]).clip(lower=0)
+
+    days_left = (remaining / rate.where(rate > 0)).where(remaining > 0, 0.0)
+
+    epoch_days = last["crawl_day"] + days_left - _EPOCH_JULIAN_DAY
+    exhaustion = pd.to_datetime(
+        epoch_days.where(epoch_days < _MAX_EPOCH_DAYS), unit="D"
+    )
+    expiry = pd.to_datetime(last["expiry_date"], errors="coerce")
+
+    # without an expiry date, any exhaustion comes before it
+    before_expiry = exhaustion.notna() & (
+        expiry.isna() | (exhaustion < expiry)
+    )
+
+    result = pd.DataFrame(
+        {
+            CONST_FORECAST_COLUMNS[0]: last.index,
+            CONST_FORECAST_COLUMNS[1]: last["course_name"],
+            CONST_FORECAST_COLUMNS[2]: last["lab_name"],
+            CONST_FORECAST_COLUMNS[3]: last["handout_name"],
+            CONST_FORECAST_COLUMNS[4]: last["budget_cents"].astype("Int64"),
+            CONST_FORECAST_COLUMNS[5]: last["consumed_cents"].astype("Int64"),
+            CONST_FORECAST_COLUMNS[6]: remaining.astype("Int64"),
+            CONST_FORECAST_COLUMNS[7]: rate.round().astype("Int64"),
+            CONST_FORECAST_COLUMNS[8]: days_left.round(1),
+            CONST_FORECAST_COLUMNS[9]: exhaustion.dt.floor("D"),
+            CONST_FORECAST_COLUMNS[10]: expiry,
+            CONST_FORECAST_COLUMNS[11]: before_expiry,
+        }
+    )
+
+    return result.sort_values(
+        [CONST_FORECAST_COLUMNS[11], CONST_FORECAST_COLUMNS[8]],
+        ascending=[False, True],
+        na_position="last",
+        ignore_index=True,
+    )
+
+
+def iter_forecast(store, since=None, course_name=None, limit=None):
+    """
+    Yields the budget forecast of the subscriptions in the history store.
+
+    Arguments:
+        store - history store (see history.HistoryStore)
+        since - only use the snapshots crawled since (datetime, UTC,
+            optional)
+        course_name - only the subscriptions of a course (optional)
+        limit - number of subscriptions (optional)
+
+    Yields:
+        forecast records (see CONST_FORECAST_COLUMNS), the missing values
+            are None and the dates are dates
+    Returns:
+        success - flag if the action was succesful
+        error - error message
+    """
+
+    result_df = forecast_df(
+        store.get_consumption_df(since=since, course_name=course_name),
+        store.get_latest_df(since=since, course_name=course_name),
+    )
+
+    if limit is not None:
+        result_df = result_df.head(limit)
+
+    for column in CONST_FORECAST_COLUMNS[9:11]:
+        result_df[column] = result_df[column].dt.date
+
+    # plain python values for the writers
+    result_df = result_df.astype(object).where(result_df.notna(), None)
+
+    for record in result_df.values.tolist():
+        yield record
+
+    return True, None
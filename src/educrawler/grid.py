@@ -0,0 +1,218 @@
+"""
+Bulk grid extraction module.
+
+The portal's grids are read with a single script call per grid instead of
+    a webdriver round trip per row and cell.
+
+The grids are virtualized: only the rows around the visible part of a grid
+    are in the page. A long grid is read a page at a time, scrolling its
+    viewport in between (see find_viewport and scroll_viewport).
+"""
+
+_GRID_SCRIPT = """
+var root = arguments[0] || document;
+var rows = root.querySelectorAll(arguments[1]);
+var result = {rows: []};
+
+for (var i = 0; i < rows.length; i++) {
+    var cells = rows[i].getElementsByClassName("azc-grid-cellContent");
+    var links = rows[i].getElementsByClassName("ext-grid-clickable-link");
+    var row = {cells: [], handle: null, links: [], link_texts: []};
+
+    for (var j = 0; j < cells.length; j++) {
+        row.cells.push(cells[j].innerText.trim());
+    }
+    if (cells.length !== 0) {
+        row.handle = cells[0];
+    }
+    for (var k = 0; k < links.length; k++) {
+        row.links.push(links[k]);
+        row.link_texts.push(links[k].innerText.trim());
+    }
+
+    result.rows.push(row);
+}
+
+return result;
+"""
+
+_LINKS_SCRIPT = """
+var root = arguments[0] || document;
+var links = root.getElementsByClassName(arguments[1]);
+var result = [];
+
+for (var i = 0; i < links.length; i++) {
+    result.push([links[i].innerText.trim(), links[i]]);
+}
+
+return result;
+"""
+
+# the scrollable element of a grid: the first of its descendants or, if
+#   the grid itself does not scroll, of its ancestors with scrolled content
+_VIEWPORT_SCRIPT = """
+var root = arguments[0];
+
+function scrollable(element) {
+    var overflow = window.getComputedStyle(element).overflowY;
+    return (overflow === "auto" || overflow === "scroll")
+        && element.scrollHeight > element.clientHeight;
+}
+
+var viewport = null;
+var elements = root.getElementsByTagName("*");
+
+for (var i = 0; i < elements.length && viewport === null; i++) {
+    if (scrollable(elements[i])) {
+        viewport = elements[i];
+    }
+}
+for (var parent = root.parentElement; parent !== null && viewport === null;
+        parent = parent.parentElement) {
+    if (scrollable(parent)) {
+        viewport = parent;
+    }
+}
+if (viewport !== null) {
+    viewport.scrollTop = 0;
+}
+
+return viewport;
+"""
+
+_SCROLL_SCRIPT = """
+var viewport = arguments[0];
+var top = viewport.scrollTop;
+
+viewport.scrollTop = top + Math.max(1, viewport.clientHeight * arguments[1]);
+
+return viewport.scrollTop !== top;
+"""
+
+# what the viewport of a grid shows: its scroll position and content
+#   height, the names (first link texts) of the rendered rows and if they
+#   cover the visible part of the viewport
+_VIEWPORT_STATE_SCRIPT = """
+var viewport = arguments[0];
+var rows = viewport.querySelectorAll(arguments[1]);
+var bounds = viewport.getBoundingClientRect();
+var state = {
+    top: viewport.scrollTop,
+    height: viewport.scrollHeight,
+    rows: [],
+    covered: false
+};
+
+for (var i = 0; i < rows.length; i++) {
+    var links = rows[i].getElementsByClassName("ext-grid-clickable-link");
+    state.rows.push(links.length !== 0 ? links[0].innerText.trim() : "");
+}
+if (rows.length !== 0) {
+    var first = rows[0].getBoundingClientRect();
+    var last = rows[rows.length - 1].getBoundingClientRect();
+    var bottom = Math.min(
+        bounds.bottom,
+        bounds.top + viewport.scrollHeight - viewport.scrollTop
+    );
+
+    state.covered = first.top <= bounds.top + 1
+        && last.bottom >= bottom - 1;
+}
+
+return state;
+"""
+
+COURSE_ROW_SELECTOR = ".fxs-portal-hover.fxs-portal-focus.azc-grid-row"
+HANDOUT_ROW_SELECTOR = ".azc-grid-row"
+
+
+def extract_grid(client, row_selector, root=None):
+    """
+    Reads all the rows of a grid in one script call.
+
+    Arguments:
+        client - webdriver client
+        row_selector - css selector of the grid rows
+        root - element to look for the rows in (optional, default: document)
+
+    Returns:
+        grid - dictionary with a "rows" list. Each row is a dictionary with
+            "cells" (texts of the cells), "handle" (the first cell element),
+            "links" (clickable link elements) and "link_texts" (their texts)
+    """
+
+    return client.execute_script(_GRID_SCRIPT, root, row_selector)
+
+
+def extract_links(client, link_class, root=None):
+    """
+    Reads all the links of a given class in one script call.
+
+    Arguments:
+        client - webdriver client
+        link_class - class name of the links
+        root - element to look for the links in (optional, default: document)
+
+    Returns:
+        links - a list of (text, element) pairs
+    """
+
+    return [
+        (text, element)
+        for text, element in client.execute_script(
+            _LINKS_SCRIPT, root, link_class
+        )
+    ]
+
+
+def find_viewport(client, root):
+    """
+    Finds the scrollable element of a grid and scrolls it to the top.
+
+    Arguments:
+        client - webdriver client
+        root - grid element
+
+    Returns:
+        viewport - the scrollable element, None if the grid does not scroll
+            (all its rows are shown)
+    """
+
+    return client.execute_script(_VIEWPORT_SCRIPT, root)
+
+
+def scroll_viewport(client, viewport, step):
+    """
+    Scrolls the viewport of a grid down.
+
+    Arguments:
+        client - webdriver client
+        viewport - scrollable element of the grid (see find_viewport)
+        step - fraction of the viewport's height to scroll by
+
+    Returns:
+        moved - False if the viewport was already scrolled to the bottom
+    """
+
+    return client.execute_script(_SCROLL_SCRIPT, viewport, step)
+
+
+def viewport_state(client, viewport, row_selector):
+    """
+    Reads what the viewport of a grid shows, to tell when a scroll has
+        been rendered.
+
+    Arguments:
+        client - webdriver client
+        viewport - scrollable element of the grid (see find_viewport)
+        row_selector - css selector of the grid rows
+
+    Returns:
+        state - dictionary with "top" (scroll position), "height" (content
+            height), "rows" (names of the rendered rows) and "covered" (if
+            the rendered rows fill the visible part of the viewport)
+    """
+
+    return client.execute_script(
+        _VIEWPORT_STATE_SCRIPT, viewport, row_selector
+    )
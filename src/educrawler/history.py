@@ -0,0 +1,377 @@
+"""
+Handout history module.
+
+Keeps the handout records of every `handout list` run in a local SQLite
+    database, one snapshot of each handout per crawl, so that the
+    consumption of the subscriptions over time can be queried without
+    crawling the portal again. The amounts are kept in cents (see
+    records.HandoutRecord).
+"""
+
+import os
+import sqlite3
+import itertools
+
+from educrawler.utilities import log
+from educrawler.records import HandoutRecord
+
+from educrawler.constants import CONST_TIMEOUT, CONST_TIME_FORMAT
+
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS snapshots (
+        crawl_time TEXT NOT NULL,
+        course_name TEXT NOT NULL,
+        lab_name TEXT NOT NULL,
+        handout_name TEXT NOT NULL,
+        budget_cents INTEGER,
+        consumed_cents INTEGER,
+        status TEXT,
+        subscription_name TEXT,
+        subscription_id TEXT,
+        subscription_status TEXT,
+        expiry_date TEXT,
+        PRIMARY KEY (course_name, lab_name, handout_name, crawl_time)
+    )""",
+    """CREATE INDEX IF NOT EXISTS snapshots_subscription
+        ON snapshots (subscription_id, crawl_time)""",
+    """CREATE INDEX IF NOT EXISTS snapshots_time
+        ON snapshots (crawl_time)""",
+]
+
+# the consumption of each subscription at its first and last snapshot
+#   since a time
+_BURNERS_QUERY = """
+    SELECT
+        last.subscription_id,
+        last.course_name,
+        last.lab_name,
+        last.handout_name,
+        last.budget_cents,
+        last.consumed_cents,
+        last.consumed_cents - first.consumed_cents AS burn_cents,
+        CASE WHEN julianday(times.last_time) > julianday(times.first_time)
+            THEN (last.consumed_cents - first.consumed_cents)
+                / (julianday(times.last_time) - julianday(times.first_time))
+        END,
+        times.first_time,
+        times.last_time
+    FROM (
+        SELECT
+            subscription_id,
+            MIN(crawl_time) AS first_time,
+            MAX(crawl_time) AS last_time
+        FROM snapshots
+        WHERE crawl_time >= ? AND subscription_id IS NOT NULL
+        GROUP BY subscription_id
+    ) AS times
+    JOIN snapshots AS first
+        ON first.subscription_id = times.subscription_id
+        AND first.crawl_time = times.first_time
+    JOIN snapshots AS last
+        ON last.subscription_id = times.subscription_id
+        AND last.crawl_time = times.last_time
+    ORDER BY burn_cents DESC
+    LIMIT ?
+"""
+
+
+class HistoryStore:
+    """
+    SQLite store of the handout snapshots.
+
+    """
+
+    def __init__(self, file_path):
+        """
+        Opens the store, creating it if it does not exist.
+
+        Arguments:
+            file_path - path to the SQLite database
+        """
+
+        self.file_path = file_path
+        # snapshots added since the store was opened, written when closed
+        self.snapshots = []
+
+        directory = os.path.dirname(file_path)
+
+        if len(directory) != 0:
+            os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(file_path, timeout=CONST_TIMEOUT)
+
+        for statement in _SCHEMA:
+            self.connection.execute(statement)
+
+        self.connection.commit()
+
+    def append(self, record):
+        """
+        Adds the snapshot of a handout. The snapshots are written together
+            when the store is closed, so that the concurrent crawls of a
+            server do not wait for each other. A snapshot of the same
+            handout and crawl time (e.g. of a resumed crawl) replaces the
+            earlier one.
+
+        Arguments:
+            record - handout record (see CONST_HANDOUT_COLUMNS)
+        """
+
+        handout = HandoutRecord.from_list(record)
+
+        if handout.crawl_time is None:
+            return
+
+        self.snapshots.append(
+            (
+                handout.crawl_time.strftime(CONST_TIME_FORMAT),
+                handout.course_name,
+                handout.lab_name,
+                handout.handout_name,
+                handout.budget_cents,
+                handout.consumed_cents,
+                handout.status,
+                handout.subscription_name,
+                handout.subscription_id,
+                handout.subscription_status,
+                None
+                if handout.expiry_date is None
+                else handout.expiry_date.isoformat(),
+            )
+        )
+
+    def close(self):
+        """
+        Writes the added snapshots and closes the store.
+
+        """
+
+        if len(self.snapshots) != 0:
+            with self.connection:
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO snapshots VALUES "
+                    + "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    self.snapshots,
+                )
+
+            log(
+                "Added %d handout snapshots to the history."
+                % (len(self.snapshots)),
+                level=2,
+            )
+
+            self.snapshots = []
+
+        self.connection.close()
+
+    def iter_snapshots(
+        self, subscription_id=None, course_name=None, since=None
+    ):
+        """
+        Yields the handout snapshots, oldest first.
+
+        Arguments:
+            subscription_id - only the snapshots of a subscription (optional)
+            course_name - only the snapshots of a course (optional)
+            since - only the snapshots crawled since (datetime, UTC,
+                optional)
+
+        Yields:
+            snapshot records (see CONST_HISTORY_COLUMNS)
+        Returns:
+            success - flag if the action was succesful
+            error - error message
+        """
+
+        conditions = []
+        parameters = []
+
+        if subscription_id is not None:
+            conditions.append("subscription_id = ?")
+            parameters.append(subscription_id)
+
+        if course_name is not None:
+            conditions.append("course_name = ?")
+            parameters.append(course_name)
+
+        if since is not None:
+            conditions.append("crawl_time >= ?")
+            parameters.append(since.strftime(CONST_TIME_FORMAT))
+
+        query = (
+            "SELECT crawl_time, course_name, lab_name, handout_name, "
+            + "subscription_id, budget_cents, consumed_cents, status, "
+            + "subscription_status FROM snapshots"
+        )
+
+        if len(conditions) != 0:
+            query += " WHERE " + " AND ".join(conditions)
+
+        query += " ORDER BY crawl_time, course_name, lab_name, handout_name"
+
+        for record in self.connection.execute(query, parameters):
+            yield list(record)
+
+        return True, None
+
+    def get_consumption_df(self, since=None, course_name=None):
+        """
+        Gets the consumption of the subscriptions at each snapshot as a
+            pandas dataframe, sorted by subscription and crawl time. The
+            crawl times are Julian days, numbers which need no parsing. The
+            snapshots without a consumption are left out.
+
+        The snapshots are read as columns of numbers, the subscription ids
+            once per subscription, not as a Python tuple per snapshot.
+
+        Arguments:
+            since - only the snapshots crawled since (datetime, UTC,
+                optional)
+            course_name - only the snapshots of a course (optional)
+
+        Returns:
+            dataframe of subscription_id, crawl_day, consumed_cents
+        """
+
+        import numpy as np
+        import pandas as pd
+
+        conditions, parameters = _snapshot_conditions(since, course_name)
+        conditions.append("consumed_cents IS NOT NULL")
+        where = " AND ".join(conditions)
+
+        # the counts and the snapshots of the same state of the store
+        self.connection.execute("BEGIN")
+
+        try:
+            counts = self.connection.execute(
+                "SELECT subscription_id, COUNT(*) FROM snapshots WHERE "
+                + where
+                + " GROUP BY subscription_id ORDER BY subscription_id",
+                parameters,
+            ).fetchall()
+
+            cursor = self.connection.execute(
+                "SELECT julianday(crawl_time), consumed_cents "
+                + "FROM snapshots WHERE "
+                + where
+                + " ORDER BY subscription_id, crawl_time",
+                parameters,
+            )
+
+            total = sum(count for _, count in counts)
+
+            values = np.fromiter(
+                itertools.chain.from_iterable(cursor),
+                dtype=float,
+                count=2 * total,
+            ).reshape(total, 2)
+        finally:
+            self.connection.commit()
+
+        subscription_ids = np.array(
+            [subscription_id for subscription_id, _ in counts], dtype=object
+        )
+
+        return pd.DataFrame(
+            {
+                "subscription_id": np.repeat(
+                    subscription_ids, [count for _, count in counts]
+                ),
+                "crawl_day": values[:, 0],
+                "consumed_cents": values[:, 1],
+            }
+        )
+
+    def get_latest_df(self, since=None, course_name=None):
+        """
+        Gets the last snapshot of each subscription as a pandas dataframe.
+
+        Arguments:
+            since - only the snapshots crawled since (datetime, UTC,
+                optional)
+            course_name - only the snapshots of a course (optional)
+
+        Returns:
+            dataframe of the snapshots, one per subscription, with the
+                columns of the snapshots table and crawl_day (see
+                get_consumption_df)
+        """
+
+        import pandas as pd
+
+        conditions, parameters = _snapshot_conditions(since, course_name)
+
+        cursor = self.connection.execute(
+            "SELECT snapshots.*, julianday(snapshots.crawl_time) "
+            + "FROM snapshots JOIN ("
+            + "SELECT subscription_id, MAX(crawl_time) AS last_time "
+            + "FROM snapshots WHERE "
+            + " AND ".join(conditions)
+            + " GROUP BY subscription_id) AS times "
+            + "ON snapshots.subscription_id = times.subscription_id "
+            + "AND snapshots.crawl_time = times.last_time",
+            parameters,
+        )
+
+        latest_df = pd.DataFrame.from_records(
+            cursor.fetchall(),
+            columns=[column[0] for column in cursor.description[:-1]]
+            + ["crawl_day"],
+        )
+
+        # the handouts sharing a subscription have the same consumption
+        return latest_df.drop_duplicates(
+            subset="subscription_id", ignore_index=True
+        )
+
+    def iter_top_burners(self, since, limit):
+        """
+        Yields the subscriptions which consumed the most since a time: the
+            difference in their consumption between their first and last
+            snapshot since then.
+
+        Arguments:
+            since - start of the period (datetime, UTC)
+            limit - number of subscriptions
+
+        Yields:
+            burner records (see CONST_BURNER_COLUMNS)
+        Returns:
+            success - flag if the action was succesful
+            error - error message
+        """
+
+        for record in self.connection.execute(
+            _BURNERS_QUERY, (since.strftime(CONST_TIME_FORMAT), limit)
+        ):
+            record = list(record)
+
+            # cents per day
+            if record[7] is not None:
+                record[7] = int(round(record[7]))
+
+            yield record
+
+        return True, None
+
+
+def _snapshot_conditions(since, course_name):
+    """
+    SQL conditions (and their parameters) selecting the snapshots of the
+        subscriptions crawled since a time, of a course.
+
+    """
+
+    conditions = ["subscription_id IS NOT NULL"]
+    parameters = []
+
+    if since is not None:
+        conditions.append("crawl_time >= ?")
+        parameters.append(since.strftime(CONST_TIME_FORMAT))
+
+    if course_name is not None:
+        conditions.append("course_name = ?")
+        parameters.append(course_name)
+
+    return conditions, parameters
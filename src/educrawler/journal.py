@@ -0,0 +1,240 @@
+"""
+Crawl journal module.
+"""
+
+import os
+import json
+import threading
+from collections import OrderedDict
+
+from educrawler.utilities import log, to_json_value, parse_time
+
+
+class CrawlJournal:
+    """
+    Append-only journal of the handouts, labs and courses completed by a
+        crawl, used to resume the crawl after it has failed.
+
+    Each completed unit is appended to the journal file as a JSON line and
+        flushed to the disk before the crawl moves on, so the journal holds
+        everything crawled up to a failure (or a crash). A line cut short
+        by a crash is ignored when the journal is loaded.
+    """
+
+    def __init__(self, file_path, resume=False):
+        """
+        Opens the journal, either continuing the existing one or starting
+            a new one.
+
+        Arguments:
+            file_path - path to the journal file
+            resume - flag to continue the existing journal (if any)
+        """
+
+        self.file_path = file_path
+        self.lock = threading.Lock()
+
+        self.handouts = OrderedDict()
+        self.labs = set()
+        self.courses = set()
+
+        if resume and os.path.isfile(file_path):
+            self._load()
+
+            log(
+                "Resuming the crawl (%d handouts, %d labs, %d courses done)."
+                % (len(self.handouts), len(self.labs), len(self.courses)),
+                level=1,
+            )
+
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        self.file = open(file_path, "a" if resume else "w")
+
+        # a line cut short by a crash is ended, not to be continued
+        if self.file.tell() > 0 and not _ends_with_newline(file_path):
+            self.file.write("\n")
+
+    def _load(self):
+        """
+        Reads the entries of the journal file.
+
+        """
+
+        with open(self.file_path, "r") as journal_file:
+            for line in journal_file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+
+                if "handout" in entry:
+                    record = entry["handout"]
+                    record[-1] = parse_time(record[-1])
+
+                    self.handouts[_key(*record[:3])] = record
+
+                elif "lab" in entry:
+                    self.labs.add(_key(*entry["lab"]))
+
+                elif "course" in entry:
+                    self.courses.add(entry["course"])
+
+    def _append(self, entry):
+        """
+        Appends an entry to the journal file and flushes it to the disk.
+
+        """
+
+        line = json.dumps(entry, default=to_json_value)
+
+        with self.lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def add_handout(self, record):
+        """
+        Records a completed handout.
+
+        Arguments:
+            record - handout record (see CONST_HANDOUT_COLUMNS)
+        """
+
+        with self.lock:
+            self.handouts[_key(*record[:3])] = list(record)
+
+        self._append({"handout": record})
+
+    def complete_lab(self, course_name, lab_name):
+        """
+        Records that all the handouts of a lab are completed.
+
+        Arguments:
+            course_name - name of the course
+            lab_name - name of the lab
+        """
+
+        with self.lock:
+            self.labs.add(_key(course_name, lab_name))
+
+        self._append({"lab": [course_name, lab_name]})
+
+    def complete_course(self, course_name):
+        """
+        Records that all the labs of a course are completed.
+
+        Arguments:
+            course_name - name of the course
+        """
+
+        with self.lock:
+            self.courses.add(course_name)
+
+        self._append({"course": course_name})
+
+    def get_handout_record(self, course_name, lab_name, handout_name):
+        """
+        Gets the record of a completed handout.
+
+        Arguments:
+            course_name - name of the course
+            lab_name - name of the lab
+            handout_name - name of the handout
+
+        Returns:
+            record - handout record, None if the handout is not completed
+        """
+
+        with self.lock:
+            return self.handouts.get(
+                _key(course_name, lab_name, handout_name)
+            )
+
+    def get_lab_records(self, course_name, lab_name):
+        """
+        Gets the handout records of a completed lab.
+
+        Arguments:
+            course_name - name of the course
+            lab_name - name of the lab
+
+        Returns:
+            lab_records - handout records, None if the lab is not completed
+        """
+
+        lab_key = _key(course_name, lab_name)
+
+        with self.lock:
+            if lab_key not in self.labs:
+                return None
+
+            return [
+                record
+                for key, record in self.handouts.items()
+                if key[:2] == lab_key
+            ]
+
+    def get_course_records(self, course_name):
+        """
+        Gets the handout records of a completed course.
+
+        Arguments:
+            course_name - name of the course
+
+        Returns:
+            course_records - handout records, None if the course is not
+                completed
+        """
+
+        with self.lock:
+            if course_name not in self.courses:
+                return None
+
+            return [
+                record
+                for key, record in self.handouts.items()
+                if key[0] == course_name
+            ]
+
+    def close(self, completed=False):
+        """
+        Closes the journal. The journal of a completed crawl is removed, as
+            there is nothing left to resume.
+
+        Arguments:
+            completed - flag if the crawl has completed
+        """
+
+        self.file.close()
+
+        if completed:
+            os.remove(self.file_path)
+        else:
+            log(
+                "The crawl journal is kept in %s, use --resume to continue."
+                % (self.file_path),
+                level=1,
+            )
+
+
+def _key(*names):
+    """
+    Journal key of a lab or handout: a tuple of the names, as the names
+        themselves may contain any separator.
+
+    """
+
+    return tuple(names)
+
+
+def _ends_with_newline(file_path):
+    """
+    Checks if a (non-empty) file ends with a new line.
+
+    """
+
+    with open(file_path, "rb") as journal_file:
+        journal_file.seek(-1, os.SEEK_END)
+
+        return journal_file.read(1) == b"\n"
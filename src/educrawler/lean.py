@@ -0,0 +1,179 @@
+"""
+Lean browser module.
+
+The lean mode (EC_LEAN) starts Chrome without the features the crawler never
+    uses and blocks the requests the portal's blades do not need to be read
+    (images, fonts, media and telemetry) with the DevTools protocol. The
+    blocked URL patterns are CONST_LEAN_BLOCKED_URLS, extended with
+    EC_LEAN_BLOCK and reduced by EC_LEAN_ALLOW.
+
+The browser's requests can be counted from its performance log (see
+    NetworkStats), to compare the page weight with and without the mode.
+"""
+
+import json
+
+from educrawler.utilities import log
+
+from educrawler.constants import (
+    CONST_LEAN_BLOCKED_URLS,
+    CONST_LEAN_BLOCK,
+    CONST_LEAN_ALLOW,
+    CONST_LEAN_ARGUMENTS,
+    CONST_LEAN_PREFS,
+)
+
+
+def blocked_urls():
+    """
+    URL patterns of the requests blocked in the lean mode.
+
+    """
+
+    return [
+        pattern
+        for pattern in CONST_LEAN_BLOCKED_URLS + CONST_LEAN_BLOCK
+        if pattern not in CONST_LEAN_ALLOW
+    ]
+
+
+def add_options(options, prefs):
+    """
+    Adds the lean mode's arguments and preferences to the Chrome options.
+
+    Arguments:
+        options - Chrome options
+        prefs - Chrome preferences, set on the options by the caller
+    """
+
+    for argument in CONST_LEAN_ARGUMENTS:
+        options.add_argument(argument)
+
+    prefs.update(CONST_LEAN_PREFS)
+
+
+def block_requests(client):
+    """
+    Starts blocking the requests of the lean mode.
+
+    Arguments:
+        client - webdriver client
+    """
+
+    urls = blocked_urls()
+
+    client.execute_cdp_cmd("Network.enable", {})
+    client.execute_cdp_cmd("Network.setBlockedURLs", {"urls": urls})
+
+    log("Blocking %d URL patterns." % (len(urls)), level=2)
+
+
+class NetworkStats:
+    """
+    Counts the requests a browser loaded and the requests it blocked, by
+        resource type, from its performance log.
+
+    The blocked requests are never sent, so their size is not known. The
+        bytes they save show as the difference in the loaded bytes with and
+        without the lean mode.
+    """
+
+    def __init__(self):
+        # request id -> resource type, of the requests still loading
+        self.types = {}
+        # resource type -> [count, bytes]
+        self.loaded = {}
+        # resource type -> count
+        self.blocked = {}
+
+    def collect(self, client):
+        """
+        Reads the network events logged since the last call. The log is
+            read regularly, so that the browser does not keep it.
+
+        Arguments:
+            client - webdriver client created with performance logging
+        """
+
+        for entry in client.get_log("performance"):
+            message = json.loads(entry["message"])["message"]
+            params = message.get("params", {})
+            method = message["method"]
+
+            if method in [
+                "Network.requestWillBeSent",
+                "Network.responseReceived",
+            ]:
+                self.types[params["requestId"]] = params.get("type", "Other")
+
+            elif method == "Network.loadingFinished":
+                resource = self.types.pop(params["requestId"], "Other")
+
+                counts = self.loaded.setdefault(resource, [0, 0])
+                counts[0] += 1
+                counts[1] += int(params.get("encodedDataLength", 0))
+
+            elif method == "Network.loadingFailed":
+                resource = self.types.pop(
+                    params["requestId"], params.get("type", "Other")
+                )
+
+                if params.get("blockedReason") is not None:
+                    self.blocked[resource] = self.blocked.get(resource, 0) + 1
+
+    def totals(self):
+        """
+        Total numbers of the requests and bytes.
+
+        Returns:
+            dictionary of requests_loaded, bytes_loaded, requests_blocked
+        """
+
+        return {
+            "requests_loaded": sum(
+                count for count, _ in self.loaded.values()
+            ),
+            "bytes_loaded": sum(size for _, size in self.loaded.values()),
+            "requests_blocked": sum(self.blocked.values()),
+        }
+
+    def report(self):
+        """
+        Logs the requests by resource type.
+
+        """
+
+        totals = self.totals()
+
+        if totals["requests_loaded"] + totals["requests_blocked"] == 0:
+            return
+
+        log(
+            "Network: %d requests loaded (%.1f MB), %d blocked."
+            % (
+                totals["requests_loaded"],
+                totals["bytes_loaded"] / 1000000,
+                totals["requests_blocked"],
+            ),
+            level=1,
+        )
+
+        from tabulate import tabulate
+
+        table = tabulate(
+            [
+                [
+                    resource,
+                    self.loaded.get(resource, [0, 0])[0],
+                    self.loaded.get(resource, [0, 0])[1] / 1000,
+                    self.blocked.get(resource, 0),
+                ]
+                for resource in sorted(set(self.loaded) | set(self.blocked))
+            ],
+            headers=["Resource type", "Loaded", "Loaded kB", "Blocked"],
+            tablefmt="psql",
+            floatfmt=".1f",
+        )
+
+        for line in table.split("\n"):
+            log(line, level=1, indent=1)
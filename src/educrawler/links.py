@@ -0,0 +1,180 @@
+"""
+Blade deep link module.
+"""
+
+import os
+import json
+import threading
+
+from educrawler.utilities import log
+
+from educrawler.constants import CONST_PORTAL_ADDRESS
+
+
+class BladeLinks:
+    """
+    On-disk store of the portal addresses of the course and lab blades,
+        learned when the blades are opened by clicking through the portal.
+        The crawler navigates straight to them, without loading the course
+        list first.
+
+    The links of a different portal address (EC_PORTAL_ADDRESS) are
+        ignored. A link that fails to open is forgotten. The lab links are
+        kept per course, as the names may contain any separator.
+    """
+
+    def __init__(self, file_path):
+        """
+        Loads the links from a file (if it exists).
+
+        Arguments:
+            file_path - path to the links file
+        """
+
+        self.file_path = file_path
+        self.lock = threading.Lock()
+
+        self.courses = {}
+        self.labs = {}
+
+        if os.path.isfile(file_path):
+            try:
+                with open(file_path, "r") as links_file:
+                    content = json.load(links_file)
+            except (OSError, ValueError):
+                log("Could not read the blade links, ignoring them.", level=1)
+                content = {}
+
+            self.courses = content.get("courses", {})
+            self.labs = {
+                course_name: course_labs
+                for course_name, course_labs in content.get(
+                    "labs", {}
+                ).items()
+                # the labs of a course (earlier files had "course/lab" keys)
+                if isinstance(course_labs, dict)
+            }
+
+            log(
+                "Loaded the blade links (%d courses, %d labs)."
+                % (
+                    len(self.courses),
+                    sum(len(labs) for labs in self.labs.values()),
+                ),
+                level=2,
+            )
+
+    def save(self):
+        """
+        Writes the links to their file.
+
+        """
+
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+
+        # copied, the links can change while they are written
+        with self.lock:
+            content = {
+                "courses": dict(self.courses),
+                "labs": {
+                    course_name: dict(course_labs)
+                    for course_name, course_labs in self.labs.items()
+                },
+            }
+
+        with open(self.file_path, "w") as links_file:
+            json.dump(content, links_file)
+
+    def get_course(self, course_name):
+        """
+        Gets the address of a course's overview blade.
+
+        Arguments:
+            course_name - name of the course
+
+        Returns:
+            address of the blade, None if it is not known
+        """
+
+        with self.lock:
+            return _portal_link(self.courses.get(course_name))
+
+    def set_course(self, course_name, address):
+        """
+        Stores the address of a course's overview blade.
+
+        Arguments:
+            course_name - name of the course
+            address - address of the blade
+        """
+
+        with self.lock:
+            self.courses[course_name] = address
+
+    def get_lab(self, course_name, lab_name):
+        """
+        Gets the address of a lab's blade.
+
+        Arguments:
+            course_name - name of the course
+            lab_name - name of the lab
+
+        Returns:
+            address of the blade, None if it is not known
+        """
+
+        with self.lock:
+            return _portal_link(
+                self.labs.get(course_name, {}).get(lab_name)
+            )
+
+    def set_lab(self, course_name, lab_name, address):
+        """
+        Stores the address of a lab's blade.
+
+        Arguments:
+            course_name - name of the course
+            lab_name - name of the lab
+            address - address of the blade
+        """
+
+        with self.lock:
+            self.labs.setdefault(course_name, {})[lab_name] = address
+
+    def forget_course(self, course_name):
+        """
+        Removes the links of a course and of its labs.
+
+        Arguments:
+            course_name - name of the course
+        """
+
+        with self.lock:
+            self.courses.pop(course_name, None)
+            self.labs.pop(course_name, None)
+
+    def forget_lab(self, course_name, lab_name):
+        """
+        Removes the link of a lab.
+
+        Arguments:
+            course_name - name of the course
+            lab_name - name of the lab
+        """
+
+        with self.lock:
+            self.labs.get(course_name, {}).pop(lab_name, None)
+
+
+def _portal_link(address):
+    """
+    The address if it belongs to the current portal address, otherwise None.
+
+    """
+
+    if address is None or not address.startswith(
+        CONST_PORTAL_ADDRESS.rstrip("/") + "/"
+    ):
+        return None
+
+    return address
@@ -0,0 +1,107 @@
+"""
+Record pipeline module.
+
+The crawling methods named iter_* are generators yielding one record (a list
+    of column values) at a time and returning (success, error) at the end.
+"""
+
+
+def drain(records, write):
+    """
+    Passes all the records of a generator (or any iterator) to a write
+        function.
+
+    Arguments:
+        records - record generator
+        write - function called with each record
+
+    Returns:
+        success - flag if the generator finished succesfully
+        error - error message
+    """
+
+    while True:
+        try:
+            record = next(records)
+        except StopIteration as stop:
+            # plain iterators do not report success
+            if stop.value is None:
+                return True, None
+
+            return stop.value
+
+        write(record)
+
+
+def tee(records, store):
+    """
+    Yields the records of a generator, also appending them to a list.
+
+    Arguments:
+        records - record generator
+        store - list to append the records to
+
+    Returns:
+        success - flag if the generator finished succesfully
+        error - error message
+    """
+
+    while True:
+        try:
+            record = next(records)
+        except StopIteration as stop:
+            return stop.value
+
+        store.append(record)
+
+        yield record
+
+
+def convert(records, function):
+    """
+    Yields the records of a generator converted by a function.
+
+    Arguments:
+        records - record generator
+        function - function called with each record, returning the record
+            to yield
+
+    Returns:
+        success - flag if the generator finished succesfully
+        error - error message
+    """
+
+    while True:
+        try:
+            record = next(records)
+        except StopIteration as stop:
+            return stop.value
+
+        yield function(record)
+
+
+def collect_df(records, columns):
+    """
+    Collects all the records of a generator into a pandas dataframe.
+
+    Arguments:
+        records - record generator
+        columns - column names of the records
+
+    Returns:
+        success - flag if the action was succesful
+        error - error message
+        records_df - pandas dataframe, None if not successful
+    """
+
+    # pandas is slow to import, it is only loaded when needed
+    import pandas as pd
+
+    data = []
+
+    success, error = drain(records, data.append)
+
+    if not success:
+        return success, error, None
+
+    return success, error, pd.DataFrame(data, columns=columns)
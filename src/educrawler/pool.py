@@ -0,0 +1,415 @@
+"""
+Parallel crawling module.
+"""
+
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from queue import Empty, Queue
+
+from educrawler.utilities import log
+from educrawler.pipeline import drain
+
+from educrawler.constants import CONST_WORKER_COURSE_RETRIES
+
+
+def iter_eduhub_details_parallel(crawler, workers):
+    """
+    Yields details of handouts (subscriptions) from all the courses
+        using a pool of browsers, one course per browser at a time.
+
+    The course list is read by the given crawler, which is then turned off
+        so that its login session can be copied to the workers. The records
+        are yielded in the order of the course list, each course as soon as
+        it and all the courses before it are crawled.
+
+    A course that fails is crawled again (CONST_WORKER_COURSE_RETRIES
+        times). A course that still fails is left out, the crawl goes on
+        with the others and fails at the end, so that the courses crawled
+        are kept (e.g. in the journal, for a --resume).
+
+    Arguments:
+        crawler - logged in eduhub crawler object
+        workers - number of browsers to crawl with
+
+    Yields:
+        handout records (see CONST_HANDOUT_COLUMNS)
+    Returns:
+        success - flag if the action was succesful
+        error - error message
+    """
+
+    success, error, courses_df = crawler.get_courses_df()
+
+    if not success:
+        return success, error
+
+    courses = [course for _, course in courses_df.iterrows()]
+    course_records = [None] * len(courses)
+
+    course_queue = Queue()
+    for course_index, course in enumerate(courses):
+        if crawler.journal is not None:
+            course_records[course_index] = (
+                crawler.journal.get_course_records(course["Name"])
+            )
+
+        if crawler.cache is not None and course_records[course_index] is None:
+            course_records[course_index] = crawler.cache.get_course_records(
+                course
+            )
+
+        if course_records[course_index] is None:
+            course_queue.put((course_index, course, 0))
+
+    # the session files are only complete once the browser is closed
+    crawler.quit()
+
+    workers = min(workers, course_queue.qsize())
+
+    results = Queue()
+    stop = threading.Event()
+    executor = None
+
+    errors = []
+    failed_workers = 0
+
+    if workers > 0:
+        if crawler.session_dir is None:
+            log(
+                "No saved login session, each worker has to login "
+                + "separately.",
+                level=0,
+            )
+
+        log(
+            "Crawling %d courses with %d workers."
+            % (course_queue.qsize(), workers),
+            level=1,
+        )
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+
+        for worker_id in range(workers):
+            executor.submit(
+                _run_worker, crawler, worker_id, course_queue, results, stop
+            )
+
+    try:
+        for course_index in range(len(courses)):
+            while course_records[course_index] is None:
+                result_index, result, error = results.get()
+
+                if result_index is not None:
+                    if error is not None:
+                        errors.append(error)
+
+                    course_records[result_index] = result
+                    continue
+
+                errors.append(error)
+                failed_workers += 1
+
+                # nobody left to crawl the remaining courses
+                if failed_workers == workers:
+                    return False, "; ".join(errors)
+
+            yield from course_records[course_index]
+
+            # the records are not needed anymore
+            course_records[course_index] = []
+
+    finally:
+        stop.set()
+
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    if len(errors) != 0:
+        return False, "; ".join(errors)
+
+    return True, None
+
+
+def _run_worker(crawler, worker_id, course_queue, results, stop):
+    """
+    Crawls courses from the queue until it is empty or the crawl is over.
+        A failed course is put back to the queue until it runs out of
+        retries.
+
+    Arguments:
+        crawler - crawler the worker's session is copied from
+        worker_id - worker's number (for logging)
+        course_queue - queue of (course index, course row, retries) tuples
+        results - queue the (course index, course records, error message)
+            are put to: the records are empty and the error is set if the
+            course failed, the index is None if the worker failed
+        stop - event set when the crawl is over
+    """
+
+    session_dir = None
+    worker = None
+    # the course taken from the queue, reported if the worker fails
+    current = None
+
+    try:
+        worker, session_dir = _spawn_worker(crawler, worker_id)
+
+        if worker.client is None:
+            results.put(
+                (None, None, "Worker %d could not login." % (worker_id))
+            )
+            return
+
+        while not stop.is_set():
+            try:
+                current = course_queue.get_nowait()
+            except Empty:
+                break
+
+            course_index, course, retries = current
+
+            log(
+                "Worker %d: crawling (%s) course."
+                % (worker_id, course["Name"]),
+                level=1,
+            )
+
+            records = []
+
+            try:
+                # a course without a link is found in the course list, from
+                #   a fresh page
+                if (
+                    worker.links is None
+                    or worker.links.get_course(course["Name"]) is None
+                ):
+                    worker.client.refresh()
+
+                success, error = drain(
+                    worker.iter_course_details(course["Name"]),
+                    records.append,
+                )
+
+                if success:
+                    if worker.cache is not None:
+                        worker.cache.set_course(course, records)
+
+                    results.put((course_index, records, None))
+            except Exception as exception:
+                success = False
+                error = "Worker %d failed: %s" % (worker_id, exception)
+
+            if not success and retries < CONST_WORKER_COURSE_RETRIES:
+                log(
+                    "Worker %d: (%s) course failed, retrying it."
+                    % (worker_id, course["Name"]),
+                    level=1,
+                )
+                course_queue.put((course_index, course, retries + 1))
+
+            elif not success:
+                results.put(
+                    (
+                        course_index,
+                        [],
+                        "(%s) course: %s" % (course["Name"], error),
+                    )
+                )
+
+            current = None
+
+    except Exception as exception:
+        error = "Worker %d failed: %s" % (worker_id, exception)
+
+        # the other workers may have finished the queue, the course is not
+        #   crawled again
+        if current is not None:
+            results.put(
+                (
+                    current[0],
+                    [],
+                    "(%s) course: %s" % (current[1]["Name"], error),
+                )
+            )
+
+        results.put((None, None, error))
+
+    finally:
+        if worker is not None:
+            worker.quit()
+
+        if session_dir is not None:
+            shutil.rmtree(session_dir, ignore_errors=True)
+
+
+def download_usage_parallel(crawler, windows, workers):
+    """
+    Downloads the usage data of date windows using a pool of browsers, one
+        window per browser at a time.
+
+    The given crawler is turned off so that its login session can be copied
+        to the workers.
+
+    Arguments:
+        crawler - logged in eduhub crawler object
+        windows - list of (start, end) datetime pairs
+        workers - number of browsers to download with
+
+    Returns:
+        success - flag if all the windows were downloaded
+        error - error message (of the first failed window)
+        file_paths - dictionary of window -> path to its usage file, of the
+            windows downloaded (also when some have failed)
+    """
+
+    crawler.quit()
+
+    window_queue = Queue()
+    for window in windows:
+        window_queue.put(window)
+
+    workers = min(workers, len(windows))
+
+    if crawler.session_dir is None:
+        log(
+            "No saved login session, each worker has to login separately.",
+            level=0,
+        )
+
+    log(
+        "Downloading %d usage windows with %d workers."
+        % (len(windows), workers),
+        level=1,
+    )
+
+    results = Queue()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for worker_id in range(workers):
+            executor.submit(
+                _run_usage_worker, crawler, worker_id, window_queue, results
+            )
+
+    file_paths = {}
+    error = None
+
+    while not results.empty():
+        window, window_error, file_path = results.get()
+
+        if file_path is not None:
+            file_paths[window] = file_path
+        elif error is None:
+            error = window_error
+
+    if error is None and len(file_paths) != len(windows):
+        error = "Could not download %d usage windows." % (
+            len(windows) - len(file_paths)
+        )
+
+    return error is None, error, file_paths
+
+
+def _run_usage_worker(crawler, worker_id, window_queue, results):
+    """
+    Downloads the usage data of windows from the queue until it is empty.
+        A failed window does not stop the worker, the other windows are
+        still worth keeping.
+
+    Arguments:
+        crawler - crawler the worker's session is copied from
+        worker_id - worker's number (for logging)
+        window_queue - queue of (start, end) datetime pairs
+        results - queue the (window, error message, usage file path) are
+            put to, the path is None if the window failed
+    """
+
+    session_dir = None
+    worker = None
+
+    try:
+        worker, session_dir = _spawn_worker(crawler, worker_id)
+
+        if worker.client is None:
+            results.put(
+                (None, "Worker %d could not login." % (worker_id), None)
+            )
+            return
+
+        while True:
+            try:
+                window = window_queue.get_nowait()
+            except Empty:
+                break
+
+            log(
+                "Worker %d: downloading usage data for %s - %s."
+                % (worker_id, window[0], window[1]),
+                level=1,
+            )
+
+            success, error, file_path = worker.download_usage(*window)
+
+            results.put((window, error, file_path if success else None))
+
+    except Exception as exception:
+        results.put(
+            (None, "Worker %d failed: %s" % (worker_id, exception), None)
+        )
+
+    finally:
+        if worker is not None:
+            worker.quit()
+
+        if session_dir is not None:
+            shutil.rmtree(session_dir, ignore_errors=True)
+
+
+def _spawn_worker(crawler, worker_id):
+    """
+    Starts a worker browser with a copy of the crawler's login session.
+
+    Arguments:
+        crawler - crawler the worker's session is copied from
+        worker_id - worker's number
+
+    Returns:
+        worker - worker crawler object, its client is None if it could not
+            login
+        session_dir - the worker's session directory, to be removed when
+            it is done (None if the crawler has no saved session)
+    """
+
+    if crawler.session_dir is None:
+        return crawler.spawn(None), None
+
+    session_dir = tempfile.mkdtemp(prefix="ec_worker_%d_" % worker_id)
+
+    try:
+        copy_session(crawler.session_dir, session_dir)
+
+        return crawler.spawn(session_dir), session_dir
+    except Exception:
+        shutil.rmtree(session_dir, ignore_errors=True)
+        raise
+
+
+def copy_session(source_dir, target_dir):
+    """
+    Copies a browser login session (chrome user data directory) leaving out
+        the caches and the lock files of the browser that used it.
+
+    Arguments:
+        source_dir - session directory to copy
+        target_dir - directory to copy the session to
+    """
+
+    shutil.rmtree(target_dir)
+    shutil.copytree(
+        source_dir,
+        target_dir,
+        ignore=shutil.ignore_patterns(
+            "Singleton*", "Cache", "Code Cache", "GPUCache"
+        ),
+    )
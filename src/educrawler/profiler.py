@@ -0,0 +1,173 @@
+"""
+WebDriver command profiling module.
+"""
+
+import sys
+import threading
+from time import time
+
+from educrawler.utilities import log
+
+# modules the commands are sent through, not from
+_SKIPPED_MODULES = [
+    "educrawler.%s" % (module)
+    for module in ["profiler", "waiter", "grid", "tracing", "pipeline"]
+]
+
+
+class CommandProfiler:
+    """
+    Counts and times the commands a webdriver client sends to chromedriver,
+        by command type and by the crawler method sending them.
+
+    Every webdriver call (find_element_by_*, .text, .click, ..) is a round
+        trip to chromedriver, the profile shows where they add up.
+    """
+
+    def __init__(self, client):
+        """
+        Starts profiling the commands of a client.
+
+        Arguments:
+            client - webdriver client
+        """
+
+        self.lock = threading.Lock()
+
+        # command -> [count, total time]
+        self.commands = {}
+        # (calling method, command) -> [count, total time]
+        self.callers = {}
+
+        self._execute = client.command_executor.execute
+        client.command_executor.execute = self.execute
+
+    def execute(self, command, params):
+        """
+        Sends a command, timing it. Replaces the execute method of the
+            client's remote connection.
+
+        """
+
+        caller = _calling_method()
+
+        time_start = time()
+
+        try:
+            return self._execute(command, params)
+        finally:
+            time_elapsed = time() - time_start
+
+            with self.lock:
+                _add(self.commands, command, time_elapsed)
+                _add(self.callers, (caller, command), time_elapsed)
+
+    def reset(self):
+        """
+        Clears the counts.
+
+        """
+
+        with self.lock:
+            self.commands = {}
+            self.callers = {}
+
+    def total(self):
+        """
+        Total number of the commands sent.
+
+        """
+
+        with self.lock:
+            return sum(count for count, _ in self.commands.values())
+
+    def report(self):
+        """
+        Logs the commands by type and by calling method.
+
+        """
+
+        with self.lock:
+            commands = sorted(
+                self.commands.items(), key=lambda item: -item[1][1]
+            )
+            callers = sorted(
+                self.callers.items(), key=lambda item: -item[1][1]
+            )
+
+        if len(commands) == 0:
+            return
+
+        log(
+            "WebDriver commands: %d"
+            % (sum(entry[0] for _, entry in commands)),
+            level=1,
+        )
+
+        _log_table(
+            [
+                [command, count, total, total / count * 1000]
+                for command, (count, total) in commands
+            ],
+            ["Command", "Count", "Total s", "Average ms"],
+        )
+
+        log("WebDriver commands by calling method:", level=1)
+
+        _log_table(
+            [
+                [caller, command, count, total, total / count * 1000]
+                for (caller, command), (count, total) in callers
+            ],
+            ["Method", "Command", "Count", "Total s", "Average ms"],
+        )
+
+
+def _calling_method():
+    """
+    Name of the innermost educrawler function on the call stack, leaving out
+        the modules commands only pass through and lambdas.
+
+    """
+
+    frame = sys._getframe(2)
+
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        name = frame.f_code.co_name
+
+        if (
+            module.startswith("educrawler.")
+            and module not in _SKIPPED_MODULES
+            and not name.startswith("<")
+        ):
+            return name
+
+        frame = frame.f_back
+
+    return "--"
+
+
+def _add(totals, key, time_elapsed):
+    """
+    Adds a command to the [count, total time] of a key.
+
+    """
+
+    entry = totals.setdefault(key, [0, 0.0])
+    entry[0] += 1
+    entry[1] += time_elapsed
+
+
+def _log_table(rows, headers):
+    """
+    Logs a table line by line.
+
+    """
+
+    from tabulate import tabulate
+
+    table = tabulate(rows, headers=headers, tablefmt="psql", floatfmt=".3f")
+
+    for line in table.split("\n"):
+        log(line, level=1, indent=1)
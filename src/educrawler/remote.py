@@ -0,0 +1,233 @@
+"""
+Crawler server client module.
+
+Sends the command line actions to a running `ec serve`. Checking for the
+    server has to cost next to nothing when there is none, so the port is
+    probed with a plain socket first and only the standard library is used.
+
+The requests carry the token the server wrote to CONST_SERVE_TOKEN_FILE,
+    so that only the user running the server can use its browsers.
+"""
+
+import os
+import json
+import socket
+
+from educrawler.utilities import log, parse_time
+
+from educrawler.constants import (
+    CONST_SERVE_HOST,
+    CONST_SERVE_PORT,
+    CONST_SERVE_TOKEN_FILE,
+    CONST_SERVE_ACTION,
+    CONST_USAGE_ACTION,
+    CONST_USAGE_SYNC,
+    CONST_TIMEOUT,
+    CONST_HANDOUT_COLUMNS,
+)
+
+# command line arguments passed on to the server
+REQUEST_ARGS = [
+    "courses_action",
+    "handout_action",
+    CONST_USAGE_ACTION,
+    "course_name",
+    "lab_name",
+    "handout_name",
+]
+
+SERVER_ADDRESS = "http://%s:%d" % (CONST_SERVE_HOST, CONST_SERVE_PORT)
+
+
+def can_forward(args):
+    """
+    Checks if a command line action can be sent to a running server.
+
+    Arguments:
+        args - command line arguments
+
+    Returns:
+        True if a server is running and can take the action
+    """
+
+    if hasattr(args, CONST_SERVE_ACTION):
+        return False
+
+    # options the server's browsers do not take
+    if (
+        getattr(args, "trace", None) is not None
+        or getattr(args, "profile_webdriver", False)
+        or getattr(args, "resume", False)
+        or getattr(args, "incremental", False)
+        or getattr(args, "workers", 1) > 1
+        or getattr(args, "date_from", None) is not None
+        or getattr(args, "date_to", None) is not None
+        or getattr(args, CONST_USAGE_ACTION, None) == CONST_USAGE_SYNC
+    ):
+        return False
+
+    # no server of this user
+    if read_token() is None:
+        return False
+
+    # nothing listening on the port, no need for an HTTP request
+    try:
+        socket.create_connection(
+            (CONST_SERVE_HOST, CONST_SERVE_PORT), timeout=1.0
+        ).close()
+    except OSError:
+        return False
+
+    status, _ = _request("GET", "/status")
+
+    return status == 200
+
+
+def forward(args):
+    """
+    Sends a command line action to the running server.
+
+    Arguments:
+        args - command line arguments
+
+    Returns:
+        success - flag if the action was succesful
+        error - error message
+        result - (column names, records, path) of the action, the records
+            are None if the action has no records, the path is the usage
+            file's path of the usage action
+    """
+
+    request = {
+        name: getattr(args, name)
+        for name in REQUEST_ARGS
+        if hasattr(args, name)
+    }
+
+    log("Sending the request to the server at %s" % (SERVER_ADDRESS), level=1)
+
+    status, content = _request(
+        "POST", "/crawl", request, timeout=CONST_TIMEOUT, wait=True
+    )
+
+    if status is None:
+        return False, "Request to the server failed: %s" % (content), None
+
+    if status != 200:
+        return (
+            False,
+            "Request to the server failed with status %d" % (status),
+            None,
+        )
+
+    columns = content["columns"]
+    records = content["records"]
+
+    if records is not None and CONST_HANDOUT_COLUMNS[-1] in columns:
+        time_index = columns.index(CONST_HANDOUT_COLUMNS[-1])
+
+        for record in records:
+            record[time_index] = parse_time(record[time_index])
+
+    return (
+        content["success"],
+        content["error"],
+        (columns, records, content.get("path")),
+    )
+
+
+def write_token(token):
+    """
+    Writes the server token to CONST_SERVE_TOKEN_FILE, readable and
+        writable only by the user.
+
+    Arguments:
+        token - the token
+    """
+
+    os.makedirs(os.path.dirname(CONST_SERVE_TOKEN_FILE), exist_ok=True)
+
+    # created with its permissions, the token is never readable by others
+    descriptor = os.open(
+        CONST_SERVE_TOKEN_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600
+    )
+    os.fchmod(descriptor, 0o600)
+
+    with os.fdopen(descriptor, "w") as token_file:
+        token_file.write(token)
+
+
+def read_token():
+    """
+    Reads the token of the running server.
+
+    Returns:
+        token - the token, None if there is no server token
+    """
+
+    try:
+        with open(CONST_SERVE_TOKEN_FILE, "r") as token_file:
+            return token_file.read().strip() or None
+    except OSError:
+        return None
+
+
+def remove_token():
+    """
+    Removes the server token, once the server has stopped.
+
+    """
+
+    try:
+        os.remove(CONST_SERVE_TOKEN_FILE)
+    except OSError:
+        pass
+
+
+def _request(method, path, content=None, timeout=1.0, wait=False):
+    """
+    Sends a JSON request to the server.
+
+    Arguments:
+        method - HTTP method
+        path - request path
+        content - JSON content of the request (optional)
+        timeout - timeout in seconds
+        wait - flag to wait for the response indefinitely, only connecting
+            is timed out
+
+    Returns:
+        status - response status, None if the request failed
+        content - JSON content of the response, or the error message
+    """
+
+    import http.client
+
+    connection = http.client.HTTPConnection(
+        CONST_SERVE_HOST, CONST_SERVE_PORT, timeout=timeout
+    )
+
+    body = None
+    headers = {"Authorization": "Bearer %s" % (read_token())}
+
+    if content is not None:
+        body = json.dumps(content).encode("utf-8")
+        headers["Content-Type"] = "application/json"
+
+    try:
+        connection.connect()
+
+        if wait:
+            connection.sock.settimeout(None)
+
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+
+        return (
+            response.status,
+            json.loads(response.read().decode("utf-8")),
+        )
+    except (OSError, http.client.HTTPException, ValueError) as exception:
+        return None, exception
+    finally:
+        connection.close()
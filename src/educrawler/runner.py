@@ -0,0 +1,665 @@
+"""
+Command line action module.
+
+Runs the command line actions. Only the modules an action needs are
+    imported (the browser, the API client, pandas), so that the command line
+    starts quickly and e.g. a request forwarded to `ec serve` never loads
+    selenium.
+"""
+
+import os
+import shutil
+from functools import partial
+from datetime import date, timedelta
+
+from educrawler import tracing
+from educrawler.utilities import log
+from educrawler.cache import CrawlCache
+from educrawler.journal import CrawlJournal
+from educrawler.links import BladeLinks
+from educrawler.remote import can_forward, forward
+from educrawler.pipeline import drain, tee, convert
+from educrawler.writers import get_writer
+
+from educrawler.constants import (
+    CONST_SESSION_DIR,
+    CONST_CACHE_FILE,
+    CONST_JOURNAL_FILE,
+    CONST_LINKS_FILE,
+    CONST_VERBOSE_LEVEL,
+    CONST_ACTION_LIST,
+    CONST_USAGE_ACTION,
+    CONST_USAGE_DOWNLOAD,
+    CONST_USAGE_INGEST,
+    CONST_USAGE_SYNC,
+    CONST_USAGE_STORE,
+    CONST_USAGE_SYNC_DAYS,
+    CONST_USAGE_SYNC_OVERLAP_DAYS,
+    CONST_SERVE_ACTION,
+    CONST_HISTORY_ACTION,
+    CONST_HISTORY_TOP,
+    CONST_HISTORY_STORE,
+    CONST_FORECAST_ACTION,
+    CONST_OUTPUT_DF,
+    CONST_DF_OUTPUTS,
+    CONST_TYPED_OUTPUTS,
+    CONST_WEBDRIVER_HEADLESS,
+    CONST_COURSE_COLUMNS,
+    CONST_HANDOUT_COLUMNS,
+    CONST_DAILY_COST_COLUMNS,
+    CONST_HISTORY_COLUMNS,
+    CONST_BURNER_COLUMNS,
+    CONST_FORECAST_COLUMNS,
+    CONST_BACKEND_API,
+    CONST_BACKEND_BROWSER,
+)
+
+
+def crawl(args):
+    """
+    The main crawling routine.
+
+    Arguments:
+        args: command line arguments
+    Returns:
+        success - flag if the action was succesful
+        error - error message
+        return_result - if output is df - resulting dataframe, the usage
+            file path of the usage action
+    """
+
+    success = True
+    error = None
+    return_result = None
+
+    trace_path = getattr(args, "trace", None)
+    usage_download = (
+        getattr(args, CONST_USAGE_ACTION, None) == CONST_USAGE_DOWNLOAD
+    )
+
+    # check if any action is specified
+    if not (
+        hasattr(args, "courses_action")
+        or hasattr(args, "handout_action")
+        or hasattr(args, "usage_action")
+        or hasattr(args, CONST_HISTORY_ACTION)
+        or hasattr(args, CONST_FORECAST_ACTION)
+        or hasattr(args, CONST_SERVE_ACTION)
+    ):
+
+        success = False
+        error = "Unrecognised/unspecified action. Skipping."
+        log(error, level=0)
+
+    if success:
+        log("Crawler started", level=1)
+
+        # the usage and history stores are local, there is nothing to crawl
+        if getattr(args, CONST_USAGE_ACTION, None) == CONST_USAGE_INGEST:
+            success, error, return_result = _ingest_usage(args)
+
+            log("Crawler finished", level=1)
+
+            return success, error, return_result
+
+        if hasattr(args, CONST_HISTORY_ACTION) or hasattr(
+            args, CONST_FORECAST_ACTION
+        ):
+            success, error, return_result = _query_history(args)
+
+            log("Crawler finished", level=1)
+
+            return success, error, return_result
+
+        if trace_path is not None:
+            tracing.start()
+
+        os.environ["WDM_LOG_LEVEL"] = "%d" % CONST_VERBOSE_LEVEL
+
+        backend = getattr(args, "backend", CONST_BACKEND_BROWSER)
+        use_api = backend == CONST_BACKEND_API
+
+        try:
+            api_token = os.environ["EC_API_TOKEN"]
+        except KeyError:
+            api_token = None
+
+        if use_api and hasattr(args, CONST_USAGE_ACTION):
+            success = False
+            error = "Usage data can only be downloaded with the browser."
+            log(error, level=0)
+
+        if use_api and hasattr(args, CONST_SERVE_ACTION):
+            success = False
+            error = "Only the browser backend can be served."
+            log(error, level=0)
+
+        # a running server takes the action with its logged in browsers
+        if success and not use_api and can_forward(args):
+            success, error, result = forward(args)
+
+            if success and result[1] is not None:
+                success, error, return_result = _write_records(
+                    args, result[0], iter(result[1])
+                )
+            elif success and result[2] is not None:
+                print(result[2])
+                return_result = result[2]
+            elif not success:
+                log(error, level=0)
+
+            log("Crawler finished", level=1)
+
+            return success, error, return_result
+
+    # with a given API token, there is no need to login
+    if success and not (use_api and api_token):
+        try:
+            login_email = os.environ["EC_EMAIL"]
+            login_password = os.environ["EC_PASSWORD"]
+        except Exception:
+            login_email = None
+            login_password = None
+
+        if (
+            login_email is None
+            or login_password is None
+            or len(login_email) == 0
+            or len(login_password) == 0
+        ):
+
+            success = False
+            error = (
+                "Missing login credentials. Have you "
+                + "set the environmental parameters? Exiting."
+            )
+            log(error, level=0)
+
+    if success:
+        result = None
+        crawler = None
+
+        try:
+            webdriver_headless = os.environ["EC_HIDE"].lower() == "true"
+        except Exception:
+            webdriver_headless = CONST_WEBDRIVER_HEADLESS
+
+        try:
+            lean_mode = os.environ["EC_LEAN"].lower() == "true"
+        except KeyError:
+            lean_mode = False
+
+        try:
+            paged_grid = os.environ["EC_PAGED_GRID"].lower() != "false"
+        except KeyError:
+            paged_grid = True
+
+        try:
+            if os.environ["EC_MFA"].lower() == "false":
+                mfa_on = False
+            else:
+                mfa_on = True
+        except Exception:
+            mfa_on = True
+
+        try:
+            if os.environ["EC_SESSION"].lower() == "false":
+                session_dir = None
+            else:
+                session_dir = CONST_SESSION_DIR
+        except Exception:
+            session_dir = CONST_SESSION_DIR
+
+        if getattr(args, "incremental", False) and not use_api:
+            cache = CrawlCache(CONST_CACHE_FILE)
+        else:
+            cache = None
+
+        try:
+            deep_links = os.environ["EC_DEEP_LINKS"].lower() != "false"
+        except KeyError:
+            deep_links = True
+
+        if deep_links and not use_api:
+            links = BladeLinks(CONST_LINKS_FILE)
+        else:
+            links = None
+
+        if not (use_api and api_token):
+            from educrawler.crawler import Crawler
+
+            # instantiate the crawler
+            crawler = Crawler(
+                login_email,
+                login_password,
+                hide=webdriver_headless,
+                mfa=mfa_on,
+                session_dir=session_dir,
+                network_log=use_api,
+                cache=cache,
+                links=links,
+                profile_webdriver=getattr(args, "profile_webdriver", False),
+                lean_mode=lean_mode,
+                network_stats=lean_mode,
+                paged_grid=paged_grid,
+            )
+
+            if crawler.client is None:
+                success = False
+                error = "Client not established"
+
+        # the browser is only needed to read the API token
+        if success and use_api and api_token is None:
+            success, error, api_token = crawler.get_api_token()
+            crawler.quit()
+
+        # journal the handouts crawled with the browser, so that a failed
+        #   crawl can be resumed (opened after the login, not to lose the
+        #   journal of the failed crawl to a failed login)
+        if success and not use_api and hasattr(args, "handout_action"):
+            journal = CrawlJournal(
+                CONST_JOURNAL_FILE, resume=getattr(args, "resume", False)
+            )
+            crawler.journal = journal
+        else:
+            journal = None
+
+        # take the specified action
+        if success and hasattr(args, CONST_SERVE_ACTION):
+            from educrawler.server import serve
+
+            success, error = serve(crawler, args.browsers, _take_action)
+        elif success:
+            if use_api:
+                from educrawler.api import ApiCrawler
+
+                success, error, result = _take_action(
+                    args, ApiCrawler(api_token)
+                )
+            else:
+                success, error, result = _take_action(args, crawler)
+
+        if crawler is not None:
+            crawler.quit()
+
+        if cache is not None:
+            cache.save()
+
+        if links is not None:
+            links.save()
+
+        if journal is not None:
+            journal.close(completed=success)
+
+        if success and usage_download:
+            # the path of the usage file, for the scripts calling ec
+            print(result)
+            return_result = result
+        elif success and args.output == CONST_OUTPUT_DF:
+            return_result = result
+
+    if trace_path is not None:
+        tracing.write(trace_path)
+        tracing.summary()
+
+    log("Crawler finished", level=1)
+
+    return success, error, return_result
+
+
+def _take_action(args, crawler):
+    """
+    The main routine to handle all command line actions. The resulting
+        records are written to the chosen output as they are crawled.
+
+    Arguments:
+        args: command line arguments
+        crawler: eduhub crawler object
+    Returns:
+        success - flag if the action was succesful
+        error - error message
+        result - if output is df - resulting dataframe, the usage file path
+            of the usage action
+    """
+
+    success = False
+    error = None
+    result = None
+
+    if hasattr(args, "courses_action"):
+        if args.courses_action == CONST_ACTION_LIST:
+            success, error, courses_df = crawler.get_courses_df()
+
+            if success:
+                success, error, result = _write_records(
+                    args,
+                    CONST_COURSE_COLUMNS,
+                    iter(courses_df.values.tolist()),
+                )
+        else:
+            log("Unrecognised subaction. Skipping.", level=0)
+
+    elif hasattr(args, "handout_action"):
+
+        if hasattr(args, "course_name"):
+            course_name = args.course_name
+        else:
+            course_name = None
+
+        if hasattr(args, "lab_name"):
+            lab_name = args.lab_name
+        else:
+            lab_name = None
+
+        if hasattr(args, "handout_name"):
+            handout_name = args.handout_name
+        else:
+            handout_name = None
+
+        if args.handout_action == CONST_ACTION_LIST:
+            # all courses
+            if course_name is None:
+                if getattr(args, "workers", 1) > 1 and not getattr(
+                    crawler, "is_api", False
+                ):
+                    from educrawler.pool import iter_eduhub_details_parallel
+
+                    records = iter_eduhub_details_parallel(
+                        crawler, args.workers
+                    )
+                else:
+                    records = crawler.iter_eduhub_details()
+            # specific course (optionally, specific lab, handout)
+            else:
+                records = crawler.iter_course_details(
+                    course_name, lab_name, handout_name
+                )
+
+            history = _open_history()
+
+            # every snapshot of the handouts is kept in the history
+            if history is not None:
+                records = tee(records, history)
+
+            try:
+                success, error, result = _write_records(
+                    args, CONST_HANDOUT_COLUMNS, records
+                )
+            finally:
+                if history is not None:
+                    history.close()
+
+        else:
+            log("Unrecognised subaction. Skipping.", level=0)
+
+    elif getattr(args, CONST_USAGE_ACTION, None) == CONST_USAGE_SYNC:
+        success, error, result = _sync_usage(args, crawler)
+
+    elif hasattr(args, CONST_USAGE_ACTION):
+        date_from = getattr(args, "date_from", None)
+        date_to = getattr(args, "date_to", None)
+
+        if date_from is None and date_to is None:
+            success, error, result = crawler.download_usage()
+        else:
+            from educrawler.usage import download_usage_range
+
+            if date_to is None:
+                date_to = date.today()
+
+            if date_from is None:
+                date_from = date_to - timedelta(days=10)
+
+            success, error, result = download_usage_range(
+                crawler,
+                date_from,
+                date_to,
+                max(args.window_days, 1),
+                args.workers,
+            )
+
+    else:
+        log("Unrecognised/unspecified action. Skipping.", level=0)
+
+    return success, error, result
+
+
+def _ingest_usage(args):
+    """
+    Adds a downloaded usage file to the usage store and writes the daily
+        costs of the days in it to the chosen output.
+
+    Arguments:
+        args: command line arguments
+    Returns:
+        success - flag if the action was succesful
+        error - error message
+        result - if output is df - daily costs dataframe
+    """
+
+    from educrawler.usage import UsageStore
+
+    if getattr(args, "file", None) is None:
+        error = "Give the usage file to ingest with --file."
+        log(error, level=0)
+        return False, error, None
+
+    store = UsageStore(CONST_USAGE_STORE)
+
+    try:
+        success, error, ingested = store.ingest(args.file)
+
+        if not success:
+            log(error, level=0)
+            return success, error, None
+
+        date_first, date_last, rows = ingested
+
+        if rows == 0:
+            records = iter([])
+        else:
+            records = store.iter_daily_costs(date_first, date_last)
+
+        return _write_records(args, CONST_DAILY_COST_COLUMNS, records)
+    finally:
+        store.close()
+
+
+def _sync_usage(args, crawler):
+    """
+    Downloads the usage data since the last sync (and the overlap days
+        before it, for the records the portal adds late) into the usage
+        store and writes the daily costs of the synced days to the chosen
+        output.
+
+    Arguments:
+        args: command line arguments
+        crawler: eduhub crawler object
+    Returns:
+        success - flag if the action was succesful
+        error - error message
+        result - if output is df - daily costs dataframe
+    """
+
+    from educrawler.usage import UsageStore, download_usage_range
+
+    store = UsageStore(CONST_USAGE_STORE)
+
+    try:
+        date_to = getattr(args, "date_to", None) or date.today()
+        date_from = getattr(args, "date_from", None)
+
+        if date_from is None:
+            synced = store.get_synced()
+
+            if synced is None:
+                date_from = date_to - timedelta(days=CONST_USAGE_SYNC_DAYS)
+            else:
+                date_from = min(
+                    synced - timedelta(days=CONST_USAGE_SYNC_OVERLAP_DAYS),
+                    date_to,
+                )
+
+            log("Last synced day: %s." % (synced), level=1)
+
+        success, error, usage_file_path = download_usage_range(
+            crawler,
+            date_from,
+            date_to,
+            max(getattr(args, "window_days", 1), 1),
+            getattr(args, "workers", 1),
+        )
+
+        if not success:
+            return success, error, None
+
+        success, error, _ = store.ingest(usage_file_path)
+
+        # the rows are in the store now
+        shutil.rmtree(os.path.dirname(usage_file_path), ignore_errors=True)
+
+        if not success:
+            log(error, level=0)
+            return success, error, None
+
+        store.set_synced(date_to)
+
+        return _write_records(
+            args,
+            CONST_DAILY_COST_COLUMNS,
+            store.iter_daily_costs(
+                date_from.strftime("%Y-%m-%d"), date_to.strftime("%Y-%m-%d")
+            ),
+        )
+    finally:
+        store.close()
+
+
+def _open_history():
+    """
+    Opens the history store, unless it is turned off (EC_HISTORY).
+
+    Returns:
+        history store, None if it is turned off
+    """
+
+    try:
+        if os.environ["EC_HISTORY"].lower() == "false":
+            return None
+    except KeyError:
+        pass
+
+    from educrawler.history import HistoryStore
+
+    return HistoryStore(CONST_HISTORY_STORE)
+
+
+def _query_history(args):
+    """
+    Writes the handout snapshots, the subscriptions which consumed the
+        most or the budget forecast, from the history store to the chosen
+        output.
+
+    Arguments:
+        args: command line arguments
+    Returns:
+        success - flag if the action was succesful
+        error - error message
+        result - if output is df - resulting dataframe
+    """
+
+    from educrawler.history import HistoryStore
+
+    store = HistoryStore(CONST_HISTORY_STORE)
+
+    try:
+        if hasattr(args, CONST_FORECAST_ACTION):
+            from educrawler.forecast import iter_forecast
+
+            return _write_records(
+                args,
+                CONST_FORECAST_COLUMNS,
+                iter_forecast(
+                    store,
+                    since=args.since,
+                    course_name=args.course_name,
+                    limit=args.limit,
+                ),
+            )
+
+        if getattr(args, CONST_HISTORY_ACTION) == CONST_HISTORY_TOP:
+            return _write_records(
+                args,
+                CONST_BURNER_COLUMNS,
+                store.iter_top_burners(args.since, args.limit),
+            )
+
+        return _write_records(
+            args,
+            CONST_HISTORY_COLUMNS,
+            store.iter_snapshots(
+                subscription_id=args.subscription_id,
+                course_name=args.course_name,
+                since=args.since,
+            ),
+        )
+    finally:
+        store.close()
+
+
+def _write_records(args, columns, records):
+    """
+    Writes records to the chosen output as they come.
+
+    Arguments:
+        args: command line arguments (output, output_path, append, typed)
+        columns: column names of the records
+        records: record generator
+    Returns:
+        success - flag if the action was succesful
+        error - error message
+        result - if output is df - resulting dataframe
+    """
+
+    output = args.output
+    convert_df = None
+
+    # the course and handout records are typed for the typed schemas
+    if getattr(args, "typed", False) or output in CONST_TYPED_OUTPUTS:
+        from educrawler.records import record_type, typed_df
+
+        typed_type = record_type(columns)
+
+        # a dataframe is converted at once, a column at a time
+        if typed_type is not None and output in CONST_DF_OUTPUTS:
+            convert_df = partial(typed_df, typed_type=typed_type)
+        elif typed_type is not None:
+            columns = typed_type.typed_columns
+            records = convert(
+                records, lambda record: typed_type.from_list(record).to_list()
+            )
+
+    writer = get_writer(
+        output,
+        columns,
+        convert_df=convert_df,
+        file_path=getattr(args, "output_path", None),
+        append=getattr(args, "append", False),
+    )
+
+    if writer is None:
+        if hasattr(records, "close"):
+            records.close()
+        return False, "Could not create the %s output. Skipping." % (
+            output
+        ), None
+
+    try:
+        success, error = drain(records, writer.write)
+    finally:
+        writer.close()
+
+    if not success:
+        return success, error, None
+
+    return success, error, getattr(writer, "result", None)
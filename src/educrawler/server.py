@@ -0,0 +1,307 @@
+"""
+Crawler server module.
+
+`ec serve` keeps logged in browsers running and takes the crawl requests of
+    the command line over localhost HTTP, so that the requests do not pay
+    for the browser start up and the login each time.
+
+Every request has to carry the server's token (see remote.write_token),
+    which only the user running the server can read. The requests of web
+    pages (with a cross-origin Origin header) are refused.
+"""
+
+import os
+import hmac
+import json
+import binascii
+import shutil
+import tempfile
+from argparse import Namespace
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from queue import Empty, Queue
+from socketserver import ThreadingMixIn
+
+from educrawler.utilities import log, to_json_value
+from educrawler.pool import copy_session
+from educrawler.remote import SERVER_ADDRESS, write_token, remove_token
+
+from educrawler.constants import (
+    CONST_SERVE_HOST,
+    CONST_SERVE_PORT,
+    CONST_OUTPUT_DF,
+)
+
+
+class CrawlServer(ThreadingMixIn, HTTPServer):
+    """
+    HTTP server handing the crawl requests to a pool of logged in crawlers,
+        each crawler taking one request at a time.
+
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, crawlers, take_action, token):
+        """
+        Arguments:
+            address - (host, port) to listen on
+            crawlers - logged in crawler objects
+            take_action - function(args, crawler) taking a command line
+                action, see runner._take_action
+            token - token the requests have to carry
+        """
+
+        HTTPServer.__init__(self, address, _RequestHandler)
+
+        self.browsers = len(crawlers)
+        self.take_action = take_action
+        self.token = token
+
+        self.crawlers = Queue()
+        for crawler in crawlers:
+            self.crawlers.put(crawler)
+
+    def run_request(self, request):
+        """
+        Takes a requested action with the first free crawler.
+
+        Arguments:
+            request - command line arguments of the request
+
+        Returns:
+            success - flag if the action was succesful
+            error - error message
+            result - resulting dataframe or usage file path (if any)
+        """
+
+        args = Namespace(**request)
+        args.output = CONST_OUTPUT_DF
+
+        crawler = self.crawlers.get()
+
+        try:
+            crawler.client.refresh()
+            success, error, result = self.take_action(args, crawler)
+        except Exception as exception:
+            success = False
+            error = "Request failed: %s" % (exception)
+            result = None
+
+        # the browser could have lost its login session, it is replaced
+        if not success:
+            log("Replacing the browser after a failed request.", level=1)
+
+            crawler.quit()
+
+            try:
+                crawler = crawler.spawn(crawler.session_dir)
+            except Exception as exception:
+                log("Could not start a browser: %s" % (exception), level=0)
+
+        self.crawlers.put(crawler)
+
+        return success, error, result
+
+    def quit(self):
+        """
+        Stops the server and turns off its crawlers.
+
+        """
+
+        self.server_close()
+
+        while True:
+            try:
+                self.crawlers.get_nowait().quit()
+            except Empty:
+                break
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """
+    Handles GET /status and POST /crawl requests.
+
+    """
+
+    def do_GET(self):
+        """
+        Reports that the server is running.
+
+        """
+
+        if not self._authorized():
+            return
+
+        if self.path != "/status":
+            self._respond(404, {"error": "Unknown path %s" % (self.path)})
+            return
+
+        self._respond(200, {"browsers": self.server.browsers})
+
+    def do_POST(self):
+        """
+        Runs a crawl request and responds with its resulting records.
+
+        """
+
+        if not self._authorized():
+            return
+
+        if self.path != "/crawl":
+            self._respond(404, {"error": "Unknown path %s" % (self.path)})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length).decode("utf-8"))
+
+        log("Request: %s" % (request), level=1)
+
+        success, error, result = self.server.run_request(request)
+
+        response = {
+            "success": success,
+            "error": error,
+            "columns": None,
+            "records": None,
+            "path": None,
+        }
+
+        if isinstance(result, str):
+            response["path"] = result
+        elif result is not None:
+            response["columns"] = list(result.columns)
+            response["records"] = result.values.tolist()
+
+        self._respond(200, response)
+
+    def _authorized(self):
+        """
+        Checks the request's origin and token, responding with an error if
+            the request is refused.
+
+        Returns:
+            True if the request can be served
+        """
+
+        origin = self.headers.get("Origin")
+
+        # sent by the browsers, the command line sends none
+        if origin is not None and origin != SERVER_ADDRESS:
+            self._respond(403, {"error": "Cross-origin request refused."})
+            return False
+
+        authorization = self.headers.get("Authorization", "")
+
+        if not hmac.compare_digest(
+            authorization.encode("utf-8"),
+            ("Bearer %s" % (self.server.token)).encode("utf-8"),
+        ):
+            self._respond(401, {"error": "Missing or wrong server token."})
+            return False
+
+        return True
+
+    def _respond(self, status, content):
+        """
+        Sends a JSON response.
+
+        """
+
+        body = json.dumps(content, default=to_json_value).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", "%d" % (len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """
+        Logs the requests the same way as the rest of the crawler.
+
+        """
+
+        log(format % args, level=3, indent=2)
+
+
+def serve(crawler, browsers, take_action):
+    """
+    Serves crawl requests until interrupted (Ctrl+C).
+
+    Arguments:
+        crawler - logged in eduhub crawler object
+        browsers - number of browsers to keep running
+        take_action - function(args, crawler) taking a command line action
+
+    Returns:
+        success - flag if the server ran succesfully
+        error - error message
+    """
+
+    crawlers = [crawler]
+    session_dirs = []
+
+    if browsers > 1:
+        if crawler.session_dir is None:
+            log(
+                "No saved login session, each browser has to login "
+                + "separately.",
+                level=0,
+            )
+        else:
+            # the session files are only complete once the browser is closed
+            crawler.quit()
+            crawlers = []
+
+        while len(crawlers) < browsers:
+            session_dir = None
+
+            if crawler.session_dir is not None:
+                session_dir = tempfile.mkdtemp(
+                    prefix="ec_serve_%d_" % len(crawlers)
+                )
+                copy_session(crawler.session_dir, session_dir)
+                session_dirs.append(session_dir)
+
+            crawlers.append(crawler.spawn(session_dir))
+
+    token = binascii.hexlify(os.urandom(32)).decode("ascii")
+
+    try:
+        server = CrawlServer(
+            (CONST_SERVE_HOST, CONST_SERVE_PORT), crawlers, take_action, token
+        )
+    except OSError as exception:
+        error = "Could not start the server on %s: %s" % (
+            SERVER_ADDRESS,
+            exception,
+        )
+        log(error, level=0)
+
+        for server_crawler in crawlers:
+            server_crawler.quit()
+
+        return False, error
+
+    # written once the port is taken, not to replace the token of another
+    #   running server
+    write_token(token)
+
+    log(
+        "Serving crawl requests on %s with %d browser(s)."
+        % (SERVER_ADDRESS, len(crawlers)),
+        level=1,
+    )
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        log("Stopping the server.", level=1)
+    finally:
+        server.quit()
+        remove_token()
+
+        for session_dir in session_dirs:
+            shutil.rmtree(session_dir, ignore_errors=True)
+
+    return True, None
@@ -0,0 +1,256 @@
+"""
+Tracing module.
+
+Times the crawling stages as spans. Tracing is off unless started (--trace),
+    the spans are then written to a file in the Chrome trace event format
+    (chrome://tracing, https://ui.perfetto.dev) and summarised per stage.
+
+A span's attributes (course, lab, handout) are inherited by the spans and
+    the waits nested in it.
+"""
+
+import os
+import json
+import threading
+from time import time
+
+from educrawler.utilities import log
+
+_lock = threading.Lock()
+_context = threading.local()
+
+# trace events, None while tracing is off
+_events = None
+_trace_start = None
+
+
+class _Span:
+    """
+    Context manager timing a stage.
+
+    """
+
+    __slots__ = ("name", "attributes", "time_start")
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self.time_start = None
+
+    def __enter__(self):
+        stack = _attributes_stack()
+
+        if len(stack) != 0:
+            self.attributes = dict(stack[-1], **self.attributes)
+
+        stack.append(self.attributes)
+        self.time_start = time()
+
+        return self
+
+    def __exit__(self, *exc_info):
+        time_elapsed = time() - self.time_start
+
+        _attributes_stack().pop()
+        record(self.name, self.time_start, time_elapsed, self.attributes)
+
+        return False
+
+
+class _NoSpan:
+    """
+    Context manager doing nothing, used while tracing is off.
+
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def start():
+    """
+    Starts collecting spans.
+
+    """
+
+    global _events, _trace_start
+
+    with _lock:
+        _events = []
+        _trace_start = time()
+
+
+def span(name, **attributes):
+    """
+    Creates a span timing a stage, to be used in a with statement.
+
+    Arguments:
+        name - name of the stage
+        attributes - attributes of the span (e.g. course="..", lab="..")
+
+    Returns:
+        span context manager
+    """
+
+    if _events is None:
+        return _NO_SPAN
+
+    return _Span(name, attributes)
+
+
+def record(name, time_start, duration, attributes=None):
+    """
+    Records a span timed elsewhere (e.g. a wait).
+
+    Arguments:
+        name - name of the stage
+        time_start - start time of the span (seconds since the epoch)
+        duration - duration of the span in seconds
+        attributes - attributes of the span (default: the attributes of
+            the enclosing span)
+    """
+
+    if _events is None:
+        return
+
+    if attributes is None:
+        stack = _attributes_stack()
+        attributes = stack[-1] if len(stack) != 0 else {}
+
+    with _lock:
+        _events.append(
+            {
+                "name": name,
+                "cat": "crawl",
+                "ph": "X",
+                "ts": int((time_start - _trace_start) * 1000000),
+                "dur": int(duration * 1000000),
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": attributes,
+            }
+        )
+
+
+def write(file_path):
+    """
+    Writes the recorded spans to a Chrome trace file.
+
+    Arguments:
+        file_path - path to the trace file
+    """
+
+    if _events is None:
+        return
+
+    with _lock:
+        events = list(_events)
+
+    with open(file_path, "w") as trace_file:
+        json.dump(
+            {"traceEvents": events, "displayTimeUnit": "ms"},
+            trace_file,
+            default=str,
+        )
+
+    log("Trace written to %s" % (file_path), level=1)
+
+
+def summary():
+    """
+    Logs a table of the number, total, median (p50), 95th percentile (p95)
+        and maximum duration of each stage's spans.
+
+    """
+
+    if _events is None:
+        return
+
+    durations = {}
+
+    with _lock:
+        for event in _events:
+            durations.setdefault(event["name"], []).append(
+                event["dur"] / 1000000
+            )
+
+    from tabulate import tabulate
+
+    rows = []
+
+    for stage, stage_durations in durations.items():
+        stage_durations.sort()
+
+        rows.append(
+            [
+                stage,
+                len(stage_durations),
+                sum(stage_durations),
+                _percentile(stage_durations, 50),
+                _percentile(stage_durations, 95),
+                stage_durations[-1],
+            ]
+        )
+
+    table = tabulate(
+        rows,
+        headers=["Stage", "Count", "Total s", "p50 s", "p95 s", "Max s"],
+        tablefmt="psql",
+        floatfmt=".3f",
+    )
+
+    log("Stage timings:", level=1)
+
+    for line in table.split("\n"):
+        log(line, level=1, indent=1)
+
+
+def traced(name, records, **attributes):
+    """
+    Yields the records of a generator within a span.
+
+    Arguments:
+        name - name of the stage
+        records - record generator
+        attributes - attributes of the span
+
+    Returns:
+        success - flag if the generator finished succesfully
+        error - error message
+    """
+
+    with span(name, **attributes):
+        result = yield from records
+
+    return result
+
+
+def _attributes_stack():
+    """
+    Attributes of the spans the current thread is in.
+
+    """
+
+    if not hasattr(_context, "stack"):
+        _context.stack = []
+
+    return _context.stack
+
+
+def _percentile(sorted_values, percent):
+    """
+    Nearest-rank percentile of sorted values.
+
+    """
+
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+
+    return sorted_values[int(rank) - 1]
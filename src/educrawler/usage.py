@@ -0,0 +1,858 @@
+"""
+Usage store module.
+
+Ingests the downloaded usage CSV files into a local SQLite database, a
+    chunk of rows at a time so that only a digest of each row is kept in
+    memory. The date, cost and subscription id of each row are parsed once,
+    on the way in, the rest of the row is kept as JSON. The daily cost of
+    each subscription is kept up to date in an aggregate table.
+
+A row is identified by all its values except the measures (cost, quantity,
+    ..), so ingesting the same or an overlapping file again replaces the
+    rows instead of adding them twice, also when the portal has updated
+    their figures since. The rows of a file with the same identity (e.g.
+    two readings of a meter on a day) are told apart by their order in the
+    file.
+
+Long date ranges are downloaded in windows of CONST_USAGE_WINDOW_DAYS days
+    (see download_usage_range), which are merged into one file. The windows
+    are kept in CONST_USAGE_WINDOWS_DIR and the settled ones are not
+    downloaded again.
+"""
+
+import os
+import re
+import csv
+import json
+import shutil
+import sqlite3
+import hashlib
+import tempfile
+from datetime import datetime, timedelta
+
+from educrawler.utilities import log
+
+from educrawler.constants import (
+    CONST_INGEST_CHUNK_ROWS,
+    CONST_USAGE_PATH,
+    CONST_USAGE_WINDOWS_DIR,
+    CONST_USAGE_SETTLED_DAYS,
+)
+
+# column names (lower case, letters and digits only) by what they hold, in
+#   the order they are preferred
+_DATE_COLUMNS = ["date", "usagedate", "usagedatetime", "day"]
+_COST_COLUMNS = [
+    "cost",
+    "costinbillingcurrency",
+    "pretaxcost",
+    "extendedcost",
+    "costusd",
+    "amount",
+]
+_SUBSCRIPTION_COLUMNS = [
+    "subscriptionid",
+    "subscriptionguid",
+    "subscription",
+    "subscriptionname",
+]
+# values that change when the portal's figures are updated, left out of
+#   a row's identity
+_MEASURE_WORDS = ["cost", "amount", "quantity", "price", "charge"]
+
+# in the order they are preferred, when the dates of a file fit several
+#   (e.g. 03/04/2026 month or day first)
+_DATE_FORMATS = [
+    "%Y-%m-%d",
+    "%m/%d/%Y",
+    "%d/%m/%Y",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%dT%H:%M:%SZ",
+    "%Y-%m-%dT%H:%M:%S.%fZ",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y %I:%M:%S %p",
+]
+
+_NUMBER_PATTERN = re.compile(r"[^0-9.\-eE]")
+
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS usage_rows (
+        row_key TEXT PRIMARY KEY,
+        usage_date TEXT NOT NULL,
+        subscription_id TEXT,
+        cost REAL,
+        data TEXT NOT NULL
+    )""",
+    """CREATE INDEX IF NOT EXISTS usage_rows_date
+        ON usage_rows (usage_date, subscription_id)""",
+    """CREATE TABLE IF NOT EXISTS daily_costs (
+        subscription_id TEXT,
+        usage_date TEXT NOT NULL,
+        cost REAL,
+        rows INTEGER,
+        PRIMARY KEY (subscription_id, usage_date)
+    )""",
+    """CREATE TABLE IF NOT EXISTS sync_state (
+        name TEXT PRIMARY KEY,
+        value TEXT
+    )""",
+]
+
+
+class UsageStore:
+    """
+    SQLite store of the usage data.
+
+    """
+
+    def __init__(self, file_path):
+        """
+        Opens the store, creating it if it does not exist.
+
+        Arguments:
+            file_path - path to the SQLite database
+        """
+
+        self.file_path = file_path
+
+        directory = os.path.dirname(file_path)
+
+        if len(directory) != 0:
+            os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(file_path)
+
+        for statement in _SCHEMA:
+            self.connection.execute(statement)
+
+        self.connection.commit()
+
+    def close(self):
+        """
+        Closes the store.
+
+        """
+
+        self.connection.close()
+
+    def ingest(self, csv_path):
+        """
+        Adds (or updates) the rows of a usage CSV file and the daily costs
+            of the days in it.
+
+        Arguments:
+            csv_path - path to the usage CSV file
+
+        Returns:
+            success - flag if the file was ingested
+            error - error message
+            result - (first date, last date, number of rows) of the file,
+                the dates are None if it has no rows
+        """
+
+        if not os.path.isfile(csv_path):
+            return False, "Usage file %s does not exist." % (csv_path), None
+
+        # Azure's exports often start with a byte order mark
+        with open(csv_path, "r", newline="", encoding="utf-8-sig") as file:
+            reader = csv.reader(file)
+
+            try:
+                header = next(reader)
+            except StopIteration:
+                return False, "Usage file %s is empty." % (csv_path), None
+
+            success, error, columns = _find_columns(header)
+
+            if not success:
+                return success, error, None
+
+            success, error, date_format = _find_date_format(
+                csv_path, columns[0]
+            )
+
+            if not success:
+                log(error, level=0)
+                return success, error, None
+
+            parser = _RowParser(header, columns, date_format)
+
+            date_first = None
+            date_last = None
+            rows = 0
+            skipped = 0
+
+            # a date that does not match the file's format fails the
+            #   ingest, the transaction is rolled back
+            try:
+                with self.connection:
+                    while True:
+                        chunk = []
+
+                        for values in reader:
+                            row = parser.parse(values)
+
+                            if row is None:
+                                skipped += 1
+                                continue
+
+                            chunk.append(row)
+
+                            if len(chunk) == CONST_INGEST_CHUNK_ROWS:
+                                break
+
+                        if len(chunk) == 0:
+                            break
+
+                        self.connection.executemany(
+                            "INSERT OR REPLACE INTO usage_rows "
+                            + "VALUES (?, ?, ?, ?, ?)",
+                            chunk,
+                        )
+
+                        dates = [row[1] for row in chunk]
+
+                        if date_first is None or min(dates) < date_first:
+                            date_first = min(dates)
+                        if date_last is None or max(dates) > date_last:
+                            date_last = max(dates)
+
+                        rows += len(chunk)
+
+                        log("Ingested %d rows.." % (rows), level=3, indent=2)
+
+                    if rows != 0:
+                        self._aggregate(date_first, date_last)
+            except ValueError as exception:
+                error = "Could not ingest %s: %s" % (csv_path, exception)
+                log(error, level=0)
+                return False, error, None
+
+        if skipped != 0:
+            log(
+                "Skipped %d rows without a date." % (skipped),
+                level=1,
+                indent=2,
+            )
+
+        log(
+            "Ingested %d usage rows (%s - %s) from %s."
+            % (rows, date_first, date_last, csv_path),
+            level=1,
+        )
+
+        return True, None, (date_first, date_last, rows)
+
+    def get_synced(self):
+        """
+        Gets the last day synced from the portal (see set_synced).
+
+        Returns:
+            last synced day (date), None if the store was never synced
+        """
+
+        row = self.connection.execute(
+            "SELECT value FROM sync_state WHERE name = 'synced'"
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        return datetime.strptime(row[0], "%Y-%m-%d").date()
+
+    def set_synced(self, day):
+        """
+        Records the last day synced from the portal. An earlier day than the
+            recorded one (e.g. of a backfill) is ignored.
+
+        Arguments:
+            day - last synced day (date)
+        """
+
+        synced = self.get_synced()
+
+        if synced is not None and synced >= day:
+            return
+
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO sync_state VALUES ('synced', ?)",
+                (day.strftime("%Y-%m-%d"),),
+            )
+
+    def iter_daily_costs(self, date_first=None, date_last=None):
+        """
+        Yields the daily cost of each subscription.
+
+        Arguments:
+            date_first - first date (YYYY-MM-DD, optional)
+            date_last - last date (YYYY-MM-DD, optional)
+
+        Yields:
+            daily cost records (see CONST_DAILY_COST_COLUMNS)
+        Returns:
+            success - flag if the action was succesful
+            error - error message
+        """
+
+        cursor = self.connection.execute(
+            "SELECT subscription_id, usage_date, cost, rows FROM daily_costs "
+            + "WHERE usage_date >= ? AND usage_date <= ? "
+            + "ORDER BY subscription_id, usage_date",
+            (date_first or "", date_last or "9999"),
+        )
+
+        for record in cursor:
+            yield list(record)
+
+        return True, None
+
+    def _aggregate(self, date_first, date_last):
+        """
+        Recomputes the daily costs of a date range.
+
+        """
+
+        self.connection.execute(
+            "DELETE FROM daily_costs WHERE usage_date BETWEEN ? AND ?",
+            (date_first, date_last),
+        )
+        self.connection.execute(
+            "INSERT INTO daily_costs SELECT subscription_id, usage_date, "
+            + "SUM(cost), COUNT(*) FROM usage_rows "
+            + "WHERE usage_date BETWEEN ? AND ? "
+            + "GROUP BY subscription_id, usage_date",
+            (date_first, date_last),
+        )
+
+
+def download_usage_range(crawler, date_from, date_to, window_days, workers):
+    """
+    Downloads the usage data of a date range in windows and merges them into
+        one file, in a directory of its own (in CONST_USAGE_PATH).
+
+    The windows are downloaded by the crawler one after the other, or by a
+        pool of browsers. A window that was downloaded before and has
+        settled is reused. The windows downloaded before a failure are kept,
+        so that the download can be run again to fetch just the rest.
+
+    Arguments:
+        crawler - logged in eduhub crawler object (turned off if more than
+            one worker is used)
+        date_from - first day of the range (date)
+        date_to - last day of the range (date)
+        window_days - days per window
+        workers - number of browsers to download with
+
+    Returns:
+        success - flag if the action was succesful
+        error - error message
+        usage_file_path - path to the merged usage file
+    """
+
+    if date_from > date_to:
+        error = "The usage period starts after it ends (%s - %s)." % (
+            date_from,
+            date_to,
+        )
+        log(error, level=0)
+        return False, error, None
+
+    today = datetime.now().date()
+
+    if date_from > today:
+        error = "The usage period starts in the future (%s)." % (date_from)
+        log(error, level=0)
+        return False, error, None
+
+    # the portal has no usage data of the days to come
+    if date_to > today:
+        log(
+            "The usage period ends in the future (%s), downloading until "
+            "today." % (date_to),
+            level=1,
+        )
+        date_to = today
+
+    windows = usage_windows(date_from, date_to, window_days)
+    settled = datetime.now() - timedelta(days=CONST_USAGE_SETTLED_DAYS)
+
+    file_paths = {}
+    missing = []
+
+    for window in windows:
+        window_path = _window_file(window)
+
+        if window[1] < settled and os.path.isfile(window_path):
+            file_paths[window] = window_path
+        else:
+            missing.append(window)
+
+    log(
+        "Usage data for %s - %s: %d windows, %d downloaded before."
+        % (date_from, date_to, len(windows), len(windows) - len(missing)),
+        level=1,
+    )
+
+    success = True
+    error = None
+    downloaded = {}
+
+    if workers > 1 and len(missing) > 1:
+        from educrawler.pool import download_usage_parallel
+
+        success, error, downloaded = download_usage_parallel(
+            crawler, missing, workers
+        )
+    else:
+        for window in missing:
+            success, error, file_path = crawler.download_usage(*window)
+
+            if not success:
+                break
+
+            downloaded[window] = file_path
+
+    # the settled windows are kept even if some windows failed, they are
+    #   not downloaded again, the others are removed once merged
+    os.makedirs(CONST_USAGE_WINDOWS_DIR, exist_ok=True)
+
+    temp_paths = []
+
+    for window, file_path in downloaded.items():
+        if window[1] < settled:
+            file_paths[window] = _window_file(window)
+
+            shutil.move(file_path, file_paths[window])
+            shutil.rmtree(os.path.dirname(file_path), ignore_errors=True)
+        else:
+            file_paths[window] = file_path
+            temp_paths.append(file_path)
+
+    if not success:
+        _remove_downloads(temp_paths)
+        log(error, level=0)
+        return success, error, None
+
+    # the windows may all have been kept from earlier runs
+    os.makedirs(CONST_USAGE_PATH, exist_ok=True)
+    download_dir = tempfile.mkdtemp(prefix="ec_usage_", dir=CONST_USAGE_PATH)
+    usage_file_path = os.path.join(
+        download_dir,
+        "usage_%s_%s.csv"
+        % (date_from.strftime("%Y%m%d"), date_to.strftime("%Y%m%d")),
+    )
+
+    rows = merge_usage_files(
+        [file_paths[window] for window in windows], usage_file_path
+    )
+
+    _remove_downloads(temp_paths)
+
+    log(
+        "Usage data (%d rows) merged to %s" % (rows, usage_file_path),
+        level=1,
+    )
+
+    return True, None, usage_file_path
+
+
+def usage_windows(date_from, date_to, window_days):
+    """
+    Splits a date range into windows of whole days. The last window ends
+        now at the latest, the portal does not take future times, and the
+        windows starting after now are left out.
+
+    Arguments:
+        date_from - first day of the range (date)
+        date_to - last day of the range (date)
+        window_days - days per window
+
+    Returns:
+        list of (start, end) datetime pairs
+    """
+
+    now = datetime.now().replace(microsecond=0)
+    windows = []
+
+    day = date_from
+    while day <= date_to:
+        last_day = min(day + timedelta(days=window_days - 1), date_to)
+
+        start_dt = datetime(day.year, day.month, day.day)
+        end_dt = datetime(
+            last_day.year, last_day.month, last_day.day, 23, 59, 59
+        )
+
+        if start_dt > now:
+            break
+
+        windows.append((start_dt, min(end_dt, now)))
+
+        day = last_day + timedelta(days=1)
+
+    return windows
+
+
+def merge_usage_files(file_paths, target_path):
+    """
+    Merges usage files into one, leaving out the rows repeated in them (e.g.
+        of the days at the edges of the windows). The files are read a row
+        at a time, only a digest of each row is kept in memory.
+
+    The columns are those of the first file, the columns of the other files
+        are matched by name.
+
+    Arguments:
+        file_paths - paths to the usage files
+        target_path - path to the merged file
+
+    Returns:
+        rows - number of rows in the merged file
+    """
+
+    header = None
+    digests = set()
+    rows = 0
+
+    with open(target_path, "w", newline="", encoding="utf-8") as target:
+        writer = csv.writer(target)
+
+        for file_path in file_paths:
+            with open(
+                file_path, "r", newline="", encoding="utf-8-sig"
+            ) as file:
+                reader = csv.reader(file)
+
+                try:
+                    file_header = next(reader)
+                except StopIteration:
+                    continue
+
+                if header is None:
+                    header = file_header
+                    writer.writerow(header)
+
+                if file_header == header:
+                    order = None
+                else:
+                    order = [
+                        file_header.index(name)
+                        if name in file_header
+                        else None
+                        for name in header
+                    ]
+
+                for values in reader:
+                    if order is not None:
+                        values = [
+                            values[index]
+                            if index is not None and index < len(values)
+                            else ""
+                            for index in order
+                        ]
+
+                    digest = hashlib.sha1(
+                        json.dumps(values).encode("utf-8")
+                    ).digest()
+
+                    if digest in digests:
+                        continue
+
+                    digests.add(digest)
+                    writer.writerow(values)
+                    rows += 1
+
+    return rows
+
+
+def _remove_downloads(file_paths):
+    """
+    Removes downloaded usage files along with their download directories.
+
+    """
+
+    for file_path in file_paths:
+        shutil.rmtree(os.path.dirname(file_path), ignore_errors=True)
+
+
+def _window_file(window):
+    """
+    Path to the usage file of a window.
+
+    """
+
+    return os.path.join(
+        CONST_USAGE_WINDOWS_DIR,
+        "usage_%s_%s.csv"
+        % (window[0].strftime("%Y%m%d"), window[1].strftime("%Y%m%d")),
+    )
+
+
+class _RowParser:
+    """
+    Parses the rows of a usage file into usage_rows values, with the date
+        format of the file (see _find_date_format).
+
+    """
+
+    def __init__(self, header, columns, date_format):
+        """
+        Arguments:
+            header - column names of the file
+            columns - (date, cost, subscription id) column indices, the cost
+                and subscription id can be None
+            date_format - date format of the file, None if it has no dates
+        """
+
+        self.header = header
+        self.date_index, self.cost_index, self.subscription_index = columns
+        self.date_format = date_format
+
+        # the row's identity leaves out its measures
+        self.key_indices = [
+            index
+            for index, name in enumerate(header)
+            if not any(word in _normalise(name) for word in _MEASURE_WORDS)
+        ]
+
+        # digests of the identities of the rows parsed, and how many times
+        #   the repeated ones were repeated
+        self.digests = set()
+        self.repeats = {}
+
+    def parse(self, values):
+        """
+        Parses a row.
+
+        Arguments:
+            values - values of the row
+
+        Returns:
+            (row key, date, subscription id, cost, row JSON), None if the
+                row has no date
+
+        Raises:
+            ValueError - if the date does not match the file's date format
+        """
+
+        if len(values) < len(self.header):
+            return None
+
+        usage_date = self._parse_date(values[self.date_index])
+
+        if usage_date is None:
+            return None
+
+        cost = None
+        if self.cost_index is not None:
+            cost = _parse_number(values[self.cost_index])
+
+        subscription_id = None
+        if self.subscription_index is not None:
+            subscription_id = values[self.subscription_index].strip().lower()
+
+        identity = [values[index] for index in self.key_indices]
+        digest = hashlib.sha1(json.dumps(identity).encode("utf-8")).digest()
+
+        # the first row with an identity is keyed by the identity, the
+        #   repeated ones also by their number
+        if digest not in self.digests:
+            self.digests.add(digest)
+            key = digest.hex()
+        else:
+            self.repeats[digest] = self.repeats.get(digest, 0) + 1
+
+            key = hashlib.sha1(
+                json.dumps(identity + [self.repeats[digest]]).encode("utf-8")
+            ).hexdigest()
+
+        return (
+            key,
+            usage_date,
+            subscription_id,
+            cost,
+            json.dumps(dict(zip(self.header, values))),
+        )
+
+    def _parse_date(self, value):
+        """
+        Parses a date to YYYY-MM-DD, None if it is empty.
+
+        """
+
+        value = value.strip()
+
+        if len(value) == 0:
+            return None
+
+        try:
+            usage_date = datetime.strptime(value, self.date_format)
+        except (TypeError, ValueError):
+            raise ValueError(
+                "date %s does not match the file's date format %s."
+                % (value, self.date_format)
+            )
+
+        return usage_date.strftime("%Y-%m-%d")
+
+
+def _find_date_format(csv_path, date_index):
+    """
+    Finds the date format of a usage file, reading its dates until only one
+        of _DATE_FORMATS matches them all (e.g. until a day after the 12th
+        tells day first dates from month first ones). If several still
+        match at the end of the file, the first of them is used.
+
+    Arguments:
+        csv_path - path to the usage CSV file
+        date_index - index of the date column
+
+    Returns:
+        success - flag if a format matches the dates
+        error - error message
+        date_format - date format, None if the file has no dates
+    """
+
+    date_formats = _DATE_FORMATS
+    found = False
+
+    with open(csv_path, "r", newline="", encoding="utf-8-sig") as file:
+        reader = csv.reader(file)
+
+        next(reader, None)
+
+        for values in reader:
+            if len(values) <= date_index:
+                continue
+
+            value = values[date_index].strip()
+
+            if len(value) == 0:
+                continue
+
+            found = True
+            matching = []
+
+            for date_format in date_formats:
+                try:
+                    datetime.strptime(value, date_format)
+                except ValueError:
+                    continue
+
+                matching.append(date_format)
+
+            if len(matching) == 0:
+                return (
+                    False,
+                    "Usage file %s: date %s does not match the format of "
+                    "the dates before it (or any known format)."
+                    % (csv_path, value),
+                    None,
+                )
+
+            date_formats = matching
+
+            if len(date_formats) == 1:
+                break
+
+    if not found:
+        return True, None, None
+
+    if len(date_formats) > 1:
+        log(
+            "The dates of %s match several formats (%s), reading them as %s."
+            % (csv_path, ", ".join(date_formats), date_formats[0]),
+            level=1,
+        )
+
+    return True, None, date_formats[0]
+
+
+def _find_columns(header):
+    """
+    Finds the date, cost and subscription id columns of a usage file.
+
+    Arguments:
+        header - column names of the file
+
+    Returns:
+        success - flag if the date column was found
+        error - error message
+        columns - (date, cost, subscription id) column indices, the cost and
+            subscription id are None if not found
+    """
+
+    names = [_normalise(name) for name in header]
+
+    date_index = _find_column(names, _DATE_COLUMNS, "date")
+    cost_index = _find_column(names, _COST_COLUMNS, "cost")
+    subscription_index = _find_column(
+        names, _SUBSCRIPTION_COLUMNS, "subscription"
+    )
+
+    if date_index is None:
+        return (
+            False,
+            "Could not find the date column of the usage file (columns: %s)."
+            % (", ".join(header)),
+            None,
+        )
+
+    for name, index in [
+        ("cost", cost_index),
+        ("subscription", subscription_index),
+    ]:
+        if index is None:
+            log(
+                "Could not find the %s column of the usage file." % (name),
+                level=1,
+            )
+
+    return True, None, (date_index, cost_index, subscription_index)
+
+
+def _find_column(names, preferred, word):
+    """
+    Index of the first preferred column name, or else of the first name
+        containing a word, None if there is neither.
+
+    """
+
+    for name in preferred:
+        if name in names:
+            return names.index(name)
+
+    for index, name in enumerate(names):
+        if word in name:
+            return index
+
+    return None
+
+
+def _normalise(name):
+    """
+    Column name in lower case, letters and digits only.
+
+    """
+
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def _parse_number(value):
+    """
+    Parses a cost (e.g. "$1,234.50"), None if it is not a number.
+
+    """
+
+    value = value.strip()
+
+    # (1.00) is how accounting exports write negative amounts
+    negative = value.startswith("(") and value.endswith(")")
+
+    try:
+        number = float(_NUMBER_PATTERN.sub("", value))
+    except ValueError:
+        return None
+
+    return -number if negative else number
@@ -2,14 +2,16 @@
 Utilities module.
 """
 
+import sys
 from datetime import datetime, timezone
 
-from educrawler.constants import CONST_VERBOSE_LEVEL
+from educrawler.constants import CONST_VERBOSE_LEVEL, CONST_TIME_FORMAT
 
 
 def log(message, level=3, indent=0):
     """
-    Log output to screen.
+    Log output to screen (stderr, the records and paths the actions output
+        go to stdout).
 
     Arguments:
         message: log message
@@ -30,4 +32,40 @@ def log(message, level=3, indent=0):
         for _ in range(indent):
             indent_str += "  "
 
-        print("%s | %s%s" % (utc_timestamp, indent_str, message))
+        print(
+            "%s | %s%s" % (utc_timestamp, indent_str, message),
+            file=sys.stderr,
+        )
+
+
+def to_json_value(value):
+    """
+    Converts values json does not know (crawl times) to strings. To be used
+        as the default function of json.dump(s).
+
+    Arguments:
+        value: value to convert
+    Returns:
+        the value as a string
+    """
+
+    if isinstance(value, datetime):
+        return value.strftime(CONST_TIME_FORMAT)
+
+    raise TypeError("%s is not JSON serializable" % (type(value)))
+
+
+def parse_time(value):
+    """
+    Converts a crawl time string (see to_json_value) back to a datetime.
+
+    Arguments:
+        value: crawl time string or None
+    Returns:
+        crawl time as a datetime, None if not given
+    """
+
+    if value is None:
+        return None
+
+    return datetime.strptime(value, CONST_TIME_FORMAT)
@@ -0,0 +1,116 @@
+"""
+Condition-based waiting module.
+"""
+
+from time import time
+
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+)
+from selenium.webdriver.support.ui import WebDriverWait
+
+from educrawler import tracing
+from educrawler.utilities import log
+
+from educrawler.constants import (
+    CONST_REFRESH_SLEEP_TIME,
+    CONST_TIMEOUT,
+)
+
+
+class Waiter:
+    """
+    Waits for conditions on the portal page and keeps per-stage timings.
+
+    A wait returns as soon as its condition holds, there are no fixed
+        pauses between the crawling stages.
+    """
+
+    def __init__(self, client):
+        """
+        Creates a waiter for a webdriver client.
+
+        Arguments:
+            client - webdriver client
+        """
+
+        self.client = client
+        self.timings = {}
+
+    def until(self, stage, condition, timeout=CONST_TIMEOUT, indent=2):
+        """
+        Waits until the condition returns a truthy value.
+
+        Arguments:
+            stage - name of the stage being waited for (used for timings)
+            condition - callable taking the webdriver client and returning
+                a truthy value once the page is ready
+            timeout - time out in seconds
+            indent - log indentation level
+
+        Returns:
+            success - flag if the condition was met before the time out
+            error - error message
+            result - the value returned by the condition
+        """
+
+        success = True
+        error = None
+        result = None
+
+        log("Waiting for %s.." % (stage), level=3, indent=indent)
+
+        time_start = time()
+
+        try:
+            result = WebDriverWait(
+                self.client,
+                timeout,
+                poll_frequency=CONST_REFRESH_SLEEP_TIME,
+                ignored_exceptions=(
+                    NoSuchElementException,
+                    StaleElementReferenceException,
+                ),
+            ).until(condition)
+        except TimeoutException:
+            success = False
+            error = "ERROR: Time out (%d) while waiting for %s" % (
+                timeout,
+                stage,
+            )
+
+        time_elapsed = time() - time_start
+
+        self.timings.setdefault(stage, []).append(time_elapsed)
+        tracing.record(stage, time_start, time_elapsed)
+
+        if success:
+            log(
+                "%s ready in %.2fs." % (stage.capitalize(), time_elapsed),
+                level=2,
+                indent=indent,
+            )
+
+        return success, error, result
+
+    def report(self):
+        """
+        Logs the total and average time spent waiting in each stage.
+
+        """
+
+        if len(self.timings) == 0:
+            return
+
+        log("Wait timings:", level=2)
+
+        for stage, durations in self.timings.items():
+            total = sum(durations)
+            log(
+                "%s: %d wait(s), total %.2fs, average %.2fs"
+                % (stage, len(durations), total, total / len(durations)),
+                level=2,
+                indent=2,
+            )
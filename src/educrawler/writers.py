@@ -0,0 +1,623 @@
+"""
+Output writers module.
+
+Each writer takes records (lists of column values) one at a time. The file
+    writers flush every record as soon as it is written, except for the
+    columnar (Parquet, Arrow) files, which are written when closed.
+"""
+
+import os
+import csv
+import json
+import sqlite3
+from calendar import timegm
+from datetime import date, datetime
+
+from educrawler.utilities import log
+from educrawler.records import sql_types
+
+from educrawler.constants import (
+    CONST_OUTPUT_TABLE,
+    CONST_OUTPUT_CSV,
+    CONST_OUTPUT_JSON,
+    CONST_OUTPUT_JSONL,
+    CONST_OUTPUT_DF,
+    CONST_OUTPUT_PARQUET,
+    CONST_OUTPUT_SQLITE,
+    CONST_OUTPUT_EXTENSIONS,
+    CONST_OUTPUT_KEY_COLUMNS,
+    CONST_TIME_FORMAT,
+    CONST_DEFAULT_OUTPUT_FILE_NAME,
+    CONST_COURSE_COLUMNS,
+    CONST_COURSE_TYPED_COLUMNS,
+    CONST_HANDOUT_COLUMNS,
+    CONST_HANDOUT_TYPED_COLUMNS,
+    CONST_DAILY_COST_COLUMNS,
+)
+
+
+class TableWriter:
+    """
+    Prints the records as a table. The columns can only be aligned once all
+        the records are known, so the table is printed when closed.
+
+    """
+
+    def __init__(self, columns):
+        """
+        Arguments:
+            columns - column names
+        """
+
+        self.columns = columns
+        self.data = []
+
+    def write(self, record):
+        """
+        Adds a record to the table.
+
+        """
+
+        self.data.append(record)
+
+    def close(self):
+        """
+        Prints the table.
+
+        """
+
+        # imported when needed, to start up quickly
+        from tabulate import tabulate
+
+        print(
+            tabulate(
+                self.data,
+                headers=self.columns,
+                tablefmt="psql",
+                showindex=False,
+            )
+        )
+
+
+class DataFrameWriter:
+    """
+    Collects the records into a pandas dataframe (self.result) when closed.
+
+    """
+
+    def __init__(self, columns, convert=None):
+        """
+        Arguments:
+            columns - column names
+            convert - function converting the dataframe when closed
+                (optional)
+        """
+
+        self.columns = columns
+        self.convert = convert
+        self.data = []
+        self.result = None
+
+    def write(self, record):
+        """
+        Adds a record to the dataframe.
+
+        """
+
+        self.data.append(record)
+
+    def close(self):
+        """
+        Creates the dataframe.
+
+        """
+
+        import pandas as pd
+
+        self.result = pd.DataFrame(self.data, columns=self.columns)
+
+        if self.convert is not None:
+            self.result = self.convert(self.result)
+
+
+class CsvWriter:
+    """
+    Writes the records to a CSV file. Like pandas' to_csv, the first column
+        is the row number, with an empty header.
+
+    """
+
+    def __init__(self, columns, file_path, append=False):
+        """
+        Arguments:
+            columns - column names
+            file_path - path to the output file
+            append - add the records to the end of an existing file
+        """
+
+        self.columns = columns
+        self.file_path = file_path
+        self.append = append
+        self.file = None
+        self.csv_writer = None
+        self.index = 0
+
+    def write(self, record):
+        """
+        Writes a record to the file.
+
+        """
+
+        if self.file is None:
+            # the header is only written to a new file
+            new_file = not (self.append and _file_has_data(self.file_path))
+
+            # the row numbers go on from the rows already in the file
+            if not new_file:
+                self.index = _csv_rows(self.file_path)
+
+            self.file = open(
+                self.file_path, "w" if new_file else "a", newline=""
+            )
+            self.csv_writer = csv.writer(self.file)
+
+            if new_file:
+                self.csv_writer.writerow([""] + list(self.columns))
+
+        self.csv_writer.writerow(
+            [self.index] + ["" if value is None else value for value in record]
+        )
+        self.index += 1
+        self.file.flush()
+
+    def close(self):
+        """
+        Closes the file.
+
+        """
+
+        if self.file is not None:
+            self.file.close()
+            log("Output written to %s" % (self.file_path), level=1)
+
+
+class JsonLinesWriter:
+    """
+    Writes the records to a JSON Lines file, one JSON object per line.
+
+    """
+
+    def __init__(self, columns, file_path, append=False):
+        """
+        Arguments:
+            columns - column names
+            file_path - path to the output file
+            append - add the records to the end of an existing file
+        """
+
+        self.columns = columns
+        self.file_path = file_path
+        self.append = append
+        self.file = None
+
+    def _open(self):
+        """
+        Opens the output file.
+
+        """
+
+        self.file = open(self.file_path, "a" if self.append else "w")
+
+    def _write_object(self, record):
+        """
+        Writes a record as a JSON object.
+
+        """
+
+        json.dump(
+            dict(zip(self.columns, record)),
+            self.file,
+            default=_json_value,
+            ensure_ascii=False,
+        )
+
+    def write(self, record):
+        """
+        Writes a record to the file.
+
+        """
+
+        if self.file is None:
+            self._open()
+
+        self._write_object(record)
+        self.file.write("\n")
+        self.file.flush()
+
+    def close(self):
+        """
+        Closes the file.
+
+        """
+
+        if self.file is not None:
+            self.file.close()
+            log("Output written to %s" % (self.file_path), level=1)
+
+
+class JsonWriter(JsonLinesWriter):
+    """
+    Writes the records to a file as a JSON array of objects.
+
+    """
+
+    def write(self, record):
+        """
+        Writes a record to the file.
+
+        """
+
+        if self.file is None:
+            self._open()
+            self.file.write("[")
+        else:
+            self.file.write(",")
+
+        self._write_object(record)
+        self.file.flush()
+
+    def close(self):
+        """
+        Closes the array and the file.
+
+        """
+
+        if self.file is None:
+            self._open()
+            self.file.write("[")
+
+        self.file.write("]")
+
+        super().close()
+
+
+class ColumnarWriter(DataFrameWriter):
+    """
+    Writes the records to a Parquet or an Arrow IPC (Feather) file, with
+        pyarrow. The file is written at once when closed.
+
+    When appended to, the existing file is read and written again with the
+        records, the records with the same key (CONST_OUTPUT_KEY_COLUMNS)
+        as existing ones replacing them.
+    """
+
+    def __init__(
+        self, columns, file_path, file_format, append=False, convert=None
+    ):
+        """
+        Arguments:
+            columns - column names
+            file_path - path to the output file
+            file_format - CONST_OUTPUT_PARQUET or CONST_OUTPUT_ARROW
+            append - add the records to the existing file
+            convert - function converting the dataframe before it is
+                written (optional)
+        """
+
+        super().__init__(columns, convert=convert)
+
+        self.file_path = file_path
+        self.file_format = file_format
+        self.append = append
+
+    def close(self):
+        """
+        Writes the file.
+
+        """
+
+        import pandas as pd
+
+        super().close()
+
+        records_df = self.result
+        self.result = None
+
+        if self.append and os.path.isfile(self.file_path):
+            records_df = pd.concat(
+                [self._read(), records_df], ignore_index=True
+            )
+
+            key = [
+                column
+                for column in CONST_OUTPUT_KEY_COLUMNS
+                if column in records_df.columns
+            ]
+
+            if len(key) == len(CONST_OUTPUT_KEY_COLUMNS):
+                records_df = records_df.drop_duplicates(
+                    subset=key, keep="last", ignore_index=True
+                )
+
+        # replaced at once, a failed write does not lose the existing file
+        temp_path = "%s.%d" % (self.file_path, os.getpid())
+
+        if self.file_format == CONST_OUTPUT_PARQUET:
+            records_df.to_parquet(temp_path, index=False)
+        else:
+            records_df.to_feather(temp_path)
+
+        os.replace(temp_path, self.file_path)
+
+        log(
+            "Output (%d records) written to %s"
+            % (len(records_df), self.file_path),
+            level=1,
+        )
+
+    def _read(self):
+        """
+        Reads the existing file.
+
+        """
+
+        import pandas as pd
+
+        if self.file_format == CONST_OUTPUT_PARQUET:
+            return pd.read_parquet(self.file_path)
+
+        return pd.read_feather(self.file_path)
+
+
+class SqliteWriter:
+    """
+    Writes the records to a table of a SQLite database, named by the kind
+        of the records (handouts, courses, ..). The other tables of the
+        database are kept.
+
+    The table is replaced, unless appended to. The records with the same
+        key (CONST_OUTPUT_KEY_COLUMNS) as existing ones replace them.
+    """
+
+    def __init__(self, columns, file_path, append=False):
+        """
+        Arguments:
+            columns - column names
+            file_path - path to the database
+            append - add the records to the existing table
+        """
+
+        self.columns = columns
+        self.file_path = file_path
+        self.append = append
+        self.table = _record_name(columns)
+        self.connection = None
+        self.insert = None
+        self.rows = 0
+
+    def _open(self):
+        """
+        Opens the database and creates the table.
+
+        """
+
+        self.connection = sqlite3.connect(self.file_path)
+
+        types = sql_types(self.columns) or [""] * len(self.columns)
+
+        names = ", ".join(
+            ("%s %s" % (_sql_name(column), column_type)).strip()
+            for column, column_type in zip(self.columns, types)
+        )
+
+        if all(column in self.columns for column in CONST_OUTPUT_KEY_COLUMNS):
+            names += ", PRIMARY KEY (%s)" % (
+                ", ".join(
+                    _sql_name(column) for column in CONST_OUTPUT_KEY_COLUMNS
+                )
+            )
+
+        with self.connection:
+            if not self.append:
+                self.connection.execute(
+                    "DROP TABLE IF EXISTS %s" % (_sql_name(self.table))
+                )
+
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS %s (%s)"
+                % (_sql_name(self.table), names)
+            )
+
+        self.insert = "INSERT OR REPLACE INTO %s (%s) VALUES (%s)" % (
+            _sql_name(self.table),
+            ", ".join(_sql_name(column) for column in self.columns),
+            ", ".join(["?"] * len(self.columns)),
+        )
+
+    def write(self, record):
+        """
+        Writes a record to the table.
+
+        """
+
+        if self.connection is None:
+            self._open()
+
+        with self.connection:
+            self.connection.execute(
+                self.insert, [_sql_value(value) for value in record]
+            )
+
+        self.rows += 1
+
+    def close(self):
+        """
+        Closes the database.
+
+        """
+
+        if self.connection is None:
+            self._open()
+
+        self.connection.close()
+
+        log(
+            "Output (%d records) written to the %s table of %s"
+            % (self.rows, self.table, self.file_path),
+            level=1,
+        )
+
+
+def get_writer(
+    output, columns, convert_df=None, file_path=None, append=False
+):
+    """
+    Creates a writer for the chosen output type.
+
+    Arguments:
+        output - output type
+        columns - column names of the records
+        convert_df - function converting the dataframe of the df, parquet
+            and arrow outputs (optional)
+        file_path - path to the output file (default:
+            CONST_DEFAULT_OUTPUT_FILE_NAME with the output's extension)
+        append - add the records to the existing output file
+
+    Returns:
+        writer - writer object, None if the output type is unrecognised or
+            the output can not be written
+    """
+
+    if output == CONST_OUTPUT_TABLE:
+        return TableWriter(columns)
+
+    if output == CONST_OUTPUT_DF:
+        return DataFrameWriter(columns, convert=convert_df)
+
+    if output not in CONST_OUTPUT_EXTENSIONS:
+        log("Unrecognised type of output. Skipping.", level=0)
+        return None
+
+    if file_path is None:
+        file_path = "%s.%s" % (
+            CONST_DEFAULT_OUTPUT_FILE_NAME,
+            CONST_OUTPUT_EXTENSIONS[output],
+        )
+
+    if output == CONST_OUTPUT_CSV:
+        return CsvWriter(columns, file_path, append=append)
+
+    if output == CONST_OUTPUT_JSON:
+        if append:
+            log(
+                "A JSON array can not be appended to, use the jsonl output.",
+                level=0,
+            )
+            return None
+
+        return JsonWriter(columns, file_path)
+
+    if output == CONST_OUTPUT_JSONL:
+        return JsonLinesWriter(columns, file_path, append=append)
+
+    if output == CONST_OUTPUT_SQLITE:
+        return SqliteWriter(columns, file_path, append=append)
+
+    # the parquet and arrow outputs need pyarrow, which is optional
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        log(
+            "The %s output needs pyarrow (pip install pyarrow)." % (output),
+            level=0,
+        )
+        return None
+
+    return ColumnarWriter(
+        columns, file_path, output, append=append, convert=convert_df
+    )
+
+
+def _file_has_data(file_path):
+    """
+    Checks if a file exists and is not empty.
+
+    """
+
+    return os.path.isfile(file_path) and os.path.getsize(file_path) > 0
+
+
+def _csv_rows(file_path):
+    """
+    Counts the records of a CSV file, leaving out its header.
+
+    """
+
+    with open(file_path, "r", newline="") as csv_file:
+        return max(sum(1 for _ in csv.reader(csv_file)) - 1, 0)
+
+
+def _record_name(columns):
+    """
+    Name of the kind of the records with the given columns, "records" if
+        they are of no known kind.
+
+    """
+
+    for name, record_columns in [
+        ("courses", CONST_COURSE_COLUMNS),
+        ("courses", CONST_COURSE_TYPED_COLUMNS),
+        ("handouts", CONST_HANDOUT_COLUMNS),
+        ("handouts", CONST_HANDOUT_TYPED_COLUMNS),
+        ("daily_costs", CONST_DAILY_COST_COLUMNS),
+    ]:
+        if list(columns) == record_columns:
+            return name
+
+    return "records"
+
+
+def _sql_name(name):
+    """
+    Quotes a table or column name for SQLite.
+
+    """
+
+    return '"%s"' % (name.replace('"', '""'))
+
+
+def _sql_value(value):
+    """
+    Converts values SQLite does not know: the crawl times to
+        CONST_TIME_FORMAT strings (as in the history store), the dates to
+        YYYY-MM-DD and lists (subscription users) to JSON arrays.
+
+    """
+
+    if isinstance(value, datetime):
+        return value.strftime(CONST_TIME_FORMAT)
+
+    if isinstance(value, date):
+        return value.isoformat()
+
+    if isinstance(value, (list, tuple)):
+        return json.dumps(value, ensure_ascii=False)
+
+    return value
+
+
+def _json_value(value):
+    """
+    Converts values json does not know (crawl times) the way pandas does
+        in its JSON output: to milliseconds since the epoch. The dates of
+        the typed records are written as YYYY-MM-DD.
+
+    """
+
+    if isinstance(value, datetime):
+        return timegm(value.timetuple()) * 1000 + value.microsecond // 1000
+
+    if isinstance(value, date):
+        return value.isoformat()
+
+    raise TypeError("%s is not JSON serializable" % (type(value)))
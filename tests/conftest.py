@@ -0,0 +1,60 @@
+"""
+Test configuration: the tests import educrawler from the source tree.
+
+The make_handout fixture builds the handout records of the tests.
+"""
+
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+
+
+def _handout(
+    handout_name="Handout",
+    course_name="Course",
+    lab_name="lab",
+    budget="$100.00",
+    consumed="$10.00",
+    subscription_id=None,
+    expiry="2021-09-30",
+    crawl_time=datetime(2021, 9, 1, 12, 30, 15, 250),
+):
+    """
+    A handout record (see CONST_HANDOUT_COLUMNS), of the "sub-<handout
+        name>" subscription unless given.
+
+    """
+
+    if subscription_id is None:
+        subscription_id = "sub-%s" % (handout_name)
+
+    return [
+        course_name,
+        lab_name,
+        handout_name,
+        budget,
+        consumed,
+        "done",
+        handout_name,
+        subscription_id,
+        "Active",
+        expiry,
+        ["student@example.com"],
+        crawl_time,
+    ]
+
+
+@pytest.fixture
+def make_handout():
+    """
+    Factory of handout records, see _handout for its arguments.
+
+    """
+
+    return _handout
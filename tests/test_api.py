@@ -0,0 +1,247 @@
+"""
+Tests of the REST API backend (api.py) against a local stub server
+    replaying the responses of tests/data/api_responses.json.
+
+The responses are those of the synthetic tenant of the portal fixture
+    (benchmarks/portal_fixture.py, 10 handouts), so that both backends
+    crawl the same courses, labs and handouts.
+"""
+
+import os
+import sys
+import json
+import shutil
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from datetime import datetime
+
+import pytest
+
+from educrawler.api import ApiCrawler
+from educrawler.constants import CONST_HANDOUT_COLUMNS
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+sys.path.insert(0, os.path.join(_HERE, os.pardir, "benchmarks"))
+
+from portal_fixture import (  # noqa: E402
+    TENANT_SIZES,
+    PortalFixture,
+    make_tenant,
+)
+
+_TOKEN = "replay-token"
+
+
+class ReplayServer(HTTPServer):
+    """
+    HTTP server replaying recorded responses by request path, 404 for the
+        paths without one.
+
+    """
+
+    def __init__(self, responses):
+        HTTPServer.__init__(self, ("127.0.0.1", 0), _ReplayHandler)
+
+        self.responses = responses
+        self.requests = []
+
+    @property
+    def address(self):
+        return "http://127.0.0.1:%d" % (self.server_port)
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append(
+            (self.path, self.headers.get("Authorization"))
+        )
+
+        response = self.server.responses.get(self.path)
+
+        if response is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        body = (
+            json.dumps(response)
+            .replace("{address}", self.server.address)
+            .encode("utf-8")
+        )
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", "%d" % (len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def replay_server():
+    with open(os.path.join(_HERE, "data", "api_responses.json")) as file:
+        responses = json.load(file)
+
+    server = ReplayServer(responses)
+
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}
+    )
+    thread.daemon = True
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def _dom_handouts_df(tenant):
+    """
+    The handouts of the fixture tenant as the browser backend reads them
+        from the fixture's blades: the lab names, the amounts and the
+        handout statuses in lower case, the expiry dates as YYYY-MM-DD.
+
+    """
+
+    import pandas as pd
+
+    records = []
+
+    for course in tenant["courses"]:
+        for lab in course["labs"]:
+            for handout in lab["handouts"]:
+                records.append(
+                    [
+                        course["name"],
+                        lab["name"].lower(),
+                        handout["name"],
+                        handout["budget"].lower(),
+                        handout["consumed"].lower(),
+                        handout["status"].lower(),
+                        handout["name"],
+                        handout["sub_id"],
+                        handout["sub_status"],
+                        datetime.strptime(
+                            handout["expiry"], "%b %d, %Y"
+                        ).strftime("%Y-%m-%d"),
+                        handout["users"],
+                        None,
+                    ]
+                )
+
+    return pd.DataFrame(records, columns=CONST_HANDOUT_COLUMNS)
+
+
+def _comparable(handouts_df):
+    """
+    The handouts without their crawl times, which differ between crawls.
+
+    """
+
+    return handouts_df.drop(columns=[CONST_HANDOUT_COLUMNS[-1]]).reset_index(
+        drop=True
+    )
+
+
+def test_eduhub_details_match_the_fixture(replay_server):
+    crawler = ApiCrawler(_TOKEN, api_address=replay_server.address)
+
+    success, error, handouts_df = crawler.get_eduhub_details()
+
+    assert success, error
+    assert list(handouts_df.columns) == CONST_HANDOUT_COLUMNS
+    assert handouts_df[CONST_HANDOUT_COLUMNS[-1]].notna().all()
+
+    expected_df = _dom_handouts_df(make_tenant(*TENANT_SIZES[10]))
+
+    assert _comparable(handouts_df).equals(_comparable(expected_df))
+
+    # every request is authorized, the paged handout list is followed
+    assert all(
+        authorization == "Bearer %s" % (_TOKEN)
+        for _, authorization in replay_server.requests
+    )
+    assert any("page=2" in path for path, _ in replay_server.requests)
+
+
+def test_course_details_of_a_lab(replay_server):
+    crawler = ApiCrawler(_TOKEN, api_address=replay_server.address)
+
+    success, error, handouts_df = crawler.get_course_details_df(
+        "Course 000", lab_name="lab 01"
+    )
+
+    assert success, error
+    assert list(handouts_df["Handout name"]) == [
+        "Handout %05d" % (number) for number in range(5, 10)
+    ]
+
+
+def test_missing_course(replay_server):
+    crawler = ApiCrawler(_TOKEN, api_address=replay_server.address)
+
+    success, error, _ = crawler.get_course_details_df("Course 999")
+
+    assert not success
+    assert "Course 999" in error
+
+
+def test_failed_request(replay_server):
+    replay_server.responses = {}
+
+    crawler = ApiCrawler(_TOKEN, api_address=replay_server.address)
+
+    success, error, _ = crawler.get_eduhub_details()
+
+    assert not success
+    assert "404" in error
+
+
+@pytest.mark.skipif(
+    shutil.which("chromedriver") is None
+    and "EC_CHROMEDRIVER" not in os.environ,
+    reason="needs Chrome and chromedriver",
+)
+def test_same_frame_as_the_browser_backend(replay_server, monkeypatch):
+    from educrawler import crawler as crawler_module
+
+    tenant = make_tenant(*TENANT_SIZES[10])
+
+    fixture = PortalFixture(tenant, blade_latency=10, consumption_latency=50)
+    fixture.start()
+
+    # the portal addresses are read when the crawler is imported
+    address = fixture.address.rstrip("/")
+    monkeypatch.setattr(
+        crawler_module,
+        "CONST_PORTAL_OVERVIEW_ADDRESS",
+        address + "/#blade/Microsoft_Azure_Education/EducationMenuBlade/"
+        + "overview",
+    )
+    monkeypatch.setattr(
+        crawler_module,
+        "CONST_PORTAL_COURSES_ADDRESS",
+        address + "/#blade/Microsoft_Azure_Education/EducationMenuBlade/"
+        + "classrooms",
+    )
+
+    browser = crawler_module.Crawler("", "", mfa=False)
+
+    try:
+        success, error, browser_df = browser.get_eduhub_details()
+    finally:
+        browser.quit()
+        fixture.shutdown()
+
+    assert success, error
+
+    api = ApiCrawler(_TOKEN, api_address=replay_server.address)
+    success, error, api_df = api.get_eduhub_details()
+
+    assert success, error
+    assert list(api_df.columns) == list(browser_df.columns)
+    assert _comparable(api_df).equals(_comparable(browser_df))
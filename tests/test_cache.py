@@ -0,0 +1,70 @@
+"""
+Tests of the incremental crawl cache (cache.py).
+"""
+
+import pandas as pd
+
+from educrawler.cache import CrawlCache
+
+from educrawler.constants import CONST_COURSE_COLUMNS
+
+
+def course(consumed="$10.00"):
+    """
+    A course row of the courses dataframe.
+
+    """
+
+    return pd.Series(
+        ["Course", "$100.00", consumed, "2", "0"], index=CONST_COURSE_COLUMNS
+    )
+
+
+def test_unchanged_course_is_reused(tmp_path):
+    file_path = str(tmp_path / "cache.json")
+
+    cache = CrawlCache(file_path)
+    cache.set_course(course(), [["Course", "lab", "h1", None]])
+    cache.save()
+
+    cache = CrawlCache(file_path)
+    records = cache.get_course_records(course())
+
+    assert [record[:3] for record in records] == [["Course", "lab", "h1"]]
+    # reused handouts get the current crawl time
+    assert records[0][-1] is not None
+
+    assert cache.get_course_records(course(consumed="$20.00")) is None
+    assert cache.get_course_records(course(consumed="--")) is None
+
+
+def test_changed_handout_is_not_reused(tmp_path):
+    file_path = str(tmp_path / "cache.json")
+    details = ["h1", "sub-1", "Active", "2021-09-30", ["a@example.com"]]
+
+    cache = CrawlCache(file_path)
+    cache.set_handout_details(
+        "Course", "lab", "h1", ["$100.00", "done"], details
+    )
+    cache.save()
+
+    cache = CrawlCache(file_path)
+
+    assert (
+        cache.get_handout_details("Course", "lab", "h1", ["$100.00", "done"])
+        == details
+    )
+    assert (
+        cache.get_handout_details("Course", "lab", "h1", ["$200.00", "done"])
+        is None
+    )
+
+
+def test_names_with_separators(tmp_path):
+    cache = CrawlCache(str(tmp_path / "cache.json"))
+
+    cache.set_handout_details("A/B", "C", "h", ["$1.00", "done"], ["x"])
+
+    assert (
+        cache.get_handout_details("A", "B/C", "h", ["$1.00", "done"]) is None
+    )
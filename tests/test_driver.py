@@ -0,0 +1,78 @@
+"""
+Tests of the chromedriver resolution (driver.py), with a fake Chrome and
+    webdriver_manager.
+"""
+
+import os
+import sys
+import json
+import types
+
+import pytest
+
+from educrawler import driver
+
+
+@pytest.fixture
+def index_file(tmp_path, monkeypatch):
+    file_path = str(tmp_path / "drivers.json")
+    monkeypatch.setattr(driver, "CONST_DRIVER_INDEX_FILE", file_path)
+
+    return file_path
+
+
+@pytest.fixture
+def downloads(tmp_path, monkeypatch):
+    """
+    Fake webdriver_manager, installing chromedriver 96.0.4664.45 and
+        counting the installs.
+
+    """
+
+    driver_path = tmp_path / "wdm" / "96.0.4664.45" / "chromedriver"
+    driver_path.parent.mkdir(parents=True)
+    driver_path.write_text("")
+    os.chmod(str(driver_path), 0o755)
+
+    installs = []
+
+    class ChromeDriverManager:
+        def install(self):
+            installs.append(str(driver_path))
+            return str(driver_path)
+
+    module = types.ModuleType("webdriver_manager.chrome")
+    module.ChromeDriverManager = ChromeDriverManager
+
+    monkeypatch.setitem(sys.modules, "webdriver_manager.chrome", module)
+
+    return installs
+
+
+def test_pinned_per_chrome_version(index_file, downloads, monkeypatch):
+    monkeypatch.setattr(
+        driver, "_chrome_version", lambda index: "96.0.4664.110"
+    )
+
+    assert driver._resolve()[0]
+    assert driver._resolve()[0]
+
+    assert len(downloads) == 1
+
+    with open(index_file) as file:
+        assert file.read().count("chromedriver") == 1
+
+
+def test_pinned_without_chrome_version(index_file, downloads, monkeypatch):
+    monkeypatch.setattr(driver, "_chrome_version", lambda index: None)
+
+    success, _, driver_path = driver._resolve()
+
+    assert success
+    assert driver._resolve() == (True, None, driver_path)
+    assert len(downloads) == 1
+
+    with open(index_file) as file:
+        index = json.load(file)
+
+    assert index["drivers"] == {"96": driver_path}
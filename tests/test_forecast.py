@@ -0,0 +1,133 @@
+"""
+Tests of the budget forecast (forecast.py).
+"""
+
+from datetime import date, datetime
+
+import pandas as pd
+
+from educrawler.forecast import forecast_df, iter_forecast
+from educrawler.history import HistoryStore
+
+from educrawler.constants import CONST_FORECAST_COLUMNS
+
+# subscription id: budget and the consumption crawled on days of 09/2021
+_SNAPSHOTS = {
+    "sub-spending": ("$100.00", [(1, "$10.00"), (3, "$30.00")]),
+    "sub-single": ("$100.00", [(3, "$10.00")]),
+    "sub-reset": ("$100.00", [(1, "$50.00"), (3, "$0.00")]),
+    "sub-slow": ("$1,000,000,000.00", [(1, "$0.00"), (3, "$0.01")]),
+    "sub-exhausted": ("$100.00", [(1, "$90.00"), (3, "$100.00")]),
+}
+
+
+def history(file_path, make_handout):
+    """
+    A history store with the snapshots of _SNAPSHOTS.
+
+    """
+
+    store = HistoryStore(file_path)
+
+    for sub_id, (budget, snapshots) in _SNAPSHOTS.items():
+        for day, consumed in snapshots:
+            store.append(
+                make_handout(
+                    "Handout %s" % (sub_id),
+                    budget=budget,
+                    consumed=consumed,
+                    subscription_id=sub_id,
+                    expiry="2021-12-31",
+                    crawl_time=datetime(2021, 9, day),
+                )
+            )
+
+    store.close()
+
+    return HistoryStore(file_path)
+
+
+def test_forecast(tmp_path, make_handout):
+    store = history(str(tmp_path / "history.sqlite3"), make_handout)
+
+    result_df = forecast_df(
+        store.get_consumption_df(), store.get_latest_df()
+    ).set_index(CONST_FORECAST_COLUMNS[0])
+
+    store.close()
+
+    spending = result_df.loc["sub-spending"]
+
+    # $20.00 in two days, $70.00 left
+    assert spending["Spend cents per day"] == 1000
+    assert spending["Days left"] == 7.0
+    assert spending["Exhaustion date"] == pd.Timestamp(2021, 9, 10)
+    assert bool(spending["Exhausted before expiry"])
+
+    exhausted = result_df.loc["sub-exhausted"]
+
+    assert exhausted["Days left"] == 0.0
+    assert exhausted["Exhaustion date"] == pd.Timestamp(2021, 9, 3)
+
+    # no spend rate: a single snapshot, or a reset handout
+    for sub_id in ["sub-single", "sub-reset"]:
+        assert pd.isna(result_df.loc[sub_id, "Days left"])
+        assert pd.isna(result_df.loc[sub_id, "Exhaustion date"])
+        assert not result_df.loc[sub_id, "Exhausted before expiry"]
+
+    assert result_df.loc["sub-reset", "Spend cents per day"] == 0
+
+    # the budget lasts past the last date pandas represents
+    assert result_df.loc["sub-slow", "Days left"] > 1e10
+    assert pd.isna(result_df.loc["sub-slow", "Exhaustion date"])
+
+
+def test_forecast_order(tmp_path, make_handout):
+    store = history(str(tmp_path / "history.sqlite3"), make_handout)
+
+    records = list(iter_forecast(store, limit=3))
+
+    store.close()
+
+    # the subscriptions running out before they expire first, the soonest
+    #   first
+    assert [record[0] for record in records] == [
+        "sub-exhausted",
+        "sub-spending",
+        "sub-slow",
+    ]
+    assert records[0][9] == date(2021, 9, 3)
+    assert records[0][10] == date(2021, 12, 31)
+    assert records[2][9] is None
+
+
+def test_handouts_sharing_a_subscription(tmp_path, make_handout):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+
+    # two handouts of a subscription, crawled together, one of them once
+    #   without a consumption
+    for handout_name in ["Handout a", "Handout b"]:
+        for day, consumed in [(1, "$10.00"), (2, "--"), (3, "$30.00")]:
+            store.append(
+                make_handout(
+                    handout_name,
+                    consumed=consumed,
+                    subscription_id="sub-shared",
+                    expiry="2021-12-31",
+                    crawl_time=datetime(2021, 9, day),
+                )
+            )
+
+    store.close()
+
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+
+    consumption_df = store.get_consumption_df()
+    result_df = forecast_df(consumption_df, store.get_latest_df())
+
+    store.close()
+
+    assert len(consumption_df) == 4
+    assert list(result_df["Subscription id"]) == ["sub-shared"]
+    assert result_df.loc[0, "Spend cents per day"] == 1000
+    assert result_df.loc[0, "Days left"] == 7.0
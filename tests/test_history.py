@@ -0,0 +1,108 @@
+"""
+Tests of the handout history store (history.py).
+"""
+
+from datetime import datetime
+
+from educrawler.history import HistoryStore
+
+
+def test_snapshots_written_when_closed(tmp_path, make_handout):
+    file_path = str(tmp_path / "history.sqlite3")
+
+    store = HistoryStore(file_path)
+
+    # the second crawl of day 2 is a resumed crawl, the same handout and
+    #   crawl time
+    for consumed, day in [("$10.00", 1), ("$12.50", 2), ("$12.75", 2)]:
+        store.append(
+            make_handout(
+                "h1", consumed=consumed, crawl_time=datetime(2021, 9, day)
+            )
+        )
+
+    # a handout without a crawl time is not a snapshot
+    store.append(make_handout("h2", crawl_time=None))
+
+    assert list(HistoryStore(file_path).iter_snapshots()) == []
+
+    store.close()
+
+    store = HistoryStore(file_path)
+
+    assert [
+        (snapshot[0], snapshot[4], snapshot[6])
+        for snapshot in store.iter_snapshots()
+    ] == [
+        ("2021-09-01T00:00:00.000000", "sub-h1", 1000),
+        ("2021-09-02T00:00:00.000000", "sub-h1", 1275),
+    ]
+
+    store.close()
+
+
+def test_snapshots_filters(tmp_path, make_handout):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+
+    for handout_name, course_name, day in [
+        ("h1", "Course", 1),
+        ("h1", "Course", 3),
+        ("h2", "Other", 3),
+    ]:
+        store.append(
+            make_handout(
+                handout_name,
+                course_name=course_name,
+                crawl_time=datetime(2021, 9, day),
+            )
+        )
+
+    store.close()
+
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+
+    def subscriptions(**kwargs):
+        return [snapshot[4] for snapshot in store.iter_snapshots(**kwargs)]
+
+    assert subscriptions(subscription_id="sub-h2") == ["sub-h2"]
+    assert subscriptions(course_name="Course") == ["sub-h1", "sub-h1"]
+    assert subscriptions(since=datetime(2021, 9, 2)) == ["sub-h1", "sub-h2"]
+
+    store.close()
+
+
+def test_top_burners(tmp_path, make_handout):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+
+    # h3 has a single snapshot, no burn rate
+    for handout_name, consumed, day in [
+        ("h1", "$10.00", 1),
+        ("h1", "$30.00", 3),
+        ("h2", "$10.00", 1),
+        ("h2", "$15.00", 3),
+        ("h3", "$5.00", 3),
+    ]:
+        store.append(
+            make_handout(
+                handout_name,
+                consumed=consumed,
+                crawl_time=datetime(2021, 9, day),
+            )
+        )
+
+    store.close()
+
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+
+    burners = list(store.iter_top_burners(datetime(2021, 9, 1), 10))
+
+    assert [burner[0] for burner in burners] == ["sub-h1", "sub-h2", "sub-h3"]
+    # cents burnt and cents per day
+    assert [(burner[6], burner[7]) for burner in burners] == [
+        (2000, 1000),
+        (500, 250),
+        (0, None),
+    ]
+    assert len(list(store.iter_top_burners(datetime(2021, 9, 1), 1))) == 1
+
+    store.close()
@@ -0,0 +1,109 @@
+"""
+Tests of the crawl journal (journal.py).
+"""
+
+import os
+
+from educrawler.journal import CrawlJournal
+
+
+def test_resume(tmp_path, make_handout):
+    file_path = str(tmp_path / "journal.jsonl")
+
+    journal = CrawlJournal(file_path)
+    journal.add_handout(make_handout("h1", "Course", "lab 1"))
+    journal.add_handout(make_handout("h2", "Course", "lab 1"))
+    journal.complete_lab("Course", "lab 1")
+    journal.add_handout(make_handout("h3", "Course", "lab 2"))
+    journal.close()
+
+    journal = CrawlJournal(file_path, resume=True)
+
+    assert journal.get_handout_record(
+        "Course", "lab 2", "h3"
+    ) == make_handout("h3", "Course", "lab 2")
+    assert journal.get_lab_records("Course", "lab 1") == [
+        make_handout("h1", "Course", "lab 1"),
+        make_handout("h2", "Course", "lab 1"),
+    ]
+    # the lab was not completed
+    assert journal.get_lab_records("Course", "lab 2") is None
+    assert journal.get_course_records("Course") is None
+
+    journal.complete_lab("Course", "lab 2")
+    journal.complete_course("Course")
+
+    assert len(journal.get_course_records("Course")) == 3
+
+    journal.close()
+
+
+def test_new_journal_without_resume(tmp_path, make_handout):
+    file_path = str(tmp_path / "journal.jsonl")
+
+    journal = CrawlJournal(file_path)
+    journal.add_handout(make_handout("h1", "Course", "lab"))
+    journal.close()
+
+    journal = CrawlJournal(file_path)
+
+    assert journal.get_handout_record("Course", "lab", "h1") is None
+
+    journal.close()
+
+
+def test_names_with_separators(tmp_path, make_handout):
+    journal = CrawlJournal(str(tmp_path / "journal.jsonl"))
+
+    journal.add_handout(make_handout("h1", "A/B", "C"))
+    journal.complete_lab("A/B", "C")
+    journal.complete_course("A/B")
+    journal.add_handout(make_handout("h2", "A", "B/C"))
+    journal.complete_lab("A", "B/C")
+
+    assert journal.get_lab_records("A/B", "C") == [
+        make_handout("h1", "A/B", "C")
+    ]
+    assert journal.get_lab_records("A", "B/C") == [
+        make_handout("h2", "A", "B/C")
+    ]
+    assert journal.get_course_records("A/B") == [
+        make_handout("h1", "A/B", "C")
+    ]
+    assert journal.get_course_records("A") is None
+
+    journal.close()
+
+
+def test_line_cut_short(tmp_path, make_handout):
+    file_path = str(tmp_path / "journal.jsonl")
+
+    journal = CrawlJournal(file_path)
+    journal.add_handout(make_handout("h1", "Course", "lab"))
+    journal.close()
+
+    # a crash in the middle of a line
+    with open(file_path, "a") as journal_file:
+        journal_file.write('{"handout": ["Course", "lab", "h2"')
+
+    journal = CrawlJournal(file_path, resume=True)
+    journal.add_handout(make_handout("h3", "Course", "lab"))
+    journal.close()
+
+    journal = CrawlJournal(file_path, resume=True)
+
+    assert journal.get_handout_record("Course", "lab", "h1") is not None
+    assert journal.get_handout_record("Course", "lab", "h2") is None
+    assert journal.get_handout_record("Course", "lab", "h3") is not None
+
+    journal.close()
+
+
+def test_completed_crawl_removes_the_journal(tmp_path, make_handout):
+    file_path = str(tmp_path / "journal.jsonl")
+
+    journal = CrawlJournal(file_path)
+    journal.add_handout(make_handout("h1", "Course", "lab"))
+    journal.close(completed=True)
+
+    assert not os.path.exists(file_path)
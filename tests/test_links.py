@@ -0,0 +1,80 @@
+"""
+Tests of the blade deep links (links.py).
+"""
+
+import json
+
+from educrawler import links as links_module
+from educrawler.links import BladeLinks
+
+_PORTAL = "https://portal.example.com/"
+
+
+def address(key):
+    return _PORTAL + "#blade/" + key
+
+
+def test_links_are_saved(tmp_path, monkeypatch):
+    monkeypatch.setattr(links_module, "CONST_PORTAL_ADDRESS", _PORTAL)
+    file_path = str(tmp_path / "state" / "links.json")
+
+    links = BladeLinks(file_path)
+    links.set_course("Course", address("course"))
+    links.set_lab("Course", "lab", address("lab"))
+    links.save()
+
+    links = BladeLinks(file_path)
+
+    assert links.get_course("Course") == address("course")
+    assert links.get_lab("Course", "lab") == address("lab")
+    assert links.get_lab("Course", "other lab") is None
+
+
+def test_links_of_another_portal(tmp_path, monkeypatch):
+    monkeypatch.setattr(links_module, "CONST_PORTAL_ADDRESS", _PORTAL)
+
+    links = BladeLinks(str(tmp_path / "links.json"))
+    links.set_course("Course", "https://other.example.com/#blade/course")
+
+    assert links.get_course("Course") is None
+
+
+def test_names_with_separators(tmp_path, monkeypatch):
+    monkeypatch.setattr(links_module, "CONST_PORTAL_ADDRESS", _PORTAL)
+
+    links = BladeLinks(str(tmp_path / "links.json"))
+    links.set_course("A", address("a"))
+    links.set_lab("A", "B/C", address("a-bc"))
+    links.set_lab("A/B", "C", address("ab-c"))
+
+    assert links.get_lab("A", "B/C") == address("a-bc")
+    assert links.get_lab("A/B", "C") == address("ab-c")
+
+    links.forget_course("A")
+
+    assert links.get_course("A") is None
+    assert links.get_lab("A", "B/C") is None
+    assert links.get_lab("A/B", "C") == address("ab-c")
+
+    links.forget_lab("A/B", "C")
+
+    assert links.get_lab("A/B", "C") is None
+
+
+def test_earlier_lab_keys_are_dropped(tmp_path, monkeypatch):
+    monkeypatch.setattr(links_module, "CONST_PORTAL_ADDRESS", _PORTAL)
+    file_path = str(tmp_path / "links.json")
+
+    with open(file_path, "w") as links_file:
+        json.dump(
+            {
+                "courses": {"Course": address("course")},
+                "labs": {"Course/lab": address("lab")},
+            },
+            links_file,
+        )
+
+    links = BladeLinks(file_path)
+
+    assert links.get_course("Course") == address("course")
+    assert links.get_lab("Course", "lab") is None
@@ -0,0 +1,189 @@
+"""
+Tests of the browser pool (pool.py) with crawlers that do not start a
+    browser.
+"""
+
+import threading
+
+import pandas as pd
+
+from educrawler.pool import iter_eduhub_details_parallel
+from educrawler.pipeline import drain
+
+
+class FakeClient:
+    def __init__(self, crashes=0):
+        self.refreshes = 0
+        self.crashes = crashes
+
+    def refresh(self):
+        self.refreshes += 1
+
+        if self.refreshes <= self.crashes:
+            raise RuntimeError("browser crashed")
+
+
+class FakeLinks:
+    def __init__(self, courses):
+        self.courses = courses
+
+    def get_course(self, course_name):
+        return self.courses.get(course_name)
+
+
+class FakeCrawler:
+    """
+    Crawler of a list of courses, each with a record, failing the courses
+        in `failures` the given number of times.
+
+    """
+
+    def __init__(
+        self, courses, failures=None, links=None, login=True, crashes=None
+    ):
+        self.courses = courses
+        self.failures = dict(failures or {})
+        self.links = links
+        self.login = login
+        # refreshes of each worker's browser that crash
+        self.crashes = list(crashes or [])
+        self.journal = None
+        self.cache = None
+        self.session_dir = None
+        self.clients = []
+        self.lock = threading.Lock()
+        self.client = FakeClient()
+
+    def get_courses_df(self):
+        return True, None, pd.DataFrame({"Name": self.courses})
+
+    def spawn(self, session_dir):
+        worker = FakeCrawler(
+            self.courses, links=self.links, login=self.login
+        )
+        worker.failures = self.failures
+        worker.lock = self.lock
+
+        if not self.login:
+            worker.client = None
+        elif len(self.clients) < len(self.crashes):
+            worker.client = FakeClient(self.crashes[len(self.clients)])
+
+        self.clients.append(worker.client)
+
+        return worker
+
+    def iter_course_details(self, course_name):
+        with self.lock:
+            failures = self.failures.get(course_name, 0)
+            self.failures[course_name] = failures - 1
+
+        if failures > 0:
+            return False, "(%s) course could not be read." % (course_name)
+
+        yield [course_name]
+
+        return True, None
+
+    def quit(self):
+        pass
+
+
+def _crawl(crawler, workers):
+    records = []
+    result = []
+
+    # a crawl waiting for a lost course would never end
+    thread = threading.Thread(
+        target=lambda: result.extend(
+            drain(
+                iter_eduhub_details_parallel(crawler, workers),
+                records.append,
+            )
+        )
+    )
+    thread.daemon = True
+    thread.start()
+    thread.join(10)
+
+    assert not thread.is_alive(), "the crawl did not finish"
+
+    success, error = result
+
+    return success, error, records
+
+
+def test_courses_in_order():
+    courses = ["c%d" % (index) for index in range(10)]
+
+    success, error, records = _crawl(FakeCrawler(courses), 3)
+
+    assert success and error is None
+    assert records == [[course] for course in courses]
+
+
+def test_failed_course_is_retried():
+    courses = ["a", "b", "c"]
+
+    success, _, records = _crawl(FakeCrawler(courses, failures={"b": 1}), 2)
+
+    assert success
+    assert records == [["a"], ["b"], ["c"]]
+
+
+def test_failed_course_keeps_the_others():
+    courses = ["a", "b", "c"]
+
+    success, error, records = _crawl(
+        FakeCrawler(courses, failures={"b": 5}), 2
+    )
+
+    assert not success
+    assert "(b) course" in error
+    assert records == [["a"], ["c"]]
+
+
+def test_no_worker_logs_in():
+    success, error, records = _crawl(FakeCrawler(["a"], login=False), 2)
+
+    assert not success
+    assert "could not login" in error
+    assert records == []
+
+
+def test_refresh_only_without_link():
+    crawler = FakeCrawler(["a", "b"], links=FakeLinks({"a": "link"}))
+
+    success, _, _ = _crawl(crawler, 1)
+
+    assert success
+    assert sum(client.refreshes for client in crawler.clients) == 1
+
+
+def test_crashed_browser_course_is_retried():
+    crawler = FakeCrawler(["a", "b"], crashes=[1])
+
+    success, error, records = _crawl(crawler, 1)
+
+    assert success, error
+    assert records == [["a"], ["b"]]
+
+
+def test_crashed_browser_does_not_lose_courses():
+    courses = ["c%d" % (index) for index in range(6)]
+
+    # the first worker's browser is dead
+    crawler = FakeCrawler(courses, crashes=[1000])
+
+    success, error, records = _crawl(crawler, 2)
+
+    # each course is crawled by the other worker or reported
+    crawled = [record[0] for record in records]
+    reported = [
+        course
+        for course in courses
+        if "(%s) course" % (course) in (error or "")
+    ]
+
+    assert sorted(crawled + reported) == courses
+    assert success == (len(reported) == 0)
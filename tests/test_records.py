@@ -0,0 +1,99 @@
+"""
+Tests of the typed records (records.py).
+"""
+
+from datetime import date
+
+import pandas as pd
+
+from educrawler.records import (
+    CourseRecord,
+    HandoutRecord,
+    record_type,
+    sql_types,
+    typed_df,
+    parse_cents,
+    parse_count,
+    parse_date,
+)
+
+from educrawler.constants import (
+    CONST_COURSE_COLUMNS,
+    CONST_HANDOUT_COLUMNS,
+    CONST_HANDOUT_TYPED_COLUMNS,
+)
+
+
+def test_parse_cents():
+    assert parse_cents("$1,300.00") == 130000
+    assert parse_cents("-$0.10") == -10
+    assert parse_cents(2.345) == 235
+    assert parse_cents("--") is None
+    assert parse_cents(None) is None
+
+
+def test_parse_count():
+    assert parse_count("1,024") == 1024
+    assert parse_count(7) == 7
+    assert parse_count("--") is None
+    assert parse_count(None) is None
+
+
+def test_parse_date():
+    assert parse_date("2021-09-30") == date(2021, 9, 30)
+    assert parse_date("09/30/2021") == date(2021, 9, 30)
+    assert parse_date("2021-09-30T12:00:00Z") == date(2021, 9, 30)
+    assert parse_date("--") is None
+    assert parse_date(None) is None
+
+
+def test_record_round_trip(make_handout):
+    record = HandoutRecord.from_list(
+        make_handout(budget="$1,300.00", consumed="$10.25")
+    )
+
+    assert record.budget_cents == 130000
+    assert record.consumed_cents == 1025
+    assert record.expiry_date == date(2021, 9, 30)
+    assert record.to_list()[:3] == ["Course", "lab", "Handout"]
+
+    course = CourseRecord.from_list(["Course", "$300.00", "--", "12", "0"])
+
+    assert course.to_list() == ["Course", 30000, None, 12, 0]
+
+
+def test_record_type():
+    assert record_type(CONST_COURSE_COLUMNS) is CourseRecord
+    assert record_type(CONST_HANDOUT_COLUMNS) is HandoutRecord
+    assert record_type(["Other"]) is None
+
+    assert sql_types(CONST_HANDOUT_TYPED_COLUMNS)[3] == "INTEGER"
+    assert sql_types(CONST_HANDOUT_COLUMNS) is None
+
+
+def test_typed_df_matches_the_records(make_handout):
+    records = [
+        make_handout(budget="$1,300.00", consumed="$10.25"),
+        make_handout(budget="--", consumed="$0.00", expiry="10/01/2021"),
+        make_handout(expiry="--"),
+    ]
+
+    handouts_df = typed_df(
+        pd.DataFrame(records, columns=CONST_HANDOUT_COLUMNS), HandoutRecord
+    )
+
+    assert list(handouts_df.columns) == CONST_HANDOUT_TYPED_COLUMNS
+    assert str(handouts_df["Handout budget cents"].dtype) == "Int64"
+    assert str(handouts_df["Course name"].dtype) == "category"
+
+    # the same values as the records parsed one at a time
+    for row, values in zip(handouts_df.itertuples(index=False), records):
+        record = HandoutRecord.from_list(values)
+
+        for value, expected in zip(row[3:5], record.to_list()[3:5]):
+            assert (expected is None and value is pd.NA) or value == expected
+
+        if record.expiry_date is None:
+            assert pd.isna(row[9])
+        else:
+            assert row[9].date() == record.expiry_date
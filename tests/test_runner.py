@@ -0,0 +1,68 @@
+"""
+Tests of the command line actions (runner.py) with a crawler that does not
+    start a browser.
+"""
+
+import os
+import sys
+import subprocess
+from argparse import Namespace
+
+from educrawler import runner, utilities
+from educrawler import crawler as crawler_module
+
+from educrawler.constants import CONST_USAGE_DOWNLOAD
+
+_USAGE_FILE_PATH = "/tmp/ec_usage_test/usage.csv"
+
+
+class FakeCrawler:
+    def __init__(self, *args, **kwargs):
+        self.client = object()
+
+    def download_usage(self):
+        return True, None, _USAGE_FILE_PATH
+
+    def quit(self):
+        pass
+
+
+def test_usage_path_is_the_only_stdout(capsys, monkeypatch):
+    monkeypatch.setattr(crawler_module, "Crawler", FakeCrawler)
+    monkeypatch.setattr(runner, "can_forward", lambda args: False)
+    monkeypatch.setattr(utilities, "CONST_VERBOSE_LEVEL", 2)
+
+    for name, value in [
+        ("EC_EMAIL", "user@example.com"),
+        ("EC_PASSWORD", "password"),
+        ("EC_SESSION", "false"),
+        ("EC_DEEP_LINKS", "false"),
+    ]:
+        monkeypatch.setenv(name, value)
+
+    success, error, result = runner.crawl(
+        Namespace(usage_action=CONST_USAGE_DOWNLOAD)
+    )
+
+    assert success, error
+    assert result == _USAGE_FILE_PATH
+
+    captured = capsys.readouterr()
+
+    # what `USAGE_FILE=$(ec usage)` captures
+    assert captured.out == _USAGE_FILE_PATH + "\n"
+    assert "Crawler started" in captured.err
+
+
+def test_command_line_modules_do_not_import_pandas():
+    # a forwarded or API request starts without pandas and selenium
+    script = (
+        "import sys; sys.path.insert(0, %r); "
+        "import educrawler.runner, educrawler.api; "
+        "print(sorted(name for name in ['pandas', 'selenium'] "
+        "if name in sys.modules))"
+    ) % (os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+    output = subprocess.check_output([sys.executable, "-c", script])
+
+    assert output.decode("utf-8").strip() == "[]"
@@ -0,0 +1,133 @@
+"""
+Tests of the crawler server (server.py) and its token (remote.py), with
+    crawlers that do not start a browser.
+"""
+
+import os
+import json
+import stat
+import threading
+import http.client
+
+import pandas as pd
+import pytest
+
+from educrawler import remote
+from educrawler.server import CrawlServer
+
+_TOKEN = "server-token"
+
+
+class FakeClient:
+    def refresh(self):
+        pass
+
+
+class FakeCrawler:
+    client = FakeClient()
+
+    def quit(self):
+        pass
+
+
+def take_action(args, crawler):
+    return True, None, pd.DataFrame({"Name": [args.course_name]})
+
+
+@pytest.fixture
+def server():
+    crawl_server = CrawlServer(
+        ("127.0.0.1", 0), [FakeCrawler()], take_action, _TOKEN
+    )
+
+    thread = threading.Thread(
+        target=crawl_server.serve_forever, kwargs={"poll_interval": 0.05}
+    )
+    thread.daemon = True
+    thread.start()
+
+    yield crawl_server
+
+    crawl_server.shutdown()
+    crawl_server.quit()
+
+
+def request(server, method, path, content=None, headers=None):
+    connection = http.client.HTTPConnection(
+        "127.0.0.1", server.server_port, timeout=5
+    )
+
+    body = None if content is None else json.dumps(content)
+
+    try:
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+
+        return response.status, json.loads(response.read().decode("utf-8"))
+    finally:
+        connection.close()
+
+
+def authorized(token=_TOKEN):
+    return {"Authorization": "Bearer %s" % (token)}
+
+
+def test_crawl_with_the_token(server):
+    status, content = request(
+        server,
+        "POST",
+        "/crawl",
+        {"courses_action": "list", "course_name": "Course"},
+        authorized(),
+    )
+
+    assert status == 200
+    assert content["success"]
+    assert content["columns"] == ["Name"]
+    assert content["records"] == [["Course"]]
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [{}, authorized("wrong"), {"Authorization": _TOKEN}],
+)
+def test_requests_without_the_token(server, headers):
+    assert request(server, "GET", "/status", headers=headers)[0] == 401
+    assert (
+        request(server, "POST", "/crawl", {"course_name": "x"}, headers)[0]
+        == 401
+    )
+
+
+def test_cross_origin_requests(server):
+    headers = authorized()
+    headers["Origin"] = "http://example.com"
+
+    assert request(server, "GET", "/status", headers=headers)[0] == 403
+    assert (
+        request(server, "POST", "/crawl", {"course_name": "x"}, headers)[0]
+        == 403
+    )
+
+
+def test_status(server):
+    status, content = request(server, "GET", "/status", headers=authorized())
+
+    assert status == 200
+    assert content == {"browsers": 1}
+
+
+def test_token_file(tmp_path, monkeypatch):
+    token_path = str(tmp_path / "state" / "serve_token")
+    monkeypatch.setattr(remote, "CONST_SERVE_TOKEN_FILE", token_path)
+
+    assert remote.read_token() is None
+
+    remote.write_token(_TOKEN)
+
+    assert remote.read_token() == _TOKEN
+    assert stat.S_IMODE(os.stat(token_path).st_mode) == 0o600
+
+    remote.remove_token()
+
+    assert remote.read_token() is None
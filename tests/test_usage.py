@@ -0,0 +1,279 @@
+"""
+Tests of the usage store (usage.py).
+"""
+
+import os
+import csv
+from datetime import date, datetime, timedelta
+
+from educrawler import usage
+from educrawler.usage import (
+    UsageStore,
+    download_usage_range,
+    usage_windows,
+    _parse_number,
+)
+
+_HEADER = ["Date", "SubscriptionId", "MeterCategory", "CostInBillingCurrency"]
+
+
+def write_usage(file_path, rows):
+    """
+    Writes a usage file.
+
+    """
+
+    with open(file_path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(_HEADER)
+        writer.writerows(rows)
+
+
+def daily_costs(store):
+    """
+    The daily costs of the store as (subscription id, date, cost) tuples.
+
+    """
+
+    return [
+        (record[0], record[1], record[2])
+        for record in store.iter_daily_costs()
+    ]
+
+
+def test_day_first_dates(tmp_path):
+    # 03/04 could be month or day first, 13/04 can only be day first
+    file_path = str(tmp_path / "usage.csv")
+    write_usage(
+        file_path,
+        [
+            ["03/04/2026", "SUB-1", "Compute", "1.50"],
+            ["13/04/2026", "sub-1", "Compute", "2.00"],
+        ],
+    )
+
+    store = UsageStore(str(tmp_path / "usage.sqlite"))
+
+    success, error, result = store.ingest(file_path)
+
+    assert success, error
+    assert result == ("2026-04-03", "2026-04-13", 2)
+    assert daily_costs(store) == [
+        ("sub-1", "2026-04-03", 1.5),
+        ("sub-1", "2026-04-13", 2.0),
+    ]
+
+    store.close()
+
+
+def test_ambiguous_dates_are_month_first(tmp_path):
+    file_path = str(tmp_path / "usage.csv")
+    write_usage(file_path, [["03/04/2026", "sub-1", "Compute", "1.50"]])
+
+    store = UsageStore(str(tmp_path / "usage.sqlite"))
+
+    success, error, result = store.ingest(file_path)
+
+    assert success, error
+    assert result == ("2026-03-04", "2026-03-04", 1)
+
+    store.close()
+
+
+def test_date_of_another_format_fails_the_ingest(tmp_path):
+    file_path = str(tmp_path / "usage.csv")
+    write_usage(
+        file_path,
+        [
+            ["2026-04-01", "sub-1", "Compute", "1.00"],
+            ["04/02/2026", "sub-1", "Compute", "1.00"],
+        ],
+    )
+
+    store = UsageStore(str(tmp_path / "usage.sqlite"))
+
+    success, error, _ = store.ingest(file_path)
+
+    assert not success
+    assert "04/02/2026" in error
+    assert daily_costs(store) == []
+
+    store.close()
+
+
+def test_date_format_fixed_after_it_is_resolved(tmp_path):
+    # the second date rules out month first, the third is month first
+    file_path = str(tmp_path / "usage.csv")
+    write_usage(
+        file_path,
+        [
+            ["01/04/2026", "sub-1", "Compute", "1.00"],
+            ["13/04/2026", "sub-1", "Compute", "1.00"],
+            ["04/14/2026", "sub-1", "Compute", "1.00"],
+        ],
+    )
+
+    store = UsageStore(str(tmp_path / "usage.sqlite"))
+
+    success, error, _ = store.ingest(file_path)
+
+    assert not success
+    assert "04/14/2026" in error
+    assert daily_costs(store) == []
+
+    store.close()
+
+
+def test_ingesting_again_replaces_the_rows(tmp_path):
+    file_path = str(tmp_path / "usage.csv")
+    write_usage(
+        file_path,
+        [
+            ["2026-04-01", "sub-1", "Compute", "1.00"],
+            ["2026-04-01", "sub-1", "Storage", "0.25"],
+            ["", "", "", ""],
+        ],
+    )
+
+    store = UsageStore(str(tmp_path / "usage.sqlite"))
+
+    assert store.ingest(file_path)[0]
+
+    # the portal updated the cost of a row
+    write_usage(
+        file_path,
+        [
+            ["2026-04-01", "sub-1", "Compute", "2.00"],
+            ["2026-04-01", "sub-1", "Storage", "0.25"],
+        ],
+    )
+
+    success, error, result = store.ingest(file_path)
+
+    assert success, error
+    assert result == ("2026-04-01", "2026-04-01", 2)
+    assert daily_costs(store) == [("sub-1", "2026-04-01", 2.25)]
+
+    store.close()
+
+
+def test_parse_number():
+    assert _parse_number("$1,234.50") == 1234.5
+    assert _parse_number("(1.00)") == -1.0
+    assert _parse_number("n/a") is None
+
+
+def test_settled_windows_into_a_new_usage_directory(tmp_path, monkeypatch):
+    windows_dir = str(tmp_path / "windows")
+    usage_dir = str(tmp_path / "usage")
+
+    monkeypatch.setattr(usage, "CONST_USAGE_WINDOWS_DIR", windows_dir)
+    monkeypatch.setattr(usage, "CONST_USAGE_PATH", usage_dir)
+
+    os.makedirs(windows_dir)
+
+    for day in [1, 2]:
+        write_usage(
+            usage._window_file(
+                usage_windows(date(2020, 1, day), date(2020, 1, day), 1)[0]
+            ),
+            [["2020-01-%02d" % (day), "sub-1", "Compute", "1.00"]],
+        )
+
+    # the windows were all downloaded before, the crawler is not used
+    success, error, usage_file_path = download_usage_range(
+        None, date(2020, 1, 1), date(2020, 1, 2), 1, 1
+    )
+
+    assert success, error
+    assert os.path.dirname(os.path.dirname(usage_file_path)) == usage_dir
+
+    with open(usage_file_path, newline="") as file:
+        assert len(list(csv.reader(file))) == 3
+
+
+def test_readings_differing_in_their_measures(tmp_path):
+    # two readings of a meter on a day, the same identity
+    file_path = str(tmp_path / "usage.csv")
+    write_usage(
+        file_path,
+        [
+            ["2026-04-01", "sub-1", "Compute", "1.00"],
+            ["2026-04-01", "sub-1", "Compute", "2.00"],
+        ],
+    )
+
+    store = UsageStore(str(tmp_path / "usage.sqlite"))
+
+    success, error, _ = store.ingest(file_path)
+
+    assert success, error
+    assert daily_costs(store) == [("sub-1", "2026-04-01", 3.0)]
+
+    # both are replaced, not added again, when ingested again
+    success, error, _ = store.ingest(file_path)
+
+    assert success, error
+    assert daily_costs(store) == [("sub-1", "2026-04-01", 3.0)]
+
+    store.close()
+
+
+def test_windows_start_by_now():
+    today = date.today()
+
+    windows = usage_windows(
+        today - timedelta(days=3), today + timedelta(days=30), 2
+    )
+
+    assert len(windows) == 2
+    assert all(start <= end <= datetime.now() for start, end in windows)
+
+
+def test_future_usage_period(tmp_path, monkeypatch):
+    monkeypatch.setattr(usage, "CONST_USAGE_WINDOWS_DIR", str(tmp_path))
+
+    today = date.today()
+
+    for date_from, date_to, message in [
+        (today + timedelta(days=1), today + timedelta(days=5), "future"),
+        (today, today - timedelta(days=1), "after it ends"),
+    ]:
+        # the crawler is not used
+        success, error, _ = download_usage_range(
+            None, date_from, date_to, 7, 1
+        )
+
+        assert not success
+        assert message in error
+
+
+def test_period_ending_in_the_future_ends_today(tmp_path, monkeypatch):
+    monkeypatch.setattr(usage, "CONST_USAGE_WINDOWS_DIR", str(tmp_path))
+    monkeypatch.setattr(usage, "CONST_USAGE_PATH", str(tmp_path))
+
+    class Crawler:
+        windows = []
+
+        def download_usage(self, start, end):
+            self.windows.append((start, end))
+
+            file_path = str(tmp_path / ("download_%d" % len(self.windows)))
+            os.makedirs(file_path)
+            file_path = os.path.join(file_path, "usage.csv")
+            write_usage(file_path, [])
+
+            return True, None, file_path
+
+    crawler = Crawler()
+    today = date.today()
+
+    success, error, _ = download_usage_range(
+        crawler, today - timedelta(days=1), today + timedelta(days=30), 1, 1
+    )
+
+    assert success, error
+    assert len(crawler.windows) == 2
+    assert all(
+        start <= end <= datetime.now() for start, end in crawler.windows
+    )
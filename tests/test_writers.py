@@ -0,0 +1,268 @@
+"""
+Tests of the output writers (writers.py).
+"""
+
+import json
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from educrawler.pipeline import drain
+from educrawler.writers import get_writer
+
+from educrawler.constants import (
+    CONST_OUTPUT_CSV,
+    CONST_OUTPUT_JSON,
+    CONST_OUTPUT_JSONL,
+    CONST_OUTPUT_DF,
+    CONST_OUTPUT_PARQUET,
+    CONST_OUTPUT_ARROW,
+    CONST_OUTPUT_SQLITE,
+    CONST_HANDOUT_COLUMNS,
+)
+
+
+def write(output, records, **kwargs):
+    """
+    Writes records with the writer of an output.
+
+    """
+
+    writer = get_writer(output, CONST_HANDOUT_COLUMNS, **kwargs)
+    success, error = drain(iter(records), writer.write)
+    writer.close()
+
+    assert success, error
+
+    return writer
+
+
+def test_csv_has_the_index_column(tmp_path, make_handout):
+    records = [make_handout("h0"), make_handout("h1")]
+    file_path = str(tmp_path / "handouts.csv")
+
+    write(CONST_OUTPUT_CSV, records, file_path=file_path)
+
+    # the same file as pandas' to_csv of the records' dataframe
+    expected_path = str(tmp_path / "expected.csv")
+    pd.DataFrame(records, columns=CONST_HANDOUT_COLUMNS).to_csv(expected_path)
+
+    with open(file_path) as file, open(expected_path) as expected:
+        assert file.read() == expected.read()
+
+
+def test_csv_append_numbers_on(tmp_path, make_handout):
+    records = [make_handout("h0"), make_handout("h1")]
+    file_path = str(tmp_path / "handouts.csv")
+
+    write(CONST_OUTPUT_CSV, records, file_path=file_path)
+    write(
+        CONST_OUTPUT_CSV,
+        [make_handout("h2")],
+        file_path=file_path,
+        append=True,
+    )
+
+    handouts_df = pd.read_csv(file_path, index_col=0)
+
+    assert list(handouts_df.index) == [0, 1, 2]
+    assert list(handouts_df.columns) == CONST_HANDOUT_COLUMNS
+    assert list(handouts_df["Handout name"]) == [
+        "h0",
+        "h1",
+        "h2",
+    ]
+
+
+def test_csv_missing_values(tmp_path, make_handout):
+    file_path = str(tmp_path / "handouts.csv")
+
+    write(
+        CONST_OUTPUT_CSV,
+        [make_handout("h0", consumed=None)],
+        file_path=file_path,
+    )
+
+    handouts_df = pd.read_csv(file_path, index_col=0)
+
+    assert handouts_df["Handout consumed"].isna().all()
+
+
+def test_json_array(tmp_path, make_handout):
+    records = [make_handout("h0"), make_handout("h1")]
+    file_path = str(tmp_path / "handouts.json")
+
+    write(CONST_OUTPUT_JSON, records, file_path=file_path)
+
+    with open(file_path) as file:
+        handouts = json.load(file)
+
+    assert [entry["Handout name"] for entry in handouts] == [
+        "h0",
+        "h1",
+    ]
+    assert handouts[0]["Subscription users"] == ["student@example.com"]
+
+
+def test_json_without_records(tmp_path):
+    file_path = str(tmp_path / "handouts.json")
+
+    write(CONST_OUTPUT_JSON, [], file_path=file_path)
+
+    with open(file_path) as file:
+        assert json.load(file) == []
+
+
+def test_json_is_not_appended_to(tmp_path):
+    assert (
+        get_writer(
+            CONST_OUTPUT_JSON,
+            CONST_HANDOUT_COLUMNS,
+            file_path=str(tmp_path / "handouts.json"),
+            append=True,
+        )
+        is None
+    )
+
+
+def test_jsonl_append(tmp_path, make_handout):
+    file_path = str(tmp_path / "handouts.jsonl")
+
+    write(CONST_OUTPUT_JSONL, [make_handout("h0")], file_path=file_path)
+    write(
+        CONST_OUTPUT_JSONL,
+        [make_handout("h1")],
+        file_path=file_path,
+        append=True,
+    )
+
+    with open(file_path) as file:
+        handouts = [json.loads(line) for line in file]
+
+    assert [entry["Handout name"] for entry in handouts] == [
+        "h0",
+        "h1",
+    ]
+
+
+def test_dataframe(tmp_path, make_handout):
+    records = [make_handout("h0"), make_handout("h1")]
+    writer = write(CONST_OUTPUT_DF, records)
+
+    assert list(writer.result.columns) == CONST_HANDOUT_COLUMNS
+    assert len(writer.result) == 2
+
+
+def sqlite_handouts(file_path):
+    """
+    (Subscription id, consumed) of the handouts table of a database.
+
+    """
+
+    connection = sqlite3.connect(file_path)
+
+    try:
+        return connection.execute(
+            'SELECT "Subscription id", "Handout consumed" FROM handouts '
+            + 'ORDER BY "Subscription id"'
+        ).fetchall()
+    finally:
+        connection.close()
+
+
+def test_sqlite_replaced_without_append(tmp_path, make_handout):
+    records = [make_handout("h0"), make_handout("h1")]
+    file_path = str(tmp_path / "handouts.sqlite3")
+
+    write(CONST_OUTPUT_SQLITE, records, file_path=file_path)
+    write(CONST_OUTPUT_SQLITE, [make_handout("h2")], file_path=file_path)
+
+    assert sqlite_handouts(file_path) == [("sub-h2", "$10.00")]
+
+
+def test_sqlite_append_replaces_the_same_key(tmp_path, make_handout):
+    records = [make_handout("h0"), make_handout("h1")]
+    file_path = str(tmp_path / "handouts.sqlite3")
+
+    write(CONST_OUTPUT_SQLITE, records, file_path=file_path)
+    # the same subscription and crawl time as an existing record
+    write(
+        CONST_OUTPUT_SQLITE,
+        [make_handout("h1", consumed="$20.00"), make_handout("h2")],
+        file_path=file_path,
+        append=True,
+    )
+
+    assert sqlite_handouts(file_path) == [
+        ("sub-h0", "$10.00"),
+        ("sub-h1", "$20.00"),
+        ("sub-h2", "$10.00"),
+    ]
+
+
+def test_sqlite_users_as_json(tmp_path, make_handout):
+    file_path = str(tmp_path / "handouts.sqlite3")
+
+    write(CONST_OUTPUT_SQLITE, [make_handout("h0")], file_path=file_path)
+
+    connection = sqlite3.connect(file_path)
+    (users,) = connection.execute(
+        'SELECT "Subscription users" FROM handouts'
+    ).fetchone()
+    connection.close()
+
+    assert json.loads(users) == ["student@example.com"]
+
+
+def test_sqlite_crawl_time_keeps_the_microseconds(tmp_path, make_handout):
+    file_path = str(tmp_path / "handouts.sqlite3")
+    records = [
+        make_handout("h0", crawl_time=datetime(2021, 9, 1, 12)),
+        make_handout("h1", crawl_time=datetime(2021, 9, 1, 12, 0, 0, 5)),
+    ]
+
+    write(CONST_OUTPUT_SQLITE, records, file_path=file_path)
+
+    connection = sqlite3.connect(file_path)
+    rows = connection.execute(
+        'SELECT "Crawl time utc" FROM handouts ORDER BY "Crawl time utc"'
+    ).fetchall()
+    connection.close()
+
+    # as in the history store: the same width, so that text order is time
+    assert rows == [
+        ("2021-09-01T12:00:00.000000",),
+        ("2021-09-01T12:00:00.000005",),
+    ]
+
+
+@pytest.mark.parametrize("output", [CONST_OUTPUT_PARQUET, CONST_OUTPUT_ARROW])
+def test_columnar_append(tmp_path, make_handout, output):
+    records = [make_handout("h0"), make_handout("h1")]
+    pytest.importorskip("pyarrow")
+
+    file_path = str(tmp_path / ("handouts.%s" % (output)))
+
+    write(output, records, file_path=file_path)
+    # a new crawl of a subscription is added, the same crawl replaced
+    write(
+        output,
+        [
+            make_handout("h1", consumed="$20.00"),
+            make_handout("h1", crawl_time=datetime(2021, 9, 2)),
+        ],
+        file_path=file_path,
+        append=True,
+    )
+
+    if output == CONST_OUTPUT_PARQUET:
+        handouts_df = pd.read_parquet(file_path)
+    else:
+        handouts_df = pd.read_feather(file_path)
+
+    assert list(handouts_df.columns) == CONST_HANDOUT_COLUMNS
+    assert list(
+        zip(handouts_df["Subscription id"], handouts_df["Handout consumed"])
+    ) == [("sub-h0", "$10.00"), ("sub-h1", "$20.00"), ("sub-h1", "$10.00")]